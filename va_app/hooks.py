@@ -83,7 +83,12 @@ app_license = "private"
 # ------------
 
 # before_install = "va_app.install.before_install"
-# after_install = "va_app.install.after_install"
+after_install = "va_app.va_dian.api.dian_tercero_search.ensure_search_text_index"
+
+# Migration
+# ------------
+
+after_migrate = "va_app.va_dian.api.dian_tercero_search.ensure_search_text_index"
 
 # Uninstallation
 # ------------
@@ -145,6 +150,19 @@ app_license = "private"
 # 	}
 # }
 
+doc_events = {
+	"GL Entry": {
+		"before_insert": "va_app.va_dian.api.dian_gl_tercero.set_gl_entry_dian_tercero",
+	},
+}
+
+# Link field searches
+# -------------------
+
+standard_queries = {
+	"DIAN tercero": "va_app.va_dian.api.dian_tercero_search.search_dian_tercero",
+}
+
 # Scheduled Tasks
 # ---------------
 
@@ -166,6 +184,16 @@ app_license = "private"
 # 	],
 # }
 
+scheduler_events = {
+	"cron": {
+		# The DIAN spool is scanned at most every
+		# `va_dian_spool_poll_interval_seconds`.
+		"* * * * *": [
+			"va_app.va_dian.api.dian_zip_spool.scan_dian_zip_spool",
+		],
+	},
+}
+
 # Testing
 # -------
 
@@ -242,3 +270,7 @@ app_license = "private"
 # 	"Logging DocType Name": 30  # days to retain logs
 # }
 
+
+default_log_clearing_doctypes = {
+	"DIAN ingest log": 90,
+}
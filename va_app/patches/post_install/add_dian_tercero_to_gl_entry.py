@@ -0,0 +1,39 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+-----------------------------------------------------------------------------
+
+It adds the `DIAN tercero` of each `GL Entry`:
+- Creates the `custom_dian_tercero` field, with its index along the account
+  and the posting date.
+- Creates the `custom_dian_tercero_resolved` field, that marks the entries
+  already resolved, even without a `DIAN tercero` to link.
+- Enqueues the backfill of the existing entries.
+
+---------------------------------------------------------------------------- """
+
+import frappe
+from frappe.modules.utils import sync_customizations
+
+from va_app.va_dian.api.dian_gl_tercero import (
+    enqueue_gl_entry_dian_tercero_backfill,
+)
+
+
+GL_ENTRY_DIAN_TERCERO_INDEX = "account_dian_tercero_posting_date_index"
+
+
+def execute():
+    # Customizations are synced after the patches, and the field is needed
+    # now.
+    sync_customizations("va_app")
+
+    frappe.db.add_index(
+        "GL Entry",
+        ["account", "custom_dian_tercero", "posting_date"],
+        index_name=GL_ENTRY_DIAN_TERCERO_INDEX,
+    )
+
+    enqueue_gl_entry_dian_tercero_backfill()
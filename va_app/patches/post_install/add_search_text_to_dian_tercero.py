@@ -0,0 +1,53 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+-----------------------------------------------------------------------------
+
+It prepares the search of `DIAN tercero`:
+- Fills the `search_text` of the existing records, by chunks.
+- Creates the FULLTEXT index over it.
+
+---------------------------------------------------------------------------- """
+
+import frappe
+from frappe.query_builder import Case
+from frappe.utils import create_batch
+
+from va_app.va_dian.api.dian_tercero_search import (
+    SEARCH_TEXT_FIELDS,
+    build_search_text,
+    ensure_search_text_index,
+)
+
+
+# Records updated per statement.
+CHUNK_SIZE = 1000
+
+
+def execute():
+    table = frappe.qb.DocType("DIAN tercero")
+
+    names = frappe.get_all("DIAN tercero", pluck="name", order_by="name asc")
+    for chunk in create_batch(names, CHUNK_SIZE):
+        records = frappe.get_all(
+            "DIAN tercero",
+            filters={"name": ["in", chunk]},
+            fields=["name", *SEARCH_TEXT_FIELDS],
+        )
+        if not records:
+            continue
+
+        search_text = Case()
+        for record in records:
+            search_text = search_text.when(table.name == record.name, build_search_text(record))
+
+        (
+            frappe.qb.update(table)
+            .set(table.search_text, search_text)
+            .where(table.name.isin(chunk))
+        ).run()
+        frappe.db.commit()
+
+    ensure_search_text_index()
@@ -1,8 +1,8 @@
 """ ----------------------------------------------------------------------------
-Copyright (c) 2024-2025, VIDAL & ASTUDILLO Ltda and contributors.
+Copyright (c) 2024-2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2025-05-07
+Version 2026-10-18
 
 --------------------------------------------------------------------------------
 
@@ -30,6 +30,8 @@ GL_ENTRY_FIELD_NAME_DEBIT = "debit"
 GL_ENTRY_FIELD_NAME_CREDIT = "credit"
 GL_ENTRY_FIELD_NAME_CLOSING_DEBIT = "closing_debit"
 GL_ENTRY_FIELD_NAME_CLOSING_CREDIT = "closing_credit"
+GL_ENTRY_FIELD_NAME_DIAN_TERCERO = "custom_dian_tercero"
+GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED = "custom_dian_tercero_resolved"
 
 # DIAN tercero
 DIAN_TERCERO_DOCTYPE_NAME = "DIAN tercero"
@@ -0,0 +1,168 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+--------------------------------------------------------------------------------
+
+Content addressed storage of the files attached to the `DIAN document`.
+
+With `va_dian_content_addressed_files` on the site config, the XML and PDF
+ingested are stored once per content, on the private files named by their
+SHA-256. Every attachment still has its own `File` row, sharing the
+`file_url`; Frappe keeps the content on disk while any row refers to it, so
+the rows count the references.
+
+The files attached before can be collapsed with:
+
+bench --site <site> execute va_app.va_dian.api.dian_attachment_storage.deduplicate_dian_attachments
+
+---------------------------------------------------------------------------- """
+
+
+import os
+from pathlib import Path
+
+import frappe
+from frappe.utils import get_files_path
+
+from va_app.va_dian.api.utils import sha256_of_file
+
+
+# Files read per transaction by `deduplicate_dian_attachments`.
+DEDUPLICATE_CHUNK_SIZE = 500
+
+# Fields of `DIAN document` with attachments.
+DIAN_DOCUMENT_ATTACH_FIELDS = ("xml", "representation")
+
+
+def is_content_addressed() -> bool:
+    """
+    Returns:
+        Whether the DIAN attachments are stored by content
+    """
+    return bool(frappe.conf.get("va_dian_content_addressed_files"))
+
+
+def get_content_addressed_file_url(
+    sha256: str,
+    suffix: str,
+) -> str:
+    """
+    Returns:
+        The URL of the private file with the content of hash `sha256`
+    """
+    return f"/private/files/{sha256}{suffix.lower()}"
+
+
+def deduplicate_dian_attachments() -> dict[str, int]:
+    """
+    Moves the contents of the files attached to `DIAN document` to their
+    content addressed names, pointing to them every `File` row and document
+    field that referred to a copy, and removes the copies.
+
+    Files are compared by their SHA-256. The work is committed by chunks,
+    so it can be stopped and run again.
+
+    Only the `File` rows and the attach fields of `DIAN document` are
+    pointed to the new URLs, so the files also referred to by a `File` row
+    out of `DIAN document` (attached to another document, or to none) are
+    left as they are. A URL written on another document without a `File`
+    row, as in the text of a comment, is not detected.
+
+    Returns a dict with:
+    - `files`: Files read.
+    - `shared_skipped`: Files left as they are, for being shared.
+    - `copies_removed`: Files removed from disk.
+    - `bytes_freed`: Size of the files removed.
+    """
+
+    files_path = get_files_path(is_private=1)
+
+    file_urls = frappe.get_all(
+        "File",
+        filters={"attached_to_doctype": "DIAN document", "is_private": 1},
+        pluck="file_url",
+        distinct=True,
+        order_by="file_url",
+    )
+
+    stats = {"files": 0, "shared_skipped": 0, "copies_removed": 0, "bytes_freed": 0}
+    chunk = []
+
+    for file_url in file_urls:
+        if not file_url or not file_url.startswith("/private/files/"):
+            continue
+        chunk.append(file_url)
+
+        if len(chunk) >= DEDUPLICATE_CHUNK_SIZE:
+            _deduplicate_urls(chunk, files_path, stats)
+            chunk = []
+
+    if chunk:
+        _deduplicate_urls(chunk, files_path, stats)
+
+    return stats
+
+
+# -----------------------------------------------------------------------------
+# Helpers.
+# -----------------------------------------------------------------------------
+
+
+def _deduplicate_urls(
+    file_urls: list[str],
+    files_path: str,
+    stats: dict[str, int],
+):
+    """
+    Helper of `deduplicate_dian_attachments` that moves the files of
+    `file_urls` to their content addressed URLs, except the ones with a
+    `File` row out of `DIAN document`.
+    """
+
+    # `!=` also matches the rows attached to nothing.
+    shared_urls = set(frappe.get_all(
+        "File",
+        filters={"file_url": ["in", file_urls], "attached_to_doctype": ["!=", "DIAN document"]},
+        pluck="file_url",
+        distinct=True,
+    ))
+
+    # Old URLs grouped by the URL of their content.
+    moves = {}
+    for file_url in file_urls:
+        path = os.path.join(files_path, file_url.removeprefix("/private/files/"))
+        if not os.path.isfile(path):
+            continue
+        stats["files"] += 1
+        if file_url in shared_urls:
+            stats["shared_skipped"] += 1
+            continue
+        target_url = get_content_addressed_file_url(sha256_of_file(path), Path(path).suffix)
+        moves.setdefault(target_url, []).append((file_url, path))
+
+    removed = []
+    for target_url, sources in moves.items():
+        target_path = os.path.join(files_path, target_url.removeprefix("/private/files/"))
+        old_urls = [file_url for file_url, _ in sources if file_url != target_url]
+        if not old_urls:
+            continue
+
+        if not os.path.exists(target_path):
+            # Linked, so the old path stays valid until committed.
+            os.link(sources[0][1], target_path)
+
+        frappe.db.set_value("File", {"file_url": ["in", old_urls]}, "file_url", target_url, update_modified=False)
+        for field in DIAN_DOCUMENT_ATTACH_FIELDS:
+            frappe.db.set_value("DIAN document", {field: ["in", old_urls]}, field, target_url, update_modified=False)
+
+        removed.extend(path for file_url, path in sources if file_url != target_url)
+
+    frappe.db.commit()
+
+    for path in removed:
+        stats["copies_removed"] += 1
+        stats["bytes_freed"] += os.path.getsize(path)
+        os.remove(path)
@@ -1,8 +1,8 @@
 """ ----------------------------------------------------------------------------
-Copyright (c) 2024-2025, VIDAL & ASTUDILLO Ltda and contributors.
+Copyright (c) 2024-2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2025-05-07
+Version 2026-10-18
 
 --------------------------------------------------------------------------------
 
@@ -11,6 +11,9 @@ Data models.
 ---------------------------------------------------------------------------- """
 
 
+from array import array
+from collections.abc import Sequence
+from decimal import Decimal, InvalidOperation
 from enum import StrEnum
 from dataclasses import dataclass, field
 
@@ -74,17 +77,17 @@ class VA_DIAN_Address:
         return recursive_dataclass_to_dict(self)
 
 
-@dataclass
+@dataclass(slots=True)
 class VA_DIAN_Item:
     """Information about a DIAN Item"""
 
-    quantity: str | None
-    price: str | None
-    taxable_amount: str | None
-    tax_amount: str | None
-    extension_amount: str | None
+    quantity: Decimal | None
+    price: Decimal | None
+    taxable_amount: Decimal | None
+    tax_amount: Decimal | None
+    extension_amount: Decimal | None
     description: str | None
-    
+
     def dict(self):
         """
         JSON serializable objects are required when Frappe returns them as
@@ -93,6 +96,115 @@ class VA_DIAN_Item:
         return recursive_dataclass_to_dict(self)
 
 
+class VA_DIAN_ItemBlock(Sequence):
+    """
+    The items of a DIAN Document, stored by columns.
+
+    Amounts are kept as scaled integers (`units` x 10^`exponent`) on arrays,
+    so a line costs a few bytes per amount instead of an object, and totals
+    are computed over the arrays. Items are built as `VA_DIAN_Item` only when
+    accessed.
+    """
+
+    AMOUNT_FIELDS = ('quantity', 'price', 'taxable_amount', 'tax_amount', 'extension_amount')
+
+    # Exponents that mark an amount as missing, or as kept on `_exceptions`
+    # (written with exponents or too large for the arrays, or not numeric).
+    _MISSING = 127
+    _EXCEPTION = -128
+
+    def __init__(self):
+        self._units = {name: array('q') for name in self.AMOUNT_FIELDS}
+        self._exponents = {name: array('b') for name in self.AMOUNT_FIELDS}
+        self._exceptions = {}
+        self._descriptions = []
+
+    def __len__(self):
+        return len(self._descriptions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('item index out of range')
+        return VA_DIAN_Item(
+            **{name: self._get_amount(name, index) for name in self.AMOUNT_FIELDS},
+            description=self._descriptions[index],
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, VA_DIAN_ItemBlock):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f'VA_DIAN_ItemBlock({len(self)} items)'
+
+    def append_fields(self, description: str | None = None, **amounts: str | None):
+        """
+        Adds an item from the text of its fields.
+        """
+        index = len(self._descriptions)
+        for name in self.AMOUNT_FIELDS:
+            self._append_amount(name, index, amounts.get(name))
+        self._descriptions.append(description)
+
+    def total(self, field_name: str) -> Decimal:
+        """
+        Sum of the amount `field_name` of all the items. Missing amounts count
+        as zero.
+        """
+        exponents = set(self._exponents[field_name])
+        exponents.discard(self._MISSING)
+
+        # Usually all the amounts share the exponent: a plain sum of units.
+        if len(exponents) == 1 and self._EXCEPTION not in exponents:
+            return Decimal(sum(self._units[field_name])).scaleb(exponents.pop())
+
+        total = Decimal(0)
+        for index in range(len(self)):
+            amount = self._get_amount(field_name, index)
+            if isinstance(amount, Decimal):
+                total += amount
+        return total
+
+    def _get_amount(self, name: str, index: int) -> Decimal | str | None:
+        exponent = self._exponents[name][index]
+        if exponent == self._MISSING:
+            return None
+        if exponent == self._EXCEPTION:
+            return self._exceptions[(name, index)]
+        return Decimal(self._units[name][index]).scaleb(exponent)
+
+    def _append_amount(self, name: str, index: int, text: str | None):
+        units = self._units[name]
+        exponents = self._exponents[name]
+
+        if text is None:
+            units.append(0)
+            exponents.append(self._MISSING)
+            return
+
+        # Plain decimals ("1234.50") are the norm and are converted directly.
+        whole, _, fraction = text.partition('.')
+        try:
+            if '_' in text or len(fraction) > 126:
+                raise ValueError(text)
+            units.append(int(whole + fraction))
+        except (ValueError, OverflowError):
+            units.append(0)
+            exponents.append(self._EXCEPTION)
+            try:
+                self._exceptions[(name, index)] = Decimal(text)
+            except InvalidOperation:
+                # Not a number; the text is kept as it came.
+                self._exceptions[(name, index)] = text
+            return
+        exponents.append(-len(fraction))
+
+
 def default_items_list() -> list[VA_DIAN_Item] | None:
     return []
 
@@ -114,7 +226,7 @@ class VA_DIAN_Document:
     receiver_party_name: str | None
     receiver_party_id: str | None
     # items: list | None = field(default_factory=default_items_list, default=None)
-    items: list[VA_DIAN_Item] | None = field(default=None)
+    items: VA_DIAN_ItemBlock | None = field(default=None)
 
     def dict(self):
         """
@@ -129,3 +241,12 @@ class VA_DIAN_Document:
         content.
         """
         return provide_nicely_formatted_dictionary(self.dict())
+
+    def items_total(self, field_name: str) -> Decimal:
+        """
+        Sum of the amount `field_name` (`extension_amount`, `tax_amount`...)
+        of the items. Zero when there are no items.
+        """
+        if not self.items:
+            return Decimal(0)
+        return self.items.total(field_name)
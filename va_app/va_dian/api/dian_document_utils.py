@@ -2,56 +2,72 @@
 Copyright (c) 2024-2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2026-02-16
+Version 2026-10-18
 ---------------------------------------------------------------------------- """
 
 
+import hashlib
+import mmap
+from contextlib import nullcontext
+from decimal import Decimal
+
 import frappe
+from frappe.utils import create_batch, get_files_path, now
 from frappe.utils.file_manager import get_file_path
-import xml.etree.ElementTree as ET
 
 from va_app.va_dian.api.dian_data_models import (
     VA_DIAN_Document,
     VA_DIAN_Tercero,
-    VA_DIAN_Address,
-    VA_DIAN_Item,
-    ElectronicDocument,
+)
+from va_app.va_dian.api.dian_ingest_log import (
+    INGEST_OPERATION_TERCERO,
+    INGEST_OPERATION_XML,
+    IngestTimer,
+    save_ingest_log,
 )
 from va_app.va_dian.api.dian_tercero_utils import (
-    upsert_dian_tercero,
+    TERCERO_SOURCE_XML,
+    UPSERT_INGEST_STATUS,
+    _aux_upsert_dian_tercero_record,
+    _upsert_dian_tercero,
+)
+from va_app.va_dian.api.dian_xml_extractor import (
+    EXTRACTOR_VERSION,
+    DIANXMLExtractionError,
+    ExtractionLevel,
+    extract_dian_document,
 )
+from va_app.va_dian.api.dian_xml_batch import extract_dian_documents
+from va_app.va_dian.doctype.dian_document.dian_document import DIANdocument
 
 
-def aux_get_text(
-    elem: ET,
-) -> str | None:
-    """
-    Helper to get text or None if missing.
-    """
-    return elem.text.strip() if elem is not None and elem.text else None
+# Extraction results are cached by the SHA-256 of the XML. Entries expire
+# after the TTL, and the Redis cache evicts the least recently used ones when
+# it is full.
+XML_EXTRACTION_CACHE_KEY = "va_dian_xml_extraction"
+XML_EXTRACTION_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
 
+# Documents written per transaction by `update_docs_with_xml_info`.
+BULK_UPDATE_CHUNK_SIZE = 200
 
-def _aux_determine_type_of_document(
-    find_result: ET,
-) -> str | None:
-    """
-    Helper to determine the electronic document type from the identification
-    text on it.
-    """
-    result = aux_get_text(find_result)
-    match result:
-        case 'Contenedor de Factura Electrónica':
-            return ElectronicDocument.FACTURA_ELECTRONICA
-        case 'Contenedor de Factura Electronica':
-            return ElectronicDocument.FACTURA_ELECTRONICA
-        case _:
-            return ElectronicDocument.INDETERMINADO
+# Processes used to extract several XML files at once (None: one per CPU).
+XML_EXTRACTION_WORKERS = None
+
+# Columns written for each `DIAN document item`, and rows per insert.
+DIAN_DOCUMENT_ITEM_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus", "idx",
+    "dian_document", "description", "quantity", "price",
+    "taxable_amount", "tax_amount", "extension_amount",
+)
+DIAN_DOCUMENT_ITEM_INSERT_CHUNK_SIZE = 5000
 
 
 def _aux_extract_xml_info_from_dian_document(
     docname: str | None,
+    timer: IngestTimer | None = None,
 ) -> VA_DIAN_Document | None:
     """
+    The extraction is measured on `timer`, if provided.
     Returns:
     - An object `VA_DIAN_Document` for the XML field of the docname received,
       (if valid)
@@ -82,15 +98,23 @@ def _aux_extract_xml_info_from_dian_document(
 
     return _get_dian_document_object_from_xml_file(
         xml_file_path=file_doc,
+        timer=timer,
     )
 
 
 def _get_dian_document_object_from_xml_file(
     xml_file_path: str | None,
+    level: ExtractionLevel = ExtractionLevel.FULL,
+    timer: IngestTimer | None = None,
 ) -> VA_DIAN_Document | None:
     """
     Provides a VA_DIAN_Document object that represents the content
     of the XML file at the path provided.
+    With `ExtractionLevel.HEADER` only the identification of the document
+    is provided (type, CUFE, issue date and parties), which is much faster
+    for large invoices.
+    With `timer`, the extraction is measured on its `extract` stage and
+    the size of the XML on its `xml_bytes`.
     """
     if xml_file_path is None:
         frappe.throw("Received XML file path is None")
@@ -98,222 +122,186 @@ def _get_dian_document_object_from_xml_file(
     # Determine the file path.
     file_path = get_file_path(xml_file_path)
 
-    # Read the XML file.
+    # The file is mapped once, for its hash and, if it was not already
+    # processed, for its extraction.
     try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-    except Exception as e:
+        with (
+            timer.stage("extract") if timer else nullcontext(),
+            open(file_path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content,
+        ):
+            if timer:
+                timer.count("xml_bytes", len(content))
+            cache_key = _aux_get_xml_extraction_cache_key(hashlib.sha256(content).hexdigest(), level)
+            cached_result = frappe.cache.get_value(cache_key)
+            if cached_result is not None:
+                return cached_result
+
+            result = extract_dian_document(content, level=level)
+    except (OSError, ValueError) as e:
+        # `mmap` raises `ValueError` on empty files.
         frappe.throw("Error processing XML: " + str(e))
         return None
+    except DIANXMLExtractionError as e:
+        frappe.throw(str(e))
+        return None
 
-    document_namespace = {
-        'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
-        'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
-    }
+    frappe.cache.set_value(
+        cache_key,
+        result,
+        expires_in_sec=XML_EXTRACTION_CACHE_TTL_SECONDS,
+    )
+    return result
 
-    # ######################################################################
-    # Find generic information that should be present in any kind of
-    # DIAN electronic document.
-    # ######################################################################
 
-    document_type = _aux_determine_type_of_document(
-        root.find('cbc:DocumentType', document_namespace)
-    )
-    reg_document_id = root.find('cbc:ParentDocumentID', document_namespace)
-    reg_issue_date = root.find('cbc:IssueDate', document_namespace)
-    reg_issue_time = root.find('cbc:IssueTime', document_namespace)
-    reg_sender_party_name = root.find(
-        'cac:SenderParty/cac:PartyTaxScheme/cbc:RegistrationName',
-        document_namespace,
-    )
-    reg_sender_party_id = root.find(
-        'cac:SenderParty/cac:PartyTaxScheme/cbc:CompanyID',
-        document_namespace,
-    )
-    reg_receiver_party_name = root.find(
-        'cac:ReceiverParty/cac:PartyTaxScheme/cbc:RegistrationName',
-        document_namespace,
-    )
-    reg_receiver_party_id = root.find(
-        'cac:ReceiverParty/cac:PartyTaxScheme/cbc:CompanyID',
-        document_namespace,
-    )
+def _aux_get_xml_extraction_cache_key(
+    xml_sha256: str,
+    level: ExtractionLevel = ExtractionLevel.FULL,
+) -> str:
+    """
+    Helper that provides the cache key for the extraction result, at the
+    level provided, of an XML with the hash provided.
+    """
+    return f"{XML_EXTRACTION_CACHE_KEY}:{EXTRACTOR_VERSION}:{level}:{xml_sha256}"
 
-    # ######################################################################
-    # Document-type dependant information.
-    # ######################################################################
 
-    document_uuid = None
-    document_items = None  # Not all documents use this
-    document_sender_address = None
-    reg_sender_email_elem = None
-    reg_sender_telephone_elem = None
+def _aux_extract_xml_files(
+    file_paths: list[str],
+    timer: IngestTimer | None = None,
+) -> dict[str, VA_DIAN_Document | str]:
+    """
+    Extracts several XML files at once, taking the unchanged ones from the
+    cache and spreading the rest across processes. With `timer`, the sizes
+    of the XML files read are added to its `xml_bytes`.
+    Returns a dict keyed by file path with:
+    - The `VA_DIAN_Document` of the file, if successful.
+    - The error message, otherwise.
+    """
 
-    # Find the Description element that contains the CDATA invoice XML
-    desc_elem = root.find(
-        'cac:Attachment/cac:ExternalReference/cbc:Description',
-        document_namespace,
-    )
-    if desc_elem is None or not desc_elem.text:
-        frappe.throw(
-            "Could not find embedded data in the AttachedDocument of the XML"
+    results = {}
+    pending = {}
+
+    for file_path in file_paths:
+        try:
+            with open(file_path, "rb") as f:
+                content = f.read()
+        except OSError as e:
+            results[file_path] = "Error processing XML: " + str(e)
+            continue
+        if timer:
+            timer.count("xml_bytes", len(content))
+        cache_key = _aux_get_xml_extraction_cache_key(hashlib.sha256(content).hexdigest())
+        cached_result = frappe.cache.get_value(cache_key)
+        if cached_result is not None:
+            results[file_path] = cached_result
+        else:
+            pending[file_path] = (cache_key, content)
+
+    for file_path, result in extract_dian_documents(
+        ((file_path, content) for file_path, (_, content) in pending.items()),
+        max_workers=XML_EXTRACTION_WORKERS,
+    ):
+        if isinstance(result, DIANXMLExtractionError):
+            results[file_path] = str(result)
+            continue
+        frappe.cache.set_value(
+            pending[file_path][0],
+            result,
+            expires_in_sec=XML_EXTRACTION_CACHE_TTL_SECONDS,
         )
-        return None
+        results[file_path] = result
 
-    cdata = desc_elem.text.strip()
-    # strip XML declaration if present.
-    if cdata.startswith('<?xml'):
-        cdata = cdata.split('?>', 1)[1]
+    return results
 
-    try:
-        # Parse the CDATA content as XML.
-        extra_document_root = ET.fromstring(cdata)
 
-        # ------------------------------------------------------------------
-        # CUFE / UUID (authoritative identifier).
-        # ------------------------------------------------------------------
-        document_uuid = aux_get_text(
-            extra_document_root.find('.//cbc:UUID', document_namespace)
-        )
+def _aux_get_full_path_for_file_url(
+    file_url: str,
+) -> str:
+    """
+    Helper that provides the path on disk for the `file_url` of a `File`,
+    without querying it.
+    """
+    if file_url.startswith("/private/files/"):
+        return get_files_path(*file_url.split("/private/files/", 1)[1].split("/"), is_private=1)
+    return get_files_path(*file_url.split("/files/", 1)[1].split("/"))
 
-        # ------------------------------------------------------------------
-        # Sender address.
-        # ------------------------------------------------------------------
-        reg_sender_address_elem = extra_document_root.find(
-            'cac:AccountingSupplierParty/cac:Party/cac:PhysicalLocation/cac:Address',
-            document_namespace,
-        )
-        if reg_sender_address_elem is not None:
-            document_sender_address = VA_DIAN_Address(
-                direccion=aux_get_text(
-                    reg_sender_address_elem.find(
-                        'cac:AddressLine/cbc:Line',
-                        document_namespace,
-                    )
-                ),
-                ciudad=aux_get_text(
-                    reg_sender_address_elem.find(
-                        'cbc:CityName',
-                        document_namespace,
-                    )
-                ),
-                departamento=aux_get_text(
-                    reg_sender_address_elem.find(
-                        'cbc:CountrySubentity',
-                        document_namespace,
-                    )
-                ),
-                codigo_postal=aux_get_text(
-                    reg_sender_address_elem.find(
-                        'cbc:PostalZone',
-                        document_namespace,
-                    )
-                ),
-                pais=aux_get_text(
-                    reg_sender_address_elem.find(
-                        'cac:Country/cbc:Name',
-                        document_namespace,
-                    )
-                ),
-            )
 
-        # ------------------------------------------------------------------
-        # Sender e-mail address.
-        # ------------------------------------------------------------------
-        reg_sender_email_elem = extra_document_root.find(
-            'cac:AccountingSupplierParty/cac:Party/cac:Contact/cbc:ElectronicMail',
-            document_namespace,
-        )
+def _aux_get_dian_document_values_from_xml_result(
+    xml_result: VA_DIAN_Document,
+) -> dict[str, object]:
+    """
+    Helper that provides the fields of a `DIAN document` populated from its
+    extracted XML information.
+    """
+    return {
+        "xml_content": xml_result.as_beauty_text(),
+        "xml_cufe": xml_result.uuid,
+        "xml_issue_date": xml_result.issue_date,
+        "xml_dian_tercero": str(xml_result.sender_party_id),
+        "xml_document_type": xml_result.document_type,
+        "xml_document_id": xml_result.document_id,
+        "xml_items_count": len(xml_result.items or ()),
+        "xml_total_taxable_amount": xml_result.items_total("taxable_amount"),
+        "xml_total_tax_amount": xml_result.items_total("tax_amount"),
+        "xml_total_extension_amount": xml_result.items_total("extension_amount"),
+    }
 
-        # ------------------------------------------------------------------
-        # Sender telephone number.
-        # ------------------------------------------------------------------
-        reg_sender_telephone_elem = extra_document_root.find(
-            'cac:AccountingSupplierParty/cac:Party/cac:Contact/cbc:Telephone',
-            document_namespace,
-        )
 
-        # ------------------------------------------------------------------
-        # Dependant on type of document.
-        # ------------------------------------------------------------------
-        match document_type:
-            case ElectronicDocument.FACTURA_ELECTRONICA:
-                # Extract item list.
-                for line in extra_document_root.findall(
-                    './/cac:InvoiceLine',
-                    document_namespace,
-                ):
-                    if document_items is None:
-                        document_items = []
-
-                    document_items.append(
-                        VA_DIAN_Item(
-                            quantity=aux_get_text(
-                                line.find(
-                                    './/cbc:InvoicedQuantity',
-                                    document_namespace,
-                                )
-                            ),
-                            price=aux_get_text(
-                                line.find(
-                                    './/cac:Price/cbc:PriceAmount',
-                                    document_namespace,
-                                )
-                            ),
-                            taxable_amount=aux_get_text(
-                                line.find(
-                                    './/cbc:TaxableAmount',
-                                    document_namespace,
-                                )
-                            ),
-                            tax_amount=aux_get_text(
-                                line.find(
-                                    './/cbc:TaxAmount',
-                                    document_namespace,
-                                )
-                            ),
-                            extension_amount=aux_get_text(
-                                line.find(
-                                    './/cbc:LineExtensionAmount',
-                                    document_namespace,
-                                )
-                            ),
-                            description=aux_get_text(
-                                line.find(
-                                    './/cac:Item/cbc:Description',
-                                    document_namespace,
-                                )
-                            ),
-                        )
-                    )
-            case _:
-                frappe.throw("Unknown document type. No extra information would be produced.")
-
-    except ET.ParseError:
-        pass
-
-    # Before procedding, we try to determine the UUID if not yet identified
-    if document_uuid is None:
-        document_uuid = aux_get_text(root.find('cac:ParentDocumentLineReference/cac:DocumentReference/cbc:UUID', document_namespace))
-
-    # Build object
-    to_return = VA_DIAN_Document(
-        document_type = document_type,
-        document_id = aux_get_text(reg_document_id),
-        uuid = document_uuid,
-        issue_date = aux_get_text(reg_issue_date),
-        issue_time = aux_get_text(reg_issue_time),
-        sender_party_name = aux_get_text(reg_sender_party_name),
-        sender_party_id = aux_get_text(reg_sender_party_id),
-        sender_address = document_sender_address,
-        sender_email=aux_get_text(reg_sender_email_elem),
-        sender_telephone=aux_get_text(reg_sender_telephone_elem),
-        receiver_party_name = aux_get_text(reg_receiver_party_name),
-        receiver_party_id = aux_get_text(reg_receiver_party_id),
-        items=document_items,
+def _aux_replace_dian_document_items(
+    xml_results: dict[str, VA_DIAN_Document],
+    replace: bool = True,
+):
+    """
+    Replaces the `DIAN document item` records of each `docname` with the
+    items of its extracted XML information. Rows are written with bulk
+    inserts; nothing is committed. Without `replace`, for new documents,
+    existing rows are not looked for.
+    """
+
+    if not xml_results:
+        return
+
+    if replace:
+        frappe.db.delete("DIAN document item", {"dian_document": ["in", list(xml_results)]})
+
+    timestamp = now()
+    user = frappe.session.user
+    frappe.db.bulk_insert(
+        "DIAN document item",
+        DIAN_DOCUMENT_ITEM_FIELDS,
+        (
+            (
+                frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0, idx,
+                docname, item.description, _aux_decimal_or_none(item.quantity),
+                _aux_decimal_or_none(item.price), _aux_decimal_or_none(item.taxable_amount),
+                _aux_decimal_or_none(item.tax_amount), _aux_decimal_or_none(item.extension_amount),
+            )
+            for docname, xml_result in xml_results.items()
+            for idx, item in enumerate(xml_result.items or (), start=1)
+        ),
+        chunk_size=DIAN_DOCUMENT_ITEM_INSERT_CHUNK_SIZE,
     )
 
-    return to_return
+
+def _aux_decimal_or_none(
+    value: Decimal | str | None,
+) -> Decimal | None:
+    """
+    Helper that discards the amounts of an item that are not numeric.
+    """
+    return value if isinstance(value, Decimal) else None
+
+
+def get_dian_document_for_cufe(
+    cufe: str,
+) -> str | None:
+    """
+    Returns:
+    - The name of the `DIAN document` with the CUFE received, if any.
+    - None, otherwise.
+    """
+    # `xml_cufe` is unique, so this is an indexed lookup.
+    return frappe.db.get_value("DIAN document", {"xml_cufe": cufe}, "name")
 
 
 @frappe.whitelist()
@@ -322,6 +310,8 @@ def update_doc_with_xml_info(
 ) -> bool | None:
     """
     Update the `DIAN document` with the information contained on its XML file.
+    Nothing is committed. The stages are recorded on a `DIAN ingest log`,
+    within the transaction of the caller.
     Returns:
     - True, if successful.
     - None, otherwise.
@@ -331,50 +321,287 @@ def update_doc_with_xml_info(
         frappe.throw("Please provide a document to update")
         return None
 
-    # Obtain document to update
-    doc = frappe.get_doc("DIAN document", docname)
+    timer = IngestTimer()
 
-    # Obtain results from fetching XML
-    xml_result = _aux_extract_xml_info_from_dian_document(docname)
-    if xml_result is None:
-        frappe.throw(f"DIAN Document {docname} has not valid XML information on it.")
-        return None
+    try:
+        # Obtain document to update
+        doc = frappe.get_doc("DIAN document", docname)
+
+        # Obtain results from fetching XML
+        xml_result = _aux_extract_xml_info_from_dian_document(docname, timer)
+        if xml_result is None:
+            frappe.throw(f"DIAN Document {docname} has not valid XML information on it.")
+            return None
+
+        # Obtain CUFE / UUID from XML.
+        if xml_result.uuid is None:
+            frappe.throw("XML does not contain a valid CUFE / UUID")
+            return None
+
+        # ------------------------------------------------------------------
+        # Persist extracted information
+        # ------------------------------------------------------------------
+        values = _aux_get_dian_document_values_from_xml_result(xml_result)
+        doc.update(values)
+
+        with timer.stage("insert"):
+            doc.save(ignore_permissions=True)
+        with timer.stage("items"):
+            _aux_replace_dian_document_items({docname: xml_result})
+        timer.count("items_count", values["xml_items_count"])
+        timer.documents += 1
+
+    except Exception as e:
+        save_ingest_log(
+            timer, docname, "Failed", error=e,
+            operation=INGEST_OPERATION_XML, commit=False,
+        )
+        raise
 
-    # Obtain CUFE / UUID from XML.
-    if xml_result.uuid is None:
-        frappe.throw("XML does not contain a valid CUFE / UUID")
+    save_ingest_log(
+        timer, docname, "Updated", dian_document=docname,
+        operation=INGEST_OPERATION_XML, commit=False,
+    )
+    return True
+
+
+@frappe.whitelist()
+def update_docs_with_xml_info(
+    docnames=None,
+    filters=None,
+) -> list[dict[str, object]]:
+    """
+    Update several `DIAN document` with the information contained on their
+    XML files: the ones on `docnames` or, if not provided, the ones matching
+    `filters`.
+
+    Unlike `update_doc_with_xml_info`, documents are not saved one by one.
+    Their attachments are located with a single query, the XML files are
+    extracted in parallel processes and the results are written in chunks, committing
+    each one. The stages of the whole update are recorded on a
+    `DIAN ingest log`.
+
+    Returns a list with an entry per document with:
+    - `docname`.
+    - `success`: True, if the document was updated.
+    - `message`: The reason, if it was not.
+    """
+
+    frappe.has_permission("DIAN document", "write", throw=True)
+
+    docnames = frappe.parse_json(docnames) if docnames else None
+    filters = frappe.parse_json(filters) if filters else None
+
+    if not docnames and not filters:
+        frappe.throw("Please provide the documents or the filters to select them")
         return None
 
+    if not docnames:
+        docnames = frappe.get_all("DIAN document", filters=filters, pluck="name")
+
     # ------------------------------------------------------------------
-    # Persist extracted information
+    # Locate every document and attachment at once.
     # ------------------------------------------------------------------
-    doc.set(
-        "xml_content",
-        xml_result.as_beauty_text(),
-    )
-    doc.set(
-        "xml_cufe",
-        xml_result.uuid,
-    )
-    doc.set(
-        "xml_issue_date",
-        xml_result.issue_date,
-    )
-    doc.set(
-        "xml_dian_tercero",
-        str(xml_result.sender_party_id),
-    )
-    doc.set(
-        "xml_document_type",
-        xml_result.document_type,
-    )
-    doc.set(
-        "xml_document_id",
-        xml_result.document_id,
+    documents = {
+        row.name: row
+        for row in frappe.get_all(
+            "DIAN document",
+            filters={"name": ["in", docnames]},
+            fields=["name", "xml", "representation"],
+        )
+    }
+    xml_files = {}
+    for row in frappe.get_all(
+        "File",
+        filters={
+            "attached_to_doctype": "DIAN document",
+            "attached_to_name": ["in", list(documents)],
+            "file_url": ['like', '%xml%'],
+        },
+        fields=["attached_to_name", "file_url"],
+    ):
+        xml_files.setdefault(row.attached_to_name, row.file_url)
+
+    errors = {}
+    file_paths = {}
+    for docname in docnames:
+        if docname not in documents:
+            errors[docname] = f"DIAN document {docname} not found."
+        elif not documents[docname].xml:
+            errors[docname] = "No XML attachment found."
+        elif docname not in xml_files:
+            errors[docname] = "Unable to locate the attached XML file."
+        else:
+            file_paths[docname] = _aux_get_full_path_for_file_url(xml_files[docname])
+
+    # ------------------------------------------------------------------
+    # Extract and write by chunks.
+    # ------------------------------------------------------------------
+    timer = IngestTimer()
+    source = f"update_docs_with_xml_info ({len(docnames)})"
+
+    try:
+        for chunk in create_batch(list(file_paths), BULK_UPDATE_CHUNK_SIZE):
+            with timer.stage("extract"):
+                xml_results = _aux_extract_xml_files([file_paths[docname] for docname in chunk], timer)
+            document_updates = {}
+            item_updates = {}
+            for docname in chunk:
+                xml_result = xml_results[file_paths[docname]]
+                if isinstance(xml_result, str):
+                    errors[docname] = xml_result
+                elif xml_result.uuid is None:
+                    errors[docname] = "XML does not contain a valid CUFE / UUID"
+                else:
+                    document_updates[docname] = _aux_get_dian_document_values_from_xml_result(xml_result)
+                    item_updates[docname] = xml_result
+
+            file_updates = _aux_get_attachment_renames(
+                {docname: documents[docname] for docname in document_updates},
+                document_updates,
+                errors,
+            )
+            for docname in list(document_updates):
+                if docname in errors:
+                    del document_updates[docname]
+
+            _aux_write_document_updates(document_updates, item_updates, file_updates, errors, timer)
+
+    except Exception as e:
+        frappe.db.rollback()
+        save_ingest_log(timer, source, "Failed", error=e, operation=INGEST_OPERATION_XML)
+        raise
+
+    save_ingest_log(
+        timer,
+        source,
+        "Updated" if timer.documents else "Failed",
+        error=f"{len(errors)} of {len(docnames)} documents not updated" if errors else None,
+        operation=INGEST_OPERATION_XML,
     )
 
-    doc.save(ignore_permissions=True)
-    return True
+    return [
+        {
+            "docname": docname,
+            "success": docname not in errors,
+            "message": errors.get(docname),
+        }
+        for docname in docnames
+    ]
+
+
+def _aux_get_attachment_renames(
+    documents: dict[str, dict],
+    document_updates: dict[str, dict[str, object]],
+    errors: dict[str, str],
+) -> dict[str, dict[str, str]]:
+    """
+    Validates the `DIAN tercero` of the updates and provides the new names of
+    the attached files, as `DIANdocument.after_save` would do, keyed by the
+    `docname`. Failures are added to `errors`.
+    """
+
+    existing_terceros = set(frappe.get_all(
+        "DIAN tercero",
+        filters={"name": ["in", list({values["xml_dian_tercero"] for values in document_updates.values()})]},
+        pluck="name",
+    ))
+
+    file_urls = [
+        documents[docname].get(field)
+        for docname in document_updates
+        for field in ("xml", "representation")
+    ]
+    # With content addressed storage, documents share their `file_url`, so
+    # each one takes the rows attached to it.
+    files_by_document_url = {}
+    for row in frappe.get_all(
+        "File",
+        filters={
+            "attached_to_doctype": "DIAN document",
+            "attached_to_name": ["in", list(document_updates)],
+            "file_url": ["in", [file_url for file_url in file_urls if file_url]],
+        },
+        fields=["name", "attached_to_name", "file_url", "file_name"],
+        order_by="creation asc",
+    ):
+        files_by_document_url.setdefault((row.attached_to_name, row.file_url), row)
+
+    renames = {}
+    for docname, values in document_updates.items():
+        party = values["xml_dian_tercero"]
+        if party not in existing_terceros:
+            errors[docname] = f"Could not find DIAN tercero: {party}"
+            continue
+        if not values["xml_issue_date"]:
+            errors[docname] = "Fecha de emisión no determinada; No es posible renombrar los archivos adjuntos"
+            continue
+
+        renames[docname] = {}
+        for field in ("xml", "representation"):
+            file_row = files_by_document_url.get((docname, documents[docname].get(field)))
+            if file_row is None:
+                errors[docname] = f"Unable to locate the attached file on `{field}`."
+                break
+            new_name = DIANdocument.build_attachment_file_name(party, values["xml_issue_date"], file_row.file_name)
+            if file_row.file_name != new_name:
+                renames[docname][file_row.name] = new_name
+
+    return renames
+
+
+def _aux_write_document_updates(
+    document_updates: dict[str, dict[str, object]],
+    item_updates: dict[str, VA_DIAN_Document],
+    file_updates: dict[str, dict[str, str]],
+    errors: dict[str, str],
+    timer: IngestTimer,
+):
+    """
+    Writes the updates of a chunk of `DIAN document`, their items and the
+    renames of their attached files in a single transaction. If it fails, documents are written
+    one by one to tell which ones can not be updated; those are added to
+    `errors`. The stages and the documents written are measured on `timer`.
+    """
+
+    def file_name_updates(docnames):
+        return {
+            file_name: {"file_name": new_name}
+            for docname in docnames
+            for file_name, new_name in file_updates.get(docname, {}).items()
+        }
+
+    def count_written(docnames):
+        timer.documents += len(docnames)
+        timer.count("items_count", sum(document_updates[docname]["xml_items_count"] for docname in docnames))
+
+    try:
+        with timer.stage("insert"):
+            frappe.db.bulk_update("DIAN document", document_updates, chunk_size=BULK_UPDATE_CHUNK_SIZE)
+            frappe.db.bulk_update("File", file_name_updates(document_updates), chunk_size=BULK_UPDATE_CHUNK_SIZE)
+        with timer.stage("items"):
+            _aux_replace_dian_document_items({docname: item_updates[docname] for docname in document_updates})
+        with timer.stage("commit"):
+            frappe.db.commit()
+        count_written(document_updates)
+        return
+    except Exception:
+        frappe.db.rollback()
+
+    for docname, values in document_updates.items():
+        try:
+            with timer.stage("insert"):
+                frappe.db.set_value("DIAN document", docname, values)
+                for file_name, file_values in file_name_updates([docname]).items():
+                    frappe.db.set_value("File", file_name, file_values)
+            with timer.stage("items"):
+                _aux_replace_dian_document_items({docname: item_updates[docname]})
+            with timer.stage("commit"):
+                frappe.db.commit()
+            count_written([docname])
+        except Exception as e:
+            frappe.db.rollback()
+            errors[docname] = str(e)
 
 
 @frappe.whitelist()
@@ -383,7 +610,8 @@ def update_dian_tercero_with_xml_info(
 ) -> str | None:
     """
     Insert/Update document in `DIAN tercero` using the XML information
-    on the table `DIAN Document` for the provided `docname`.
+    on the table `DIAN Document` for the provided `docname`. The stages are
+    recorded on a `DIAN ingest log`.
     Returns:
     - The `docname` of the record updated on `DIAN tercero`, if successful.
     - None, otherwise.
@@ -393,13 +621,67 @@ def update_dian_tercero_with_xml_info(
         frappe.throw("Please provide a document for DIAN Document")
         return None
 
-    # Obtain results from fecthing XML.
-    xml_result = _aux_extract_xml_info_from_dian_document(docname)
-    if xml_result is None:
-        return None
-    
-    # Build tercero data object.
-    tercero_data = VA_DIAN_Tercero(
+    timer = IngestTimer()
+
+    try:
+        # Obtain results from fecthing XML.
+        xml_result = _aux_extract_xml_info_from_dian_document(docname, timer)
+        if xml_result is None:
+            return None
+
+        with timer.stage("tercero"):
+            result_from_upsert, outcome = _aux_upsert_dian_tercero_record(
+                _aux_get_dian_tercero_data_from_xml_result(xml_result).dict(),
+                TERCERO_SOURCE_XML,
+            )
+        with timer.stage("commit"):
+            frappe.db.commit()
+        timer.documents += 1
+
+    except Exception as e:
+        save_ingest_log(
+            timer, docname, "Failed", error=e,
+            operation=INGEST_OPERATION_TERCERO, commit=False,
+        )
+        raise
+
+    save_ingest_log(
+        timer, docname, UPSERT_INGEST_STATUS[outcome], dian_document=docname,
+        operation=INGEST_OPERATION_TERCERO,
+    )
+
+    return result_from_upsert
+
+
+def ensure_dian_tercero_for_xml_result(
+    xml_result: VA_DIAN_Document,
+) -> str:
+    """
+    Inserts the `DIAN tercero` sender of `xml_result` if it does not exist
+    yet, without committing. An existing one is left as it is.
+
+    Returns:
+        The `docname` of the `DIAN tercero`
+    """
+    nit = str(xml_result.sender_party_id)
+    if frappe.db.exists("DIAN tercero", nit):
+        return nit
+
+    return _upsert_dian_tercero(
+        _aux_get_dian_tercero_data_from_xml_result(xml_result).dict(),
+        commit=False,
+        source=TERCERO_SOURCE_XML,
+    )
+
+
+def _aux_get_dian_tercero_data_from_xml_result(
+    xml_result: VA_DIAN_Document,
+) -> VA_DIAN_Tercero:
+    """
+    Helper that provides the `DIAN tercero` data of the sender of the
+    extracted XML information.
+    """
+    return VA_DIAN_Tercero(
         nit=xml_result.sender_party_id,
         numero_de_identificacion=None,
         tipo_de_documento=None,
@@ -419,7 +701,3 @@ def update_dian_tercero_with_xml_info(
         codigo_postal=xml_result.sender_address.codigo_postal,
         pais=xml_result.sender_address.pais,
     )
-
-    result_from_upsert = upsert_dian_tercero(tercero_data.dict())
-
-    return result_from_upsert
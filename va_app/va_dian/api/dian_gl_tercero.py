@@ -0,0 +1,195 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+--------------------------------------------------------------------------------
+
+`DIAN tercero` stored on each `GL Entry`, on its `custom_dian_tercero`.
+
+New entries get it when inserted, resolved as
+`aux_get_dian_tercero_ids_for_gl_entries`. The entries before are filled by a
+backfill, committed by chunks and resumed where it stopped:
+
+bench --site <site> execute va_app.va_dian.api.dian_gl_tercero.backfill_gl_entry_dian_tercero
+
+Entries without a `DIAN tercero` to link keep the field empty, and are marked
+as resolved on `custom_dian_tercero_resolved`, so the reports group them as
+the rest. Only the entries not resolved yet are resolved by the reports.
+
+---------------------------------------------------------------------------- """
+
+
+import frappe
+from frappe.utils import cint
+
+from va_app.va.api.erp_fieldnames import (
+    GL_ENTRY_FIELD_NAME_DIAN_TERCERO,
+    GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED,
+    UNKNOWN_PARTY,
+)
+from va_app.va_dian.api.dian_tercero_utils import (
+    _aux_get_values_by_name,
+    aux_get_dian_tercero_ids_for_gl_entries,
+)
+
+
+# Entries resolved per transaction by the backfill.
+BACKFILL_CHUNK_SIZE = 5000
+
+# Global default with the name of the last entry filled by the backfill.
+BACKFILL_CURSOR_KEY = "va_dian_gl_entry_tercero_backfill_cursor"
+
+BACKFILL_QUEUE = "long"
+BACKFILL_JOB_ID = "va_dian_gl_entry_tercero_backfill"
+BACKFILL_JOB_TIMEOUT_SECONDS = 4 * 60 * 60
+
+# Fields of `GL Entry` the `DIAN tercero` is resolved from.
+GL_ENTRY_PARTY_FIELDS = ("party_type", "party", "voucher_type", "voucher_no")
+
+
+def set_gl_entry_dian_tercero(doc, method=None):
+    """
+    `before_insert` of `GL Entry`: sets the `DIAN tercero` of the entry.
+    """
+    tercero_ids = aux_get_dian_tercero_ids_for_gl_entries(
+        [{field: doc.get(field) for field in GL_ENTRY_PARTY_FIELDS}]
+    )
+    doc.set(GL_ENTRY_FIELD_NAME_DIAN_TERCERO, _get_storable_tercero_ids(tercero_ids)[0])
+    doc.set(GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED, 1)
+
+
+def get_gl_entries_dian_tercero_ids(
+    gl_entries: list[dict],
+) -> list[str]:
+    """
+    Returns the ID from the `DIAN tercero` table for each of the GL rows
+    received, in the same order, as `aux_get_dian_tercero_ids_for_gl_entries`.
+    The value stored on the row is taken when it has one, or is empty when
+    the row is marked as resolved; only the rest are resolved.
+    """
+
+    tercero_ids = [entry.get(GL_ENTRY_FIELD_NAME_DIAN_TERCERO) or "" for entry in gl_entries]
+
+    pending = [
+        index
+        for index, (entry, tercero_id) in enumerate(zip(gl_entries, tercero_ids))
+        if not (tercero_id or entry.get(GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED))
+    ]
+    if pending:
+        resolved = aux_get_dian_tercero_ids_for_gl_entries([gl_entries[index] for index in pending])
+        for index, tercero_id in zip(pending, resolved):
+            tercero_ids[index] = tercero_id
+
+    return tercero_ids
+
+
+def backfill_gl_entry_dian_tercero(
+    chunk_size: int = BACKFILL_CHUNK_SIZE,
+    restart: bool = False,
+) -> dict[str, int]:
+    """
+    Sets the `DIAN tercero` of the `GL Entry` rows, by chunks in name order.
+    Each chunk is committed with the name of its last row, so a backfill
+    stopped goes on from there. With `restart`, the rows are read again from
+    the first one, to refresh the values of parties changed since.
+
+    Returns a dict with:
+    - `entries`: Rows read.
+    - `updated`: Rows whose value changed, or not marked as resolved yet.
+    """
+
+    chunk_size = cint(chunk_size) or BACKFILL_CHUNK_SIZE
+    if cint(restart):
+        frappe.db.set_default(BACKFILL_CURSOR_KEY, "")
+        frappe.db.commit()
+
+    cursor = frappe.db.get_default(BACKFILL_CURSOR_KEY) or ""
+    stats = {"entries": 0, "updated": 0}
+
+    while True:
+        entries = frappe.get_all(
+            "GL Entry",
+            filters={"name": [">", cursor]},
+            fields=[
+                "name",
+                GL_ENTRY_FIELD_NAME_DIAN_TERCERO,
+                GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED,
+                *GL_ENTRY_PARTY_FIELDS,
+            ],
+            order_by="name asc",
+            limit_page_length=chunk_size,
+        )
+        if not entries:
+            break
+
+        # Names to update, grouped by their new value.
+        names_by_value = {}
+        values = _get_storable_tercero_ids(aux_get_dian_tercero_ids_for_gl_entries(entries))
+        for entry, value in zip(entries, values):
+            if value != entry.get(GL_ENTRY_FIELD_NAME_DIAN_TERCERO) or not entry.get(GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED):
+                names_by_value.setdefault(value, []).append(entry.name)
+
+        gl_entry = frappe.qb.DocType("GL Entry")
+        for value, names in names_by_value.items():
+            (
+                frappe.qb.update(gl_entry)
+                .set(gl_entry[GL_ENTRY_FIELD_NAME_DIAN_TERCERO], value)
+                .set(gl_entry[GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED], 1)
+                .where(gl_entry.name.isin(names))
+            ).run()
+            stats["updated"] += len(names)
+
+        stats["entries"] += len(entries)
+        cursor = entries[-1].name
+        frappe.db.set_default(BACKFILL_CURSOR_KEY, cursor)
+        frappe.db.commit()
+
+    return stats
+
+
+@frappe.whitelist()
+def enqueue_gl_entry_dian_tercero_backfill(
+    restart: bool = False,
+) -> str:
+    """
+    Enqueues `backfill_gl_entry_dian_tercero` on the long queue, unless it is
+    already queued or running.
+
+    Returns:
+        The job ID
+    """
+
+    frappe.only_for("System Manager")
+
+    frappe.enqueue(
+        backfill_gl_entry_dian_tercero,
+        queue=BACKFILL_QUEUE,
+        timeout=BACKFILL_JOB_TIMEOUT_SECONDS,
+        job_id=BACKFILL_JOB_ID,
+        deduplicate=True,
+        restart=cint(restart),
+    )
+
+    return BACKFILL_JOB_ID
+
+
+# -----------------------------------------------------------------------------
+# Helpers.
+# -----------------------------------------------------------------------------
+
+
+def _get_storable_tercero_ids(tercero_ids: list[str]) -> list[str | None]:
+    """
+    Helper that provides the values stored for `tercero_ids`: empty when
+    there is no `DIAN tercero` to link, as with unknown parties or with IDs
+    not registered on the `DIAN tercero` table. Those are marked as resolved
+    all the same, so they are not resolved again.
+    """
+    existing = _aux_get_values_by_name(
+        "DIAN tercero",
+        {tercero_id for tercero_id in tercero_ids if tercero_id and tercero_id != UNKNOWN_PARTY},
+        (),
+    )
+    return [tercero_id if existing.get(tercero_id) is not None else None for tercero_id in tercero_ids]
@@ -0,0 +1,106 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+--------------------------------------------------------------------------------
+
+Ledger of the DIAN ZIPs ingested, on `DIAN ingest archive`, keyed by the
+SHA-256 of the archive.
+
+Each archive keeps the manifest of its members, as `ingest_dian_zip_bulk`
+returns it, with the SHA-256 of the XML and PDF of the documents created.
+An archive uploaded again is answered from it, and an archive partially
+ingested resumes from the members that did not finish.
+
+---------------------------------------------------------------------------- """
+
+
+import frappe
+
+
+# Statuses of the manifest entries that are finished.
+DONE_STATUSES = ("created", "existing")
+
+
+def get_member_key(
+    entry: dict[str, object],
+) -> str:
+    """
+    Returns:
+        The key of a manifest entry: the path of its XML or, for a PDF left
+        over, of its PDF
+    """
+    return entry["xml"] or f"pdf:{entry['pdf']}"
+
+
+def get_ingest_ledger(
+    archive_sha256: str,
+) -> tuple[dict[str, dict[str, object]], bool] | None:
+    """
+    Returns:
+    - None, if the archive was never ingested.
+    - Otherwise, a tuple with the finished entries of its manifest, keyed by
+      `get_member_key`, and whether every member of the archive finished.
+      Entries of `DIAN document` deleted since are left out.
+    """
+
+    ledger = frappe.db.get_value(
+        "DIAN ingest archive",
+        archive_sha256,
+        ["status", "manifest"],
+        as_dict=True,
+    )
+    if ledger is None:
+        return None
+
+    manifest = frappe.parse_json(ledger.manifest) or []
+    docnames = {entry["docname"] for entry in manifest if entry.get("docname")}
+    existing = set(frappe.get_all(
+        "DIAN document",
+        filters={"name": ["in", list(docnames)]},
+        pluck="name",
+    )) if docnames else set()
+
+    entries = {
+        get_member_key(entry): entry
+        for entry in manifest
+        if entry["status"] in DONE_STATUSES and entry["docname"] in existing
+    }
+
+    return entries, ledger.status == "Complete" and len(entries) == len(manifest)
+
+
+def save_ingest_ledger(
+    archive_sha256: str,
+    file_name: str,
+    manifest: list[dict[str, object]],
+    complete: bool = True,
+):
+    """
+    Records the `manifest` of the archive, without committing. Without
+    `complete`, the manifest does not cover every member yet. The record is
+    updated if another ingestion of the archive inserts it first.
+    """
+
+    values = {
+        "status": "Complete" if complete and all(entry["status"] in DONE_STATUSES for entry in manifest) else "Partial",
+        "documents": sum(1 for entry in manifest if entry.get("docname")),
+        "manifest": frappe.as_json(manifest, indent=None),
+    }
+
+    if not frappe.db.exists("DIAN ingest archive", archive_sha256):
+        try:
+            frappe.get_doc({
+                "doctype": "DIAN ingest archive",
+                "archive_sha256": archive_sha256,
+                "file_name": file_name,
+                **values,
+            }).insert(ignore_permissions=True)
+            return
+        except frappe.DuplicateEntryError:
+            # Another ingestion of the same archive inserted it meanwhile.
+            pass
+
+    frappe.db.set_value("DIAN ingest archive", archive_sha256, values)
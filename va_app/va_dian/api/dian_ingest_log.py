@@ -0,0 +1,124 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+--------------------------------------------------------------------------------
+
+Timing of the stages of the ingestion of DIAN ZIPs, recorded on
+`DIAN ingest log`. The updates of `DIAN document` from their XML and the
+upserts of `DIAN tercero` are recorded there too, under their own
+`operation`.
+
+---------------------------------------------------------------------------- """
+
+
+import time
+from contextlib import contextmanager
+from functools import partial
+
+import frappe
+
+
+# Stages timed, as the `<stage>_seconds` fields of `DIAN ingest log`.
+INGEST_STAGES = ("read", "extract", "tercero", "files", "insert", "items", "commit")
+
+# Volumes counted, as the fields of `DIAN ingest log` of the same name.
+INGEST_VOLUMES = ("archive_bytes", "xml_bytes", "pdf_bytes", "items_count")
+
+# Operations recorded, as the `operation` of `DIAN ingest log`.
+INGEST_OPERATION_ZIP = "ZIP"
+INGEST_OPERATION_XML = "XML"
+INGEST_OPERATION_TERCERO = "DIAN tercero"
+
+
+class IngestTimer:
+    """
+    Seconds spent per stage, and volumes processed, by an ingestion. Stages
+    and volumes repeated (by the documents of a bulk ingestion) add up.
+    """
+
+    __slots__ = ("seconds", "volumes", "documents", "_start")
+
+    def __init__(self):
+        self.seconds = dict.fromkeys(INGEST_STAGES, 0.0)
+        self.volumes = dict.fromkeys(INGEST_VOLUMES, 0)
+        self.documents = 0
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+    def count(self, name: str, value: int):
+        self.volumes[name] += value
+
+    @property
+    def total_seconds(self) -> float:
+        return time.perf_counter() - self._start
+
+
+def save_ingest_log(
+    timer: IngestTimer,
+    source: str,
+    status: str,
+    dian_document: str | None = None,
+    error: Exception | None = None,
+    operation: str = INGEST_OPERATION_ZIP,
+    commit: bool = True,
+):
+    """
+    Records the measurements of `timer` on a `DIAN ingest log`, committed.
+    A failure to record them does not affect the ingestion.
+
+    Without `commit`, the log joins the transaction of the caller, as the
+    helpers called inside other transactions need: it is committed with the
+    writes of the caller. A log with an `error` is recorded on its own if the
+    caller rolls back instead.
+    """
+
+    values = {
+        "doctype": "DIAN ingest log",
+        "status": status,
+        "operation": operation,
+        "source": source,
+        "dian_document": dian_document,
+        "documents": timer.documents,
+        "total_seconds": timer.total_seconds,
+        "error": str(error) if error else None,
+        **{f"{stage}_seconds": seconds for stage, seconds in timer.seconds.items()},
+        **timer.volumes,
+    }
+
+    if commit:
+        _insert_ingest_log(values)
+        return
+
+    _insert_ingest_log(values, commit=False)
+    if error:
+        frappe.db.after_rollback.add(partial(_insert_ingest_log, values))
+
+
+def _insert_ingest_log(
+    values: dict[str, object],
+    commit: bool = True,
+):
+    """
+    Helper that inserts the `DIAN ingest log` with `values`. Only a log
+    committed on its own is rolled back when it can not be inserted; the
+    writes of the caller are kept otherwise.
+    """
+
+    try:
+        frappe.get_doc(dict(values)).insert(ignore_permissions=True)
+        if commit:
+            frappe.db.commit()
+    except Exception:
+        if commit:
+            frappe.db.rollback()
+        frappe.log_error(title="DIAN ingest log")
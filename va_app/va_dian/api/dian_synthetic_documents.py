@@ -0,0 +1,199 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+--------------------------------------------------------------------------------
+
+Synthetic DIAN electronic documents, for tests and benchmarks.
+
+The documents follow the structure the extractor reads: an `AttachedDocument`
+container with the invoice embedded on its `cbc:Description`, zipped with a
+PDF representation as the DIAN delivers them.
+
+This module does not depend on Frappe.
+
+---------------------------------------------------------------------------- """
+
+
+import io
+import random
+import zipfile
+
+
+NAMESPACES = (
+    'xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2" '
+    'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2"'
+)
+
+# Text on `cbc:DocumentType` of an invoice container.
+FACTURA_ELECTRONICA_CONTAINER = 'Contenedor de Factura Electrónica'
+
+DEFAULT_SENDER_NIT = '900123456'
+DEFAULT_SENDER_NAME = 'ACME SAS'
+
+
+def build_invoice(
+    lines: int,
+    cufe: str = 'CUFE-EMBEDDED',
+) -> str:
+    """
+    Provides the XML of an invoice with `lines` lines. Line `i` has a
+    quantity of `i`, a price of 100.00 and a tax of `i`9.00.
+    """
+    invoice_lines = ''.join(
+        f'<cac:InvoiceLine><cbc:ID>{i}</cbc:ID>'
+        f'<cbc:InvoicedQuantity>{i}</cbc:InvoicedQuantity>'
+        f'<cbc:LineExtensionAmount>{i}00.00</cbc:LineExtensionAmount>'
+        f'<cac:TaxTotal><cbc:TaxAmount>{i}9.00</cbc:TaxAmount>'
+        f'<cac:TaxSubtotal><cbc:TaxableAmount>{i}00.00</cbc:TaxableAmount>'
+        f'<cbc:TaxAmount>{i}9.00</cbc:TaxAmount></cac:TaxSubtotal></cac:TaxTotal>'
+        f'<cac:Item><cbc:Description>Item {i}</cbc:Description></cac:Item>'
+        f'<cac:Price><cbc:PriceAmount>100.00</cbc:PriceAmount></cac:Price>'
+        f'</cac:InvoiceLine>'
+        for i in range(1, lines + 1)
+    )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>'
+        f'<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2" {NAMESPACES}>'
+        f'<cbc:UUID>{cufe}</cbc:UUID>'
+        f'<cac:AccountingSupplierParty><cac:Party>'
+        f'<cac:PhysicalLocation><cac:Address><cbc:CityName>Cali</cbc:CityName>'
+        f'<cac:AddressLine><cbc:Line>Calle 1</cbc:Line></cac:AddressLine>'
+        f'<cac:Country><cbc:Name>Colombia</cbc:Name></cac:Country></cac:Address></cac:PhysicalLocation>'
+        f'<cac:Contact><cbc:Telephone>555</cbc:Telephone>'
+        f'<cbc:ElectronicMail>ventas@acme.co</cbc:ElectronicMail></cac:Contact>'
+        f'</cac:Party></cac:AccountingSupplierParty>'
+        f'{invoice_lines}</Invoice>'
+    )
+
+
+def build_attached_document(
+    embedded: str,
+    cufe: str = 'CUFE-CONTAINER',
+    document_type: str = FACTURA_ELECTRONICA_CONTAINER,
+    document_id: str = 'FE-1',
+    issue_date: str = '2026-01-02',
+    sender_nit: str = DEFAULT_SENDER_NIT,
+    sender_name: str = DEFAULT_SENDER_NAME,
+) -> bytes:
+    """
+    Provides the XML of an `AttachedDocument` container with `embedded` on
+    its description.
+    """
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>'
+        f'<AttachedDocument xmlns="urn:oasis:names:specification:ubl:schema:xsd:AttachedDocument-2" {NAMESPACES}>'
+        f'<cbc:IssueDate>{issue_date}</cbc:IssueDate>'
+        f'<cbc:IssueTime>10:00:00-05:00</cbc:IssueTime>'
+        f'<cbc:DocumentType>{document_type}</cbc:DocumentType>'
+        f'<cbc:ParentDocumentID>{document_id}</cbc:ParentDocumentID>'
+        f'<cac:SenderParty><cac:PartyTaxScheme><cbc:RegistrationName>{sender_name}</cbc:RegistrationName>'
+        f'<cbc:CompanyID>{sender_nit}</cbc:CompanyID></cac:PartyTaxScheme></cac:SenderParty>'
+        f'<cac:Attachment><cac:ExternalReference>'
+        f'<cbc:Description><![CDATA[{embedded}]]></cbc:Description>'
+        f'</cac:ExternalReference></cac:Attachment>'
+        f'<cac:ParentDocumentLineReference><cac:DocumentReference>'
+        f'<cbc:UUID>{cufe}</cbc:UUID>'
+        f'</cac:DocumentReference></cac:ParentDocumentLineReference>'
+        f'</AttachedDocument>'
+    ).encode()
+
+
+def build_representation_pdf(
+    text: str,
+) -> bytes:
+    """
+    Provides a one page PDF showing `text` (ASCII).
+    """
+    stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'.encode('ascii')
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+        b'/Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+
+    pdf = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        pdf += b'%010d 00000 n \n' % offset
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+
+    return bytes(pdf)
+
+
+def build_dian_zip(
+    lines: int = 3,
+    cufe: str | None = None,
+    document_type: str = FACTURA_ELECTRONICA_CONTAINER,
+    document_id: str = 'FE-1',
+    sender_nit: str = DEFAULT_SENDER_NIT,
+    sender_name: str = DEFAULT_SENDER_NAME,
+) -> bytes:
+    """
+    Provides a ZIP with the `AttachedDocument` XML of an invoice with `lines`
+    lines and its PDF representation. Without `cufe`, a random one is used, so
+    every ZIP is a new document.
+    """
+    cufe = cufe or random_cufe()
+    xml = build_attached_document(
+        build_invoice(lines, cufe=cufe),
+        cufe=cufe,
+        document_type=document_type,
+        document_id=document_id,
+        sender_nit=sender_nit,
+        sender_name=sender_name,
+    )
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr(f'ad{sender_nit}{document_id}.xml', xml)
+        zip_file.writestr(f'{document_id}.pdf', build_representation_pdf(f'{sender_name} {document_id}'))
+    return buffer.getvalue()
+
+
+def iter_dian_zips(
+    count: int,
+    lines: int = 10,
+    terceros: int = 1,
+    document_types: tuple[str, ...] = (FACTURA_ELECTRONICA_CONTAINER,),
+    seed: int | None = None,
+):
+    """
+    Yields `count` tuples of (file name, ZIP content) of documents with
+    `lines` lines, spread over `terceros` senders and `document_types`.
+    """
+    rng = random.Random(seed)
+    for number in range(1, count + 1):
+        sender = rng.randrange(terceros)
+        document_id = f'FE-{number}'
+        yield (
+            f'{document_id}.zip',
+            build_dian_zip(
+                lines=lines,
+                cufe=random_cufe(rng),
+                document_type=rng.choice(document_types),
+                document_id=document_id,
+                sender_nit=str(int(DEFAULT_SENDER_NIT) + sender),
+                sender_name=f'{DEFAULT_SENDER_NAME} {sender + 1}',
+            ),
+        )
+
+
+def random_cufe(
+    rng: random.Random | None = None,
+) -> str:
+    """
+    Provides a random CUFE, 96 hexadecimal digits as the real ones.
+    """
+    return f'{(rng or random).getrandbits(384):096x}'
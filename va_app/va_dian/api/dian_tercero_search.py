@@ -0,0 +1,176 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+--------------------------------------------------------------------------------
+
+Search of `DIAN tercero` for the Link fields.
+
+Each `DIAN tercero` keeps on `search_text` its NIT and names folded (without
+accents, in lower case), under a FULLTEXT index. The search matches:
+
+1. The NITs that start with the digits typed, on the primary key.
+2. The terceros with every word typed as a prefix of a word of their names,
+   on the FULLTEXT index, by relevance.
+
+Words shorter than the minimum of the index (3 characters on InnoDB) are
+matched on the terceros found by the rest, or by a scan if there are only
+short words.
+
+The index is not part of the DocType: it is created after the app is
+installed and after every migration, by `ensure_search_text_index`.
+
+---------------------------------------------------------------------------- """
+
+
+import re
+import unicodedata
+
+import frappe
+from frappe.desk.reportview import get_filters_cond
+
+from va_app.va.api.erp_fieldnames import (
+    DIAN_TERCERO_DOCTYPE_NAME,
+    DIAN_TERCERO_FIELD_NAME_NOMBRE_COMPLETO,
+)
+
+
+# Fields of `DIAN tercero` folded into `search_text`.
+SEARCH_TEXT_FIELDS = ("nit", "razon_social", "nombre_comercial", "sigla", "nombre_completo")
+
+SEARCH_TEXT_FIELD_NAME = "search_text"
+SEARCH_TEXT_INDEX_NAME = "search_text_fulltext"
+
+# Shortest word kept by the FULLTEXT index (`innodb_ft_min_token_size`).
+FULLTEXT_MIN_WORD_LENGTH = 3
+
+# Characters typed between the digits of a NIT.
+NIT_SEPARATORS_REGEX = re.compile(r"[\s,.\-]")
+NON_WORD_REGEX = re.compile(r"[^0-9a-z]+")
+
+
+def build_search_text(values: dict) -> str:
+    """
+    Returns:
+        The `search_text` of a `DIAN tercero` with the `values` of its
+        `SEARCH_TEXT_FIELDS`, without repeated words
+    """
+    words = fold_search_text(" ".join(str(values.get(field) or "") for field in SEARCH_TEXT_FIELDS)).split()
+    return " ".join(dict.fromkeys(words))
+
+
+def fold_search_text(text: str) -> str:
+    """
+    Returns:
+        `text` without accents, in lower case, with words of letters and
+        digits only
+    """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return NON_WORD_REGEX.sub(" ", without_accents.casefold()).strip()
+
+
+def ensure_search_text_index():
+    """
+    `after_install` and `after_migrate`: creates the FULLTEXT index over
+    `search_text`, if missing.
+    """
+    if not frappe.db.has_index(f"tab{DIAN_TERCERO_DOCTYPE_NAME}", SEARCH_TEXT_INDEX_NAME):
+        frappe.db.sql_ddl(
+            f"alter table `tab{DIAN_TERCERO_DOCTYPE_NAME}` "
+            f"add fulltext index {SEARCH_TEXT_INDEX_NAME} ({SEARCH_TEXT_FIELD_NAME})"
+        )
+
+
+@frappe.whitelist()
+@frappe.validate_and_sanitize_search_inputs
+def search_dian_tercero(
+    doctype: str,
+    txt: str,
+    searchfield: str,
+    start: int,
+    page_len: int,
+    filters: dict | None,
+) -> list[tuple[str, str]]:
+    """
+    Standard query of `DIAN tercero` for the Link fields: the NITs starting
+    with the digits of `txt` first, then the terceros whose names match its
+    words, by relevance.
+
+    Returns:
+        The page of `(name, nombre_completo)` rows asked
+    """
+
+    start, page_len = int(start), int(page_len)
+    limit = start + page_len
+    conditions = get_filters_cond(DIAN_TERCERO_DOCTYPE_NAME, filters, [])
+
+    digits = NIT_SEPARATORS_REGEX.sub("", txt or "")
+    words = fold_search_text(txt).split()
+
+    if not words:
+        return frappe.db.sql(
+            f"""
+            select name, {DIAN_TERCERO_FIELD_NAME_NOMBRE_COMPLETO}
+            from `tabDIAN tercero`
+            where 1=1 {conditions}
+            order by modified desc
+            limit %(page_len)s offset %(start)s
+            """,
+            {"start": start, "page_len": page_len},
+        )
+
+    rows = []
+    if digits.isdigit():
+        rows += frappe.db.sql(
+            f"""
+            select name, {DIAN_TERCERO_FIELD_NAME_NOMBRE_COMPLETO}
+            from `tabDIAN tercero`
+            where name like %(prefix)s {conditions}
+            order by length(name), name
+            limit %(limit)s
+            """,
+            {"prefix": f"{digits}%", "limit": limit},
+        )
+
+    indexed_words = [word for word in words if len(word) >= FULLTEXT_MIN_WORD_LENGTH]
+    # Words out of the index are required as parts of the text instead.
+    scanned_words = [word for word in words if word not in indexed_words] if indexed_words else words
+    values = {
+        "limit": limit + len(rows),
+        **{f"word_{i}": f"%{word}%" for i, word in enumerate(scanned_words)},
+    }
+    word_conditions = " ".join(f"and {SEARCH_TEXT_FIELD_NAME} like %(word_{i})s" for i in range(len(scanned_words)))
+
+    if indexed_words:
+        values["against"] = " ".join(f"+{word}*" for word in indexed_words)
+        rows += frappe.db.sql(
+            f"""
+            select name, {DIAN_TERCERO_FIELD_NAME_NOMBRE_COMPLETO}
+            from `tabDIAN tercero`
+            where match({SEARCH_TEXT_FIELD_NAME}) against (%(against)s in boolean mode)
+                {word_conditions} {conditions}
+            order by match({SEARCH_TEXT_FIELD_NAME}) against (%(against)s in boolean mode) desc, name
+            limit %(limit)s
+            """,
+            values,
+        )
+    else:
+        rows += frappe.db.sql(
+            f"""
+            select name, {DIAN_TERCERO_FIELD_NAME_NOMBRE_COMPLETO}
+            from `tabDIAN tercero`
+            where 1=1 {word_conditions} {conditions}
+            order by name
+            limit %(limit)s
+            """,
+            values,
+        )
+
+    # NITs found by both are listed once, as NIT matches.
+    unique_rows = {}
+    for row in rows:
+        unique_rows.setdefault(row[0], row)
+    return list(unique_rows.values())[start:limit]
@@ -1,15 +1,30 @@
 """ ----------------------------------------------------------------------------
-Copyright (c) 2024-2025, VIDAL & ASTUDILLO Ltda and contributors.
+Copyright (c) 2024-2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2025-05-07
+Version 2026-10-18
 ---------------------------------------------------------------------------- """
 
 
+import pickle
+import re
+
 import frappe
+import redis
+from frappe.utils import cint, create_batch, cstr, now
+from pypika.terms import Values
+
 from va_app.va_dian.api.dian_data_models import (
     VA_DIAN_Tercero,    
 )
+from va_app.va_dian.api.dian_ingest_log import (
+    INGEST_OPERATION_TERCERO,
+    IngestTimer,
+    save_ingest_log,
+)
+from va_app.va_dian.api.dian_tercero_search import (
+    build_search_text,
+)
 from va_app.va.api.erp_fieldnames import (
 	UNKNOWN_PARTY,
 	DIAN_TERCERO_DOCTYPE_NAME,
@@ -32,6 +47,27 @@ from va_app.va.api.erp_fieldnames import (
 )
 
 
+# Fields of `DIAN tercero` kept on the cache of details shared by the
+# workers: a Redis hash keyed by ID.
+DIAN_TERCERO_DETAIL_FIELDS = (
+    "razon_social",
+    "nombre_comercial",
+    "nombre_completo",
+    "primer_apellido",
+    "segundo_apellido",
+    "primer_nombre",
+    "otros_nombres",
+    "direccion_principal",
+    "ciudad_municipio",
+    "departamento",
+    "pais",
+    "codigo_postal",
+    "correo_electronico",
+    "telefono_1",
+)
+DIAN_TERCERO_DETAIL_CACHE_KEY = "va_dian_tercero_detail"
+
+
 def aux_get_dian_tercero(tercero_id) -> VA_DIAN_Tercero:
     """
     Helper that provides a `DIAN tercero` object to ease result assignment.
@@ -39,56 +75,104 @@ def aux_get_dian_tercero(tercero_id) -> VA_DIAN_Tercero:
 	- Populated from the `DIAN Tercero` table, if found.
 	- Populated with the resto of fields empty, otherwise.
     """
+    return aux_get_dian_terceros([tercero_id])[tercero_id]
 
-    # Retrive the record on table `DIAN tercero` for the ID
-    dian_tercero_records = frappe.db.get_all(
-        doctype='DIAN tercero',
-        fields=[
-            "razon_social",
-            "nombre_comercial",
-            "primer_apellido",
-            "segundo_apellido",
-            "primer_nombre",
-            "otros_nombres",
-            "direccion_principal",
-            "ciudad_municipio",
-            "departamento",
-            "pais",
-            "codigo_postal",
-            "correo_electronico",
-            "telefono_1",
-        ],
-        filters={"name": tercero_id},
-    )
 
-    # Check if there is a valid record returned
-    if len(dian_tercero_records)<1:
-        # No record, means an empty class is returned.
-        return VA_DIAN_Tercero(
+def aux_get_dian_terceros(tercero_ids) -> dict[str, VA_DIAN_Tercero]:
+    """
+    As `aux_get_dian_tercero`, for several IDs.
+    Returns the `DIAN tercero` objects keyed by ID.
+    """
+    return {
+        tercero_id: VA_DIAN_Tercero(
             nit=tercero_id,
+            **{field: value for field, value in details.items() if field != "nombre_completo"},
         )
+        for tercero_id, details in aux_get_dian_tercero_details(tercero_ids).items()
+    }
 
-    # Select a single record from the list
-    dian_tercero_record = dian_tercero_records[0]
-
-    # Build the class content to be returned
-    to_return = VA_DIAN_Tercero(
-        nit=tercero_id,
-        razon_social=dian_tercero_record.get('razon_social'),
-        nombre_comercial=dian_tercero_record.get('nombre_comercial'),
-        primer_apellido=dian_tercero_record.get('primer_apellido'),
-        segundo_apellido=dian_tercero_record.get('segundo_apellido'),
-        primer_nombre=dian_tercero_record.get('primer_nombre'),
-        otros_nombres=dian_tercero_record.get('otros_nombres'),
-        direccion_principal=dian_tercero_record.get('direccion_principal'),
-        ciudad_municipio=dian_tercero_record.get('ciudad_municipio'),
-        departamento=dian_tercero_record.get('departamento'),
-        pais=dian_tercero_record.get('pais'),
-        codigo_postal=dian_tercero_record.get('codigo_postal'),
-        correo_electronico=dian_tercero_record.get('correo_electronico'),
-        telefono_1=dian_tercero_record.get('telefono_1'),
-    )
-    return to_return
+
+def aux_get_dian_tercero_details(tercero_ids) -> dict[str, dict[str, str]]:
+    """
+    Returns a dict with the `DIAN_TERCERO_DETAIL_FIELDS` of each ID, keyed by
+    ID; empty for the IDs not found on the `DIAN tercero` table.
+
+    Details come from the shared cache, read with one `HMGET`. The IDs
+    missing there are read with one query per chunk, and cached in one
+    pipeline until the `DIAN tercero` changes (see
+    `clear_dian_tercero_detail_cache`). Values are pickled, as
+    `frappe.cache.hset` stores them, but the local cache of the request is
+    not used.
+    """
+
+    cache_key = frappe.cache.make_key(DIAN_TERCERO_DETAIL_CACHE_KEY)
+
+    details = {}
+    ids = []
+    for tercero_id in set(tercero_ids):
+        if tercero_id:
+            ids.append(tercero_id)
+        else:
+            details[tercero_id] = {}
+
+    try:
+        cached_values = frappe.cache.hmget(cache_key, [str(tercero_id) for tercero_id in ids]) if ids else []
+    except redis.exceptions.ConnectionError:
+        cached_values = [None] * len(ids)
+
+    missing = []
+    pipeline = frappe.cache.pipeline()
+    for tercero_id, cached in zip(ids, cached_values):
+        if cached is None:
+            missing.append(tercero_id)
+        else:
+            details[tercero_id] = pickle.loads(cached)
+
+    for chunk in create_batch(missing, BULK_LOOKUP_CHUNK_SIZE):
+        records = {
+            record.name: record
+            for record in frappe.get_all(
+                DIAN_TERCERO_DOCTYPE_NAME,
+                filters={"name": ["in", [str(tercero_id) for tercero_id in chunk]]},
+                fields=["name", *DIAN_TERCERO_DETAIL_FIELDS],
+            )
+        }
+        for tercero_id in chunk:
+            record = records.get(str(tercero_id))
+            # IDs not found are cached too, as empty, until they are created.
+            details[tercero_id] = {field: record.get(field) for field in DIAN_TERCERO_DETAIL_FIELDS} if record else {}
+
+        pipeline.hset(
+            cache_key,
+            mapping={str(tercero_id): pickle.dumps(details[tercero_id]) for tercero_id in chunk},
+        )
+
+    if missing:
+        try:
+            pipeline.execute()
+        except redis.exceptions.ConnectionError:
+            pass
+
+    return details
+
+
+def clear_dian_tercero_detail_cache(tercero_ids):
+    """
+    Removes `tercero_ids` from the shared cache of details, now and again
+    once the transaction is committed, so no other worker caches what was
+    read before the commit.
+    """
+
+    cache_key = frappe.cache.make_key(DIAN_TERCERO_DETAIL_CACHE_KEY)
+    fields = [str(tercero_id) for tercero_id in tercero_ids]
+
+    def clear():
+        if fields:
+            # The raw `HDEL`, for all the fields at once.
+            frappe.cache.pipeline().hdel(cache_key, *fields).execute()
+
+    clear()
+    frappe.db.after_commit.add(clear)
 
 
 def aux_get_dian_tercero_id_for_party(
@@ -179,6 +263,214 @@ def aux_get_dian_tercero_id_from_doctype(
 	)
 
 
+
+# -----------------------------------------------------------------------------
+# Bulk resolution of GL rows.
+# -----------------------------------------------------------------------------
+
+# Party type whose party is already the `DIAN tercero` ID.
+DIAN_TERCERO_PARTY_TYPE = '*SpecialCaseTypeDIAN*'
+
+# As `aux_get_dian_tercero_id_for_party`: DocType and field with the
+# `DIAN tercero` ID per party type.
+PARTY_TYPE_DIAN_TERCERO_FIELDS = {
+	'Employee': (EMPLOYEE_DOCTYPE_NAME, EMPLOYEE_FIELD_NAME_DIAN_TERCERO),
+	'Shareholder': (SHAREHOLDER_DOCTYPE_NAME, SHAREHOLDER_FIELD_NAME_DIAN_TERCERO),
+	'Customer': (CUSTOMER_DOCTYPE_NAME, CUSTOMER_FIELD_NAME_DIAN_TERCERO),
+	'Supplier': (SUPPLIER_DOCTYPE_NAME, SUPPLIER_FIELD_NAME_DIAN_TERCERO),
+}
+
+# As `aux_get_dian_tercero_id_from_doctype`: party type (or the field with
+# it, if it varies) and field with the party per voucher type.
+VOUCHER_TYPE_PARTY_FIELDS = {
+	'Journal Entry': (DIAN_TERCERO_PARTY_TYPE, None, JOURNAL_FIELD_NAME_DIAN_TERCERO),
+	'Payment Entry': (None, PAYMENT_FIELD_NAME_PARTY_TYPE, PAYMENT_FIELD_NAME_PARTY),
+	'Purchase Invoice': ('Supplier', None, PURCHASE_INVOICE_FIELD_NAME_PARTY),
+	'Purchase Receipt': ('Supplier', None, PURCHASE_RECEIPT_FIELD_NAME_PARTY),
+	'Sales Invoice': ('Customer', None, SALES_INVOICE_FIELD_NAME_PARTY),
+	'Delivery Note': ('Customer', None, DELIVERY_NOTE_FIELD_NAME_PARTY),
+	'Stock Entry': ('Supplier', None, STOCK_ENTRY_FIELD_NAME_PARTY),
+}
+
+# Names per `IN (...)` query.
+BULK_LOOKUP_CHUNK_SIZE = 5000
+
+
+def aux_get_dian_tercero_ids_for_gl_entries(
+		gl_entries: list[dict],
+	) -> list[str]:
+	"""
+	Returns the ID from the `DIAN tercero` table for each of the GL rows
+	received (with `party_type`, `party`, `voucher_type` and `voucher_no`),
+	in the same order.
+
+	The party of the row prevails, as `aux_get_dian_tercero_id_for_party`;
+	without it, the party of the voucher is used, as
+	`aux_get_dian_tercero_id_from_doctype`. Instead of a query per row, the
+	vouchers and parties are fetched with one query per DocType. They are
+	read again on each call, so parties or vouchers created or changed
+	before it, in the same transaction, are seen.
+	"""
+
+	# Parties of the vouchers of the rows without party of their own.
+	vouchers_by_type = {}
+	for entry in gl_entries:
+		if not (entry.get('party_type') and entry.get('party')):
+			vouchers_by_type.setdefault(entry.get('voucher_type'), set()).add(entry.get('voucher_no'))
+
+	voucher_parties = {}
+	for voucher_type, voucher_nos in vouchers_by_type.items():
+		if voucher_type not in VOUCHER_TYPE_PARTY_FIELDS:
+			continue
+		party_type, party_type_field, party_field = VOUCHER_TYPE_PARTY_FIELDS[voucher_type]
+		fields = (party_field, party_type_field) if party_type_field else (party_field,)
+		values = _aux_get_values_by_name(voucher_type, voucher_nos, fields)
+		for voucher_no in voucher_nos:
+			row = values.get(voucher_no)
+			voucher_parties[(voucher_type, voucher_no)] = (
+				(row[1] if row else None) if party_type_field else party_type,
+				(row[0] if row else None) or "",
+			)
+
+	# Party of each row, and the `DIAN tercero` of each party.
+	row_parties = []
+	parties_by_type = {}
+	for entry in gl_entries:
+		if entry.get('party_type') and entry.get('party'):
+			party_type, party = entry['party_type'], entry['party']
+		elif entry.get('voucher_type') in VOUCHER_TYPE_PARTY_FIELDS:
+			party_type, party = voucher_parties[(entry['voucher_type'], entry.get('voucher_no'))]
+		else:
+			party_type = party = None
+		row_parties.append((party_type, party))
+		if party_type in PARTY_TYPE_DIAN_TERCERO_FIELDS:
+			parties_by_type.setdefault(party_type, set()).add(party)
+
+	tercero_ids = {}
+	for party_type, parties in parties_by_type.items():
+		doctype, field = PARTY_TYPE_DIAN_TERCERO_FIELDS[party_type]
+		values = _aux_get_values_by_name(doctype, parties, (field,))
+		for party in parties:
+			row = values.get(party)
+			tercero_ids[(party_type, party)] = (row[0] if row else None) or ""
+
+	result = []
+	for party_type, party in row_parties:
+		if party_type == DIAN_TERCERO_PARTY_TYPE:
+			result.append(party)
+		elif party_type in PARTY_TYPE_DIAN_TERCERO_FIELDS:
+			result.append(tercero_ids[(party_type, party)])
+		else:
+			result.append(UNKNOWN_PARTY)
+	return result
+
+
+def _aux_get_values_by_name(
+		doctype: str,
+		names: set[str],
+		fields: tuple[str, ...],
+	) -> dict[str, tuple]:
+	"""
+	Helper that provides the `fields` of the `names` of `doctype` that exist,
+	keyed by name, with one query per chunk of names.
+	"""
+
+	known = {}
+	for chunk in create_batch([name for name in names if name], BULK_LOOKUP_CHUNK_SIZE):
+		rows = frappe.get_all(
+			doctype,
+			filters={'name': ['in', chunk]},
+			fields=['name', *fields],
+			as_list=True,
+		)
+		for row in rows:
+			known[row[0]] = tuple(row[1:])
+
+	return {name: known.get(name) for name in names}
+
+
+# -----------------------------------------------------------------------------
+# Upsert.
+# -----------------------------------------------------------------------------
+
+# Sources of the content of a `DIAN tercero`.
+TERCERO_SOURCE_MANUAL = "manual"
+TERCERO_SOURCE_XML = "xml"
+
+# Fields of the content written by `upsert_dian_tercero` and
+# `upsert_dian_terceros`.
+DIAN_TERCERO_CONTENT_FIELDS = (
+    "razon_social",
+    "direccion_principal",
+    "codigo_postal",
+    "ciudad_municipio",
+    "departamento",
+    "pais",
+    "correo_electronico",
+    "telefono_1",
+)
+
+# Fields written: the content, and those derived from it.
+DIAN_TERCERO_UPSERT_FIELDS = (*DIAN_TERCERO_CONTENT_FIELDS, "div", "nombre_completo", "search_text")
+
+# Parts of `nombre_completo`, as the form of `DIAN tercero` builds it.
+DIAN_TERCERO_NOMBRE_COMPLETO_FIELDS = (
+    "razon_social",
+    "primer_apellido",
+    "segundo_apellido",
+    "primer_nombre",
+    "otros_nombres",
+)
+
+# Fields read from the stored record to compare with the content.
+DIAN_TERCERO_STORED_FIELDS = tuple(dict.fromkeys((
+    "name",
+    *DIAN_TERCERO_UPSERT_FIELDS,
+    *DIAN_TERCERO_NOMBRE_COMPLETO_FIELDS,
+    "nombre_comercial",
+    "sigla",
+)))
+
+# Priority of the sources per field: the fields a source overwrites once
+# they are stored. The rest it only fills when empty, so the data set by hand
+# or taken from the RUT prevails over an invoice. Empty values of these
+# sources never clear a field. Sources not listed overwrite every field.
+DIAN_TERCERO_SOURCE_OVERWRITABLE_FIELDS = {
+    TERCERO_SOURCE_XML: (
+        "direccion_principal",
+        "codigo_postal",
+        "ciudad_municipio",
+        "departamento",
+        "pais",
+        "correo_electronico",
+        "telefono_1",
+    ),
+}
+
+# Weights of the digits of the NIT, from the last one, for its DV (Dígito de
+# Verificación).
+DIAN_CHECK_DIGIT_WEIGHTS = (3, 7, 13, 17, 19, 23, 29, 37, 41, 43, 47, 53, 59, 67, 71)
+
+# Terceros written per transaction by `upsert_dian_terceros`.
+BULK_UPSERT_CHUNK_SIZE = 500
+
+# Counters of the outcomes of the upserts, shared by the workers.
+UPSERT_COUNTER_CACHE_KEY = "va_dian_tercero_upsert_count"
+
+# Outcomes of the upserts.
+UPSERT_CREATED = "created"
+UPSERT_UPDATED = "updated"
+UPSERT_UNCHANGED = "unchanged"
+UPSERT_INVALID = "invalid"
+
+# Status of the `DIAN ingest log` of an upsert, per outcome.
+UPSERT_INGEST_STATUS = {
+    UPSERT_CREATED: "Created",
+    UPSERT_UPDATED: "Updated",
+    UPSERT_UNCHANGED: "Existing",
+}
+
+
 @frappe.whitelist()
 def upsert_dian_tercero(content) -> str | None:
     """
@@ -186,21 +478,231 @@ def upsert_dian_tercero(content) -> str | None:
     content should contain the information as defined on `VA_DIAN_Tercero`
     class.
 
+    The content is merged with the stored record as a manual one, and the
+    record is saved only when that changes it. The upsert is recorded on a
+    `DIAN ingest log`.
+
     Returns:
     - The `docname` of the record iserted.updated on `DIAN tercero`,
       if successful.
     - None, otherwise.
     """
 
+    return _upsert_dian_tercero(content)
+
+
+def _upsert_dian_tercero(content, commit=True, source=TERCERO_SOURCE_MANUAL) -> str | None:
+    """
+    As `upsert_dian_tercero`, for content of `source`, merged with the
+    stored record as the priority of the source allows. Without `commit`,
+    the caller commits, and measures the upsert as part of its own work.
+
+    Returns:
+    - The `docname` of the record inserted/updated on `DIAN tercero`,
+      if successful.
+    - None, otherwise.
+    """
+
+    if not commit:
+        return _aux_upsert_dian_tercero_record(content, source)[0]
+
+    timer = IngestTimer()
+    log_source = f"upsert_dian_tercero ({source})"
+
+    try:
+        with timer.stage("tercero"):
+            name, outcome = _aux_upsert_dian_tercero_record(content, source)
+        with timer.stage("commit"):
+            frappe.db.commit()
+        timer.documents += 1
+
+    except Exception as e:
+        save_ingest_log(timer, log_source, "Failed", error=e, operation=INGEST_OPERATION_TERCERO, commit=False)
+        raise
+
+    save_ingest_log(timer, log_source, UPSERT_INGEST_STATUS[outcome], operation=INGEST_OPERATION_TERCERO)
+
+    return name
+
+
+@frappe.whitelist()
+def upsert_dian_terceros(contents, chunk_size=BULK_UPSERT_CHUNK_SIZE) -> list[dict[str, str]]:
+    """
+    As `upsert_dian_tercero`, for a list of contents, without locking or
+    saving each record:
+    - Contents are validated first, and the invalid ones reported.
+    - The stored records of each chunk are read with one query, and only
+      the new and changed ones are written, with one
+      `INSERT ... ON DUPLICATE KEY UPDATE`. A record inserted meanwhile by
+      another process is updated instead.
+    - Each chunk is committed.
+
+    Records are written without the hooks of their controller; the cache of
+    details is cleared for them. When a NIT is repeated, its last content
+    prevails. The stages of the whole upsert are recorded on a
+    `DIAN ingest log`.
+
+    Returns a list of dicts, one per NIT in order of arrival, with:
+    - `nit`.
+    - `status`: `created`, `updated`, `unchanged` or `invalid`.
+    - `error`: Why the content is invalid, if it is.
+    """
+
+    frappe.has_permission(DIAN_TERCERO_DOCTYPE_NAME, "write", throw=True)
+
+    return _upsert_dian_terceros(contents, chunk_size)
+
+
+def _upsert_dian_terceros(contents, chunk_size=BULK_UPSERT_CHUNK_SIZE, source=TERCERO_SOURCE_MANUAL) -> list[dict[str, str]]:
+    """
+    As `upsert_dian_terceros`, for contents of `source`, without checking
+    permissions.
+
+    Returns the outcomes of `upsert_dian_terceros`.
+    """
+
+    contents = frappe.parse_json(contents) or []
+    chunk_size = cint(chunk_size) or BULK_UPSERT_CHUNK_SIZE
+
+    outcomes = {}
+    values_by_nit = {}
+    for index, content in enumerate(contents):
+        try:
+            content_validated = VA_DIAN_Tercero(**content)
+        except TypeError as e:
+            outcomes[f"#{index}"] = {"nit": None, "status": UPSERT_INVALID, "error": str(e)}
+            continue
+
+        nit = cstr(content_validated.nit).strip()
+        if not nit.isdigit():
+            outcomes[f"#{index}"] = {"nit": nit, "status": UPSERT_INVALID, "error": "The NIT must be numeric"}
+            continue
+
+        # A repeated NIT keeps its first position, with its last content.
+        values_by_nit[nit] = _aux_get_dian_tercero_values(content_validated)
+        outcomes[nit] = {"nit": nit, "status": None, "error": None}
+
+    timer = IngestTimer()
+    log_source = f"upsert_dian_terceros ({source})"
+
+    try:
+        for chunk in create_batch(list(values_by_nit), chunk_size):
+            with timer.stage("tercero"):
+                stored = {
+                    record.name: record
+                    for record in frappe.get_all(
+                        DIAN_TERCERO_DOCTYPE_NAME,
+                        filters={"name": ["in", chunk]},
+                        fields=list(DIAN_TERCERO_STORED_FIELDS),
+                    )
+                }
+
+                to_write = {}
+                counts = {}
+                for nit in chunk:
+                    record = stored.get(nit)
+                    values = _aux_merge_dian_tercero_values(nit, values_by_nit[nit], record, source)
+                    if record is None:
+                        status = UPSERT_CREATED
+                    elif _aux_has_changes(record, values):
+                        status = UPSERT_UPDATED
+                    else:
+                        status = UPSERT_UNCHANGED
+                    outcomes[nit]["status"] = status
+                    counts[status] = counts.get(status, 0) + 1
+                    if status != UPSERT_UNCHANGED:
+                        to_write[nit] = values
+
+            if to_write:
+                with timer.stage("insert"):
+                    _aux_write_dian_terceros(to_write)
+                clear_dian_tercero_detail_cache(list(to_write))
+            with timer.stage("commit"):
+                frappe.db.commit()
+            _aux_count_dian_tercero_upserts(counts)
+            timer.documents += len(to_write)
+
+    except Exception as e:
+        frappe.db.rollback()
+        save_ingest_log(timer, log_source, "Failed", error=e, operation=INGEST_OPERATION_TERCERO)
+        raise
+
+    invalid = len(outcomes) - len(values_by_nit)
+    save_ingest_log(
+        timer,
+        log_source,
+        "Updated" if timer.documents else "Existing",
+        error=f"{invalid} of {len(contents)} contents not valid" if invalid else None,
+        operation=INGEST_OPERATION_TERCERO,
+    )
+
+    return list(outcomes.values())
+
+
+@frappe.whitelist()
+def get_dian_tercero_upsert_counters() -> dict[str, int]:
+    """
+    Returns a dict with the upserts of `DIAN tercero` counted since the
+    cache was cleared:
+    - `created`, `updated` and `unchanged`: Upserts per outcome. The
+      `unchanged` ones skipped the write.
+    - `hits`: Upserts that found the record stored.
+    """
+
+    counters = {
+        outcome: cint(frappe.cache.get(frappe.cache.make_key(f"{UPSERT_COUNTER_CACHE_KEY}:{outcome}")))
+        for outcome in (UPSERT_CREATED, UPSERT_UPDATED, UPSERT_UNCHANGED)
+    }
+    counters["hits"] = counters[UPSERT_UPDATED] + counters[UPSERT_UNCHANGED]
+
+    return counters
+
+
+def aux_compute_dian_check_digit(nit) -> int | None:
+    """
+    Returns the DV (Dígito de Verificación) of `nit`, as computed by the DIAN,
+    or None if `nit` is not a number.
+    """
+
+    digits = re.sub(r"[\s,.\-]", "", cstr(nit))
+    if not digits.isdigit() or len(digits) > len(DIAN_CHECK_DIGIT_WEIGHTS):
+        return None
+
+    total = sum(int(digit) * weight for digit, weight in zip(reversed(digits), DIAN_CHECK_DIGIT_WEIGHTS))
+    remainder = total % 11
+    return 11 - remainder if remainder > 1 else remainder
+
+
+def _aux_upsert_dian_tercero_record(
+        content,
+        source: str,
+    ) -> tuple[str | None, str | None]:
+    """
+    Helper that inserts/updates the `DIAN tercero` of `content`, as
+    `_upsert_dian_tercero`, without committing.
+
+    Returns a tuple with:
+    - The `docname` of the record, or None if the content is not valid.
+    - The outcome of the upsert: `created`, `updated` or `unchanged`.
+    """
+
     if content is None:
         frappe.throw("Please provide content")
-        return None
+        return None, None
 
     try:
-        content_validated = VA_DIAN_Tercero(**content)
+        content_validated = VA_DIAN_Tercero(**frappe.parse_json(content))
     except:
         frappe.throw("The provided content is not valid")
-        return None
+        return None, None
+
+    incoming = _aux_get_dian_tercero_values(content_validated)
+
+    # Compare with the stored record, without locking it
+    stored = frappe.db.get_value(DIAN_TERCERO_DOCTYPE_NAME, content_validated.nit, DIAN_TERCERO_STORED_FIELDS, as_dict=True)
+    if stored and not _aux_has_changes(stored, _aux_merge_dian_tercero_values(content_validated.nit, incoming, stored, source)):
+        _aux_count_dian_tercero_upserts({UPSERT_UNCHANGED: 1})
+        return stored.name, UPSERT_UNCHANGED
 
     # Try to retrieve document
     are_we_inserting = False
@@ -212,26 +714,111 @@ def upsert_dian_tercero(content) -> str | None:
         document_tercero = frappe.new_doc("DIAN tercero")
         document_tercero.set('nit', content_validated.nit)
 
-    # Common fields to update
-    document_tercero.set('razon_social', content_validated.razon_social)
-    document_tercero.set('direccion_principal', content_validated.direccion_principal)
-    document_tercero.set('codigo_postal', content_validated.codigo_postal)
-    document_tercero.set('ciudad_municipio', content_validated.ciudad_municipio)
-    document_tercero.set('departamento', content_validated.departamento)
-    document_tercero.set('pais', content_validated.pais)
-    document_tercero.set('correo_electronico', content_validated.correo_electronico)
-    document_tercero.set('telefono_1', content_validated.telefono_1)
-
-    # TODO: Update from function
-    document_tercero.set('div', 9999)
-    document_tercero.set('nombre_completo', content_validated.razon_social)
+    # Common fields to update, merged with the record as locked
+    document_tercero.update(_aux_merge_dian_tercero_values(
+        content_validated.nit,
+        incoming,
+        None if are_we_inserting else document_tercero.as_dict(),
+        source,
+    ))
 
     # Final database operations
     if are_we_inserting:
         document_tercero.insert(ignore_permissions=True)
     else:
         document_tercero.save()
+    outcome = UPSERT_CREATED if are_we_inserting else UPSERT_UPDATED
+    _aux_count_dian_tercero_upserts({outcome: 1})
+
+    return document_tercero.name, outcome
+
+
+def _aux_get_dian_tercero_values(
+        content_validated: VA_DIAN_Tercero,
+    ) -> dict[str, object]:
+    """
+    Helper that provides the `DIAN_TERCERO_CONTENT_FIELDS` of a
+    `DIAN tercero` for its content.
+    """
+    return {field: getattr(content_validated, field) for field in DIAN_TERCERO_CONTENT_FIELDS}
+
+
+def _aux_merge_dian_tercero_values(
+        nit: str,
+        incoming: dict[str, object],
+        stored: dict[str, object] | None,
+        source: str,
+    ) -> dict[str, object]:
+    """
+    Helper that provides the `DIAN_TERCERO_UPSERT_FIELDS` to write on the
+    `DIAN tercero` `nit`, from the `incoming` content of `source` and the
+    `stored` record, if any, as the priority of the source allows.
+    """
+
+    overwritable = DIAN_TERCERO_SOURCE_OVERWRITABLE_FIELDS.get(source)
+
+    values = {}
+    for field in DIAN_TERCERO_CONTENT_FIELDS:
+        value = incoming.get(field)
+        if stored and overwritable is not None:
+            stored_value = stored.get(field)
+            if not value or (stored_value and field not in overwritable):
+                value = stored_value
+        values[field] = value
+
+    values["div"] = aux_compute_dian_check_digit(nit)
+    names = {**(stored or {}), **values}
+    values["nombre_completo"] = " ".join(
+        cstr(names.get(field)) for field in DIAN_TERCERO_NOMBRE_COMPLETO_FIELDS if names.get(field)
+    )
+    values["search_text"] = build_search_text({**names, "nit": nit, "nombre_completo": values["nombre_completo"]})
+
+    return values
+
+
+def _aux_has_changes(
+        stored: dict[str, object],
+        values: dict[str, object],
+    ) -> bool:
+    """
+    Helper that tells whether writing `values` changes the `stored` record.
+    Empty values and None are the same.
+    """
+    return any(cstr(stored.get(field)) != cstr(value) for field, value in values.items())
+
+
+def _aux_count_dian_tercero_upserts(
+        counts: dict[str, int],
+    ):
+    """
+    Helper that adds `counts` of upserts per outcome to the shared counters.
+    """
+    for outcome, count in counts.items():
+        if count:
+            frappe.cache.incrby(frappe.cache.make_key(f"{UPSERT_COUNTER_CACHE_KEY}:{outcome}"), count)
+
+
+def _aux_write_dian_terceros(
+        values_by_nit: dict[str, dict[str, object]],
+    ):
+    """
+    Helper that inserts the `DIAN tercero` records of `values_by_nit` with a
+    single statement, updating the fields of those that exist.
+    """
+
+    timestamp = now()
+    user = frappe.session.user
+    table = frappe.qb.DocType(DIAN_TERCERO_DOCTYPE_NAME)
+
+    columns = ("name", "nit", "creation", "modified", "owner", "modified_by", "docstatus", "idx", *DIAN_TERCERO_UPSERT_FIELDS)
+    query = frappe.qb.into(table).columns(*columns)
+    for nit, values in values_by_nit.items():
+        query = query.insert(
+            nit, int(nit), timestamp, timestamp, user, user, 0, 0,
+            *(values[field] for field in DIAN_TERCERO_UPSERT_FIELDS),
+        )
 
-    frappe.db.commit()
+    for field in ("modified", "modified_by", *DIAN_TERCERO_UPSERT_FIELDS):
+        query = query.on_duplicate_key_update(table[field], Values(table[field]))
 
-    return document_tercero.name
+    query.run()
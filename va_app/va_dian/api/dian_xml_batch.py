@@ -0,0 +1,84 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+--------------------------------------------------------------------------------
+
+Parallel extraction of DIAN electronic documents.
+
+Extracting an XML is pure CPU work, so batches are spread across processes.
+Workers only receive the XML content and return `VA_DIAN_Document` objects;
+everything related to the database stays on the calling process.
+
+---------------------------------------------------------------------------- """
+
+
+import itertools
+import os
+from collections import deque
+from collections.abc import Hashable, Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+from va_app.va_dian.api.dian_data_models import VA_DIAN_Document
+from va_app.va_dian.api.dian_xml_extractor import (
+    DIANXMLExtractionError,
+    extract_dian_document_from_bytes,
+)
+
+
+# Documents sent to the workers and not yet consumed, per worker. Bounds the
+# memory used when the contents are produced lazily.
+PENDING_DOCUMENTS_PER_WORKER = 4
+
+
+def extract_dian_documents(
+    contents: Iterable[tuple[Hashable, bytes]],
+    max_workers: int | None = None,
+) -> Iterator[tuple[Hashable, VA_DIAN_Document | DIANXMLExtractionError]]:
+    """
+    Extracts the XML contents received as `(key, content)` pairs, using up to
+    `max_workers` processes (one per CPU, by default).
+
+    Yields `(key, result)` pairs in the same order, where `result` is:
+    - The `VA_DIAN_Document` for the content, if successful.
+    - The `DIANXMLExtractionError` raised, otherwise.
+    """
+
+    max_workers = max_workers or os.cpu_count() or 1
+
+    contents = iter(contents)
+    first_contents = list(itertools.islice(contents, 2))
+    contents = itertools.chain(first_contents, contents)
+
+    # Not worth starting processes.
+    if max_workers <= 1 or len(first_contents) <= 1:
+        for key, content in contents:
+            yield key, _extract_or_error(content)
+        return
+
+    window = max_workers * PENDING_DOCUMENTS_PER_WORKER
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for key, content in contents:
+            pending.append((key, executor.submit(_extract_or_error, content)))
+            if len(pending) >= window:
+                key, future = pending.popleft()
+                yield key, future.result()
+        while pending:
+            key, future = pending.popleft()
+            yield key, future.result()
+
+
+def _extract_or_error(
+    content: bytes,
+) -> VA_DIAN_Document | DIANXMLExtractionError:
+    """
+    Helper that returns, instead of raising, extraction errors so a single
+    broken XML does not stop the batch.
+    """
+    try:
+        return extract_dian_document_from_bytes(content)
+    except DIANXMLExtractionError as e:
+        return e
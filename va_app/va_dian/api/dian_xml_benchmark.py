@@ -0,0 +1,199 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+--------------------------------------------------------------------------------
+
+Measurements of the extraction and ingestion of DIAN documents.
+
+Examples:
+
+bench --site <site> execute va_app.va_dian.api.dian_xml_benchmark.benchmark_extraction_levels --kwargs "{'xml_file_path': '/path/to/document.xml'}"
+
+bench --site <site> execute va_app.va_dian.api.dian_xml_benchmark.run_benchmark_suite --kwargs "{'line_counts': [10, 1000]}"
+
+The suite writes synthetic documents to the site, and deletes them when done.
+Query counts are read from the MariaDB session status.
+
+---------------------------------------------------------------------------- """
+
+
+import time
+import tracemalloc
+
+import frappe
+
+from va_app.va_dian.api.dian_document_utils import (
+    _aux_get_xml_extraction_cache_key,
+    _get_dian_document_object_from_xml_file,
+    update_dian_tercero_with_xml_info,
+    update_doc_with_xml_info,
+)
+from va_app.va_dian.api.dian_synthetic_documents import build_dian_zip
+from va_app.va_dian.api.dian_xml_extractor import (
+    ExtractionLevel,
+    extract_dian_document_from_bytes,
+)
+from va_app.va_dian.api.dian_zip_ingest import ingest_dian_zip
+from va_app.va_dian.api.utils import sha256_of_file
+
+
+# Invoice sizes measured by `run_benchmark_suite`.
+SUITE_LINE_COUNTS = (10, 1_000, 50_000)
+
+# Sender of the documents of the suite, apart from any real `DIAN tercero`.
+SUITE_SENDER_NIT = "999999901"
+
+
+def measure_extraction(
+    content: bytes,
+    level: ExtractionLevel = ExtractionLevel.FULL,
+    repeat: int = 5,
+) -> dict[str, float]:
+    """
+    Extracts `content` `repeat` times at `level`.
+    Returns a dict with:
+    - `best_seconds`: Time of the fastest run.
+    - `peak_memory_mib`: Peak of memory allocated by a run, traced apart from
+      the timed runs.
+    """
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract_dian_document_from_bytes(content, level=level)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        extract_dian_document_from_bytes(content, level=level)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "best_seconds": min(timings),
+        "peak_memory_mib": peak / (1024 * 1024),
+    }
+
+
+def benchmark_extraction_levels(
+    xml_file_path: str,
+    repeat: int = 5,
+) -> dict[str, dict[str, float]]:
+    """
+    Compares the extraction levels over the XML file on `xml_file_path`.
+    Returns the measurements of `measure_extraction` keyed by level.
+    """
+
+    with open(xml_file_path, "rb") as f:
+        content = f.read()
+
+    return {
+        level.value: measure_extraction(content, level=level, repeat=repeat)
+        for level in ExtractionLevel
+    }
+
+
+# -----------------------------------------------------------------------------
+# Suite over the site.
+# -----------------------------------------------------------------------------
+
+
+def run_benchmark_suite(
+    line_counts=SUITE_LINE_COUNTS,
+) -> dict[int, dict[str, dict[str, float]]]:
+    """
+    Ingests a synthetic ZIP per line count and measures, over it:
+    - `ingest_dian_zip`.
+    - `_get_dian_document_object_from_xml_file`, without cached results.
+    - `update_doc_with_xml_info`, without cached results.
+
+    Returns the measurements of `_measure` per operation, keyed by line count.
+    """
+
+    if frappe.db.exists("DIAN tercero", SUITE_SENDER_NIT):
+        frappe.throw(f"DIAN tercero {SUITE_SENDER_NIT} is reserved for the benchmark suite")
+
+    results = {}
+
+    for lines in line_counts:
+        zip_file = frappe.get_doc({
+            "doctype": "File",
+            "file_name": f"benchmark-{lines}.zip",
+            "content": build_dian_zip(lines=lines, sender_nit=SUITE_SENDER_NIT),
+            "is_private": 1,
+        }).insert(ignore_permissions=True)
+        frappe.db.commit()
+
+        docname = None
+        try:
+            measurements = {}
+            docname, measurements["ingest_dian_zip"] = _measure(ingest_dian_zip, zip_file.file_url)
+
+            xml_file = frappe.get_doc("File", {"file_url": frappe.db.get_value("DIAN document", docname, "xml")})
+            cache_key = _aux_get_xml_extraction_cache_key(sha256_of_file(xml_file.get_full_path()))
+
+            frappe.cache.delete_value(cache_key)
+            _, measurements["_get_dian_document_object_from_xml_file"] = _measure(
+                _get_dian_document_object_from_xml_file,
+                xml_file.name,
+            )
+
+            update_dian_tercero_with_xml_info(docname)
+            frappe.cache.delete_value(cache_key)
+            _, measurements["update_doc_with_xml_info"] = _measure(update_doc_with_xml_info, docname)
+            frappe.db.commit()
+
+            results[lines] = measurements
+
+        finally:
+            frappe.db.rollback()
+            if docname:
+                frappe.delete_doc("DIAN document", docname, ignore_permissions=True, force=True)
+            frappe.delete_doc("File", zip_file.name, ignore_permissions=True, force=True)
+            if frappe.db.exists("DIAN tercero", SUITE_SENDER_NIT):
+                frappe.delete_doc("DIAN tercero", SUITE_SENDER_NIT, ignore_permissions=True, force=True)
+            frappe.db.commit()
+
+    return results
+
+
+def _measure(
+    function,
+    *args,
+) -> tuple[object, dict[str, float]]:
+    """
+    Calls `function` with `args` once.
+    Returns a tuple with the result of the call and a dict with:
+    - `seconds`: Duration of the call, tracing included.
+    - `peak_memory_mib`: Peak of memory allocated during the call.
+    - `queries`: Statements sent to the database by the call.
+    """
+
+    queries_before = _get_session_query_count()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = function(*args)
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # The status query itself is counted too.
+    queries = _get_session_query_count() - queries_before - 1
+
+    return result, {
+        "seconds": seconds,
+        "peak_memory_mib": peak / (1024 * 1024),
+        "queries": queries,
+    }
+
+
+def _get_session_query_count() -> int:
+    """
+    Statements executed by the database session so far.
+    """
+    return int(frappe.db.sql("SHOW SESSION STATUS LIKE 'Questions'")[0][1])
@@ -0,0 +1,699 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+--------------------------------------------------------------------------------
+
+Streaming extraction of DIAN electronic documents.
+
+The `AttachedDocument` container and the document embedded on its
+`cbc:Description` are read in a single pass, as a stream of events: the
+character data of the description is fed to the parser of the embedded
+document as the parser of the container produces it, and is never gathered
+into a string. Every element is released as soon as its content has been
+taken, so memory stays bounded no matter how many lines the embedded invoice
+has.
+
+With `ExtractionLevel.HEADER` only the identification of the document is
+taken: the embedded document is read until its UUID (CUFE) is found and its
+content (address, line items) is never built.
+
+This module does not depend on Frappe; failures are reported with
+`DIANXMLExtractionError` and the callers decide how to present them.
+
+---------------------------------------------------------------------------- """
+
+
+import mmap
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from enum import StrEnum
+
+from va_app.va_dian.api.dian_data_models import (
+    VA_DIAN_Document,
+    VA_DIAN_Address,
+    VA_DIAN_Item,
+    VA_DIAN_ItemBlock,
+    ElectronicDocument,
+)
+
+
+DOCUMENT_NAMESPACE = {
+    'cac': 'urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2',
+    'cbc': 'urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2',
+}
+
+# Changes whenever the extraction produces a different result for the same
+# XML, so results stored elsewhere can be told apart.
+EXTRACTOR_VERSION = "2026-10-18.1"
+
+# Size of the slices of the documents fed to the parser.
+FEED_CHUNK_SIZE = 64 * 1024
+
+
+class DIANXMLExtractionError(Exception):
+    """Raised when the XML of a DIAN document can not be processed."""
+
+
+class ExtractionLevel(StrEnum):
+    """
+    How much of a DIAN document is extracted.
+    """
+    # Type, CUFE, issue date and parties. Enough for duplicate checks,
+    # tercero linking and routing.
+    HEADER = "header"
+    # Everything on the spec, including the line items.
+    FULL = "full"
+
+
+# -----------------------------------------------------------------------------
+# Extraction spec.
+#
+# Paths use the `cac:`/`cbc:` prefixes and are relative to the root of their
+# document, or to the group element for the fields of a group. A leading `.//`
+# searches at any depth. As with `find()`, the first match is taken.
+#
+# Supporting a new document type means adding it to `DOCUMENT_TYPES` and, if
+# it has extra content, to `DOCUMENT_TYPE_GROUPS`.
+# -----------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class GroupSpec:
+    """
+    A model built from the element found on `path`, with its fields taken
+    from the paths relative to that element. With `many`, a model is built
+    for every element found, and gathered on a list; or, if `collection` is
+    given, the fields of every element are passed to its `append_fields`.
+    """
+
+    path: str
+    model: type
+    fields: dict[str, str]
+    many: bool = False
+    collection: type | None = None
+
+
+# Text on `cbc:DocumentType` for each type of document.
+DOCUMENT_TYPES = {
+    'Contenedor de Factura Electrónica': ElectronicDocument.FACTURA_ELECTRONICA,
+    'Contenedor de Factura Electronica': ElectronicDocument.FACTURA_ELECTRONICA,
+}
+
+# Fields of `VA_DIAN_Document` found on the `AttachedDocument` container.
+CONTAINER_FIELDS = {
+    'document_type': 'cbc:DocumentType',
+    'document_id': 'cbc:ParentDocumentID',
+    'issue_date': 'cbc:IssueDate',
+    'issue_time': 'cbc:IssueTime',
+    'sender_party_name': 'cac:SenderParty/cac:PartyTaxScheme/cbc:RegistrationName',
+    'sender_party_id': 'cac:SenderParty/cac:PartyTaxScheme/cbc:CompanyID',
+    'receiver_party_name': 'cac:ReceiverParty/cac:PartyTaxScheme/cbc:RegistrationName',
+    'receiver_party_id': 'cac:ReceiverParty/cac:PartyTaxScheme/cbc:CompanyID',
+    'embedded': 'cac:Attachment/cac:ExternalReference/cbc:Description',
+    'parent_uuid': 'cac:ParentDocumentLineReference/cac:DocumentReference/cbc:UUID',
+}
+
+# Fields of `VA_DIAN_Document` found on the embedded document, whatever its
+# type.
+EMBEDDED_FIELDS = {
+    'uuid': './/cbc:UUID',
+    'sender_email': 'cac:AccountingSupplierParty/cac:Party/cac:Contact/cbc:ElectronicMail',
+    'sender_telephone': 'cac:AccountingSupplierParty/cac:Party/cac:Contact/cbc:Telephone',
+}
+
+# Fields of the embedded document taken with `ExtractionLevel.HEADER`.
+HEADER_EMBEDDED_FIELDS = {
+    'uuid': EMBEDDED_FIELDS['uuid'],
+}
+
+EMBEDDED_GROUPS = {
+    'sender_address': GroupSpec(
+        path='cac:AccountingSupplierParty/cac:Party/cac:PhysicalLocation/cac:Address',
+        model=VA_DIAN_Address,
+        fields={
+            'direccion': 'cac:AddressLine/cbc:Line',
+            'ciudad': 'cbc:CityName',
+            'departamento': 'cbc:CountrySubentity',
+            'codigo_postal': 'cbc:PostalZone',
+            'pais': 'cac:Country/cbc:Name',
+        },
+    ),
+}
+
+# Content of the embedded document that depends on its type.
+DOCUMENT_TYPE_GROUPS = {
+    ElectronicDocument.FACTURA_ELECTRONICA: {
+        'items': GroupSpec(
+            path='.//cac:InvoiceLine',
+            model=VA_DIAN_Item,
+            fields={
+                'quantity': './/cbc:InvoicedQuantity',
+                'price': './/cac:Price/cbc:PriceAmount',
+                'taxable_amount': './/cbc:TaxableAmount',
+                'tax_amount': './/cbc:TaxAmount',
+                'extension_amount': './/cbc:LineExtensionAmount',
+                'description': './/cac:Item/cbc:Description',
+            },
+            many=True,
+            collection=VA_DIAN_ItemBlock,
+        ),
+    },
+}
+
+
+# -----------------------------------------------------------------------------
+# Compiled spec.
+# -----------------------------------------------------------------------------
+
+
+class _CompiledPath:
+    """
+    A path of the spec, resolved once into expanded tag names and evaluated
+    without going through `ElementPath`.
+    """
+
+    __slots__ = ('steps', 'descendant')
+
+    def __init__(self, expression: str):
+        self.descendant = expression.startswith('.//')
+        if self.descendant:
+            expression = expression[3:]
+        self.steps = tuple(_tag(step) for step in expression.split('/'))
+
+    def first(self, elem: ET.Element) -> ET.Element | None:
+        """
+        First element found on the path, relative to `elem`.
+        """
+        if not self.descendant:
+            return _first_on_children(elem, self.steps)
+        for candidate in elem.iter(self.steps[0]):
+            if candidate is elem:
+                continue
+            found = _first_on_children(candidate, self.steps[1:])
+            if found is not None:
+                return found
+        return None
+
+    def first_from_root(self, child: ET.Element) -> ET.Element | None:
+        """
+        First element found on the path, relative to the root, but only
+        within `child`, a child of the root.
+        """
+        return next(self.iter_from_root(child), None)
+
+    def iter_from_root(self, child: ET.Element):
+        """
+        Elements found on the path, relative to the root, but only within
+        `child`, a child of the root.
+        """
+        if not self.descendant:
+            if child.tag == self.steps[0]:
+                yield from _iter_on_children(child, self.steps[1:])
+            return
+        for candidate in child.iter(self.steps[0]):
+            yield from _iter_on_children(candidate, self.steps[1:])
+
+
+class _CompiledGroup:
+    """
+    A `GroupSpec` with its paths compiled.
+    """
+
+    __slots__ = ('path', 'model', 'fields', 'many', 'collection')
+
+    def __init__(self, spec: GroupSpec):
+        self.path = _CompiledPath(spec.path)
+        self.model = spec.model
+        self.fields = _compile_fields(spec.fields)
+        self.many = spec.many
+        self.collection = spec.collection
+
+    def build(self, elem: ET.Element):
+        return self.model(**self.texts(elem))
+
+    def texts(self, elem: ET.Element) -> dict[str, str | None]:
+        return {
+            field_name: _text(path.first(elem))
+            for field_name, path in self.fields
+        }
+
+    def new_collection(self):
+        return self.collection() if self.collection else []
+
+    def add_to_collection(self, collection, elem: ET.Element):
+        if self.collection:
+            collection.append_fields(**self.texts(elem))
+        else:
+            collection.append(self.build(elem))
+
+
+def _tag(qualified_name: str) -> str:
+    """
+    Helper to convert a prefixed name (`cbc:UUID`) into the expanded name
+    used by ElementTree (`{urn...}UUID`).
+    """
+    prefix, local_name = qualified_name.split(':')
+    return f'{{{DOCUMENT_NAMESPACE[prefix]}}}{local_name}'
+
+
+def _first_on_children(
+    elem: ET.Element,
+    steps: tuple[str, ...],
+) -> ET.Element | None:
+    """
+    First element found following `steps` down the children of `elem`.
+    """
+    return next(_iter_on_children(elem, steps), None)
+
+
+def _iter_on_children(
+    elem: ET.Element,
+    steps: tuple[str, ...],
+):
+    """
+    Elements found following `steps` down the children of `elem`, in
+    document order. With no steps, `elem` itself.
+    """
+    if not steps:
+        yield elem
+        return
+    tag = steps[0]
+    for child in elem:
+        if child.tag == tag:
+            yield from _iter_on_children(child, steps[1:])
+
+
+def _compile_fields(
+    fields: dict[str, str],
+) -> tuple[tuple[str, _CompiledPath], ...]:
+    return tuple(
+        (field_name, _CompiledPath(expression))
+        for field_name, expression in fields.items()
+    )
+
+
+def _compile_groups(
+    groups: dict[str, GroupSpec],
+) -> tuple[tuple[str, _CompiledGroup], ...]:
+    return tuple(
+        (group_name, _CompiledGroup(spec))
+        for group_name, spec in groups.items()
+    )
+
+
+# The description is not kept on the container; its text is parsed instead.
+_CONTAINER_FIELDS = _compile_fields({
+    field_name: expression
+    for field_name, expression in CONTAINER_FIELDS.items()
+    if field_name != 'embedded'
+})
+_EMBEDDED_PATH = _CompiledPath(CONTAINER_FIELDS['embedded'])
+_DOCUMENT_TYPE_PATH = _CompiledPath(CONTAINER_FIELDS['document_type'])
+_EMBEDDED_FIELDS = _compile_fields(EMBEDDED_FIELDS)
+_HEADER_EMBEDDED_FIELDS = _compile_fields(HEADER_EMBEDDED_FIELDS)
+_EMBEDDED_GROUPS = _compile_groups(EMBEDDED_GROUPS)
+_DOCUMENT_TYPE_GROUPS = {
+    document_type: _compile_groups(groups)
+    for document_type, groups in DOCUMENT_TYPE_GROUPS.items()
+}
+
+
+# -----------------------------------------------------------------------------
+# Extraction.
+# -----------------------------------------------------------------------------
+
+
+def _text(elem: ET.Element) -> str | None:
+    """
+    Helper to get text or None if missing.
+    """
+    return elem.text.strip() if elem is not None and elem.text else None
+
+
+def extract_dian_document(
+    source,
+    level: ExtractionLevel = ExtractionLevel.FULL,
+) -> VA_DIAN_Document:
+    """
+    Provides a VA_DIAN_Document object that represents the content of the
+    `AttachedDocument` XML on `source`: a file path, a binary file object
+    (an open file, a `zipfile` member...) or the content itself (`bytes`,
+    `bytearray`, `memoryview` or `mmap`).
+
+    With `ExtractionLevel.HEADER`, only the fields of the container and the
+    UUID of the embedded document are provided; the text of the embedded
+    document is discarded as soon as its UUID is found and an unknown
+    document type is not an error.
+
+    The content of the embedded document depends on the `cbc:DocumentType`
+    of the container, which the schema places before the attachment; when
+    it comes after, the type is unknown for that purpose.
+
+    Raises `DIANXMLExtractionError` if the content can not be processed.
+    """
+
+    header_only = level == ExtractionLevel.HEADER
+
+    def open_embedded(document_type_text):
+        if header_only:
+            return _EmbeddedDocumentParser(
+                _Extraction(_HEADER_EMBEDDED_FIELDS, stop_when_complete=True),
+            )
+        document_type = DOCUMENT_TYPES.get(document_type_text, ElectronicDocument.INDETERMINADO)
+        document_type_groups = _DOCUMENT_TYPE_GROUPS.get(document_type)
+        return _EmbeddedDocumentParser(
+            _Extraction(_EMBEDDED_FIELDS, _EMBEDDED_GROUPS + (document_type_groups or ())),
+            known_type=document_type_groups is not None,
+        )
+
+    builder = _ContainerTreeBuilder(open_embedded)
+
+    try:
+        container = _extract(
+            _iter_top_level_elements(_iter_file_chunks(source), builder),
+            fields=_CONTAINER_FIELDS,
+        )
+    except (ET.ParseError, OSError) as e:
+        raise DIANXMLExtractionError("Error processing XML: " + str(e))
+
+    embedded = builder.embedded
+    if embedded is None or embedded.empty:
+        raise DIANXMLExtractionError(
+            "Could not find embedded data in the AttachedDocument of the XML"
+        )
+
+    document_type = DOCUMENT_TYPES.get(
+        container.get('document_type'),
+        ElectronicDocument.INDETERMINADO,
+    )
+
+    if embedded.error is not None:
+        # A broken embedded document is not fatal; its data is just missing.
+        content = {}
+    else:
+        content = embedded.extraction.values
+        if not embedded.known_type and not header_only:
+            raise DIANXMLExtractionError(
+                "Unknown document type. No extra information would be produced."
+            )
+
+    # Before procedding, we try to determine the UUID if not yet identified
+    document_uuid = content.get('uuid') or container.get('parent_uuid')
+
+    return VA_DIAN_Document(
+        document_type=document_type,
+        document_id=container.get('document_id'),
+        uuid=document_uuid,
+        issue_date=container.get('issue_date'),
+        issue_time=container.get('issue_time'),
+        sender_party_name=container.get('sender_party_name'),
+        sender_party_id=container.get('sender_party_id'),
+        sender_address=content.get('sender_address'),
+        sender_email=content.get('sender_email'),
+        sender_telephone=content.get('sender_telephone'),
+        receiver_party_name=container.get('receiver_party_name'),
+        receiver_party_id=container.get('receiver_party_id'),
+        items=content.get('items'),
+    )
+
+
+def extract_dian_document_from_bytes(
+    content: bytes,
+    level: ExtractionLevel = ExtractionLevel.FULL,
+) -> VA_DIAN_Document:
+    """
+    Same as `extract_dian_document`, for the XML content itself. Being a
+    module level function of plain arguments, it can be sent to other
+    processes.
+    """
+    return extract_dian_document(content, level=level)
+
+
+def _extract(
+    children,
+    fields: tuple[tuple[str, _CompiledPath], ...],
+    groups: tuple[tuple[str, _CompiledGroup], ...] = (),
+    stop_when_complete: bool = False,
+) -> dict[str, object]:
+    """
+    Evaluates the compiled `fields` and `groups` over the `children` of the
+    root of a document, as they are streamed, and returns their values keyed
+    by name. Fields not found are absent from the result.
+
+    With `stop_when_complete`, the stream is abandoned once every field has
+    been found, so the rest of the document is not even parsed (nor checked
+    for errors). Only meaningful without groups.
+    """
+
+    extraction = _Extraction(fields, groups, stop_when_complete)
+    for child in children:
+        if extraction.add(child):
+            break
+    return extraction.values
+
+
+class _Extraction:
+    """
+    The values of the compiled `fields` and `groups` over the children of
+    the root of a document, added one at a time, as `_extract` does.
+    """
+
+    __slots__ = ('fields', 'groups', 'stop_when_complete', 'values')
+
+    def __init__(
+        self,
+        fields: tuple[tuple[str, _CompiledPath], ...],
+        groups: tuple[tuple[str, _CompiledGroup], ...] = (),
+        stop_when_complete: bool = False,
+    ):
+        self.fields = fields
+        self.groups = groups
+        self.stop_when_complete = stop_when_complete
+        self.values = {}
+
+    def add(self, child: ET.Element) -> bool:
+        """
+        Takes the values of `child`, and tells whether the rest of the
+        document can be skipped.
+        """
+        values = self.values
+
+        for field_name, path in self.fields:
+            if field_name in values:
+                continue
+            found = path.first_from_root(child)
+            if found is not None:
+                values[field_name] = _text(found)
+
+        for group_name, group in self.groups:
+            if group.many:
+                for elem in group.path.iter_from_root(child):
+                    if group_name not in values:
+                        values[group_name] = group.new_collection()
+                    group.add_to_collection(values[group_name], elem)
+            elif group_name not in values:
+                found = group.path.first_from_root(child)
+                if found is not None:
+                    values[group_name] = group.build(found)
+
+        return self.stop_when_complete and len(values) == len(self.fields)
+
+
+class _RootTrackingTreeBuilder(ET.TreeBuilder):
+    """
+    TreeBuilder that exposes the root element while the document is still
+    being parsed.
+    """
+
+    root = None
+
+    def start(self, tag, attrs):
+        elem = super().start(tag, attrs)
+        if self.root is None:
+            self.root = elem
+        return elem
+
+
+class _ContainerTreeBuilder(_RootTrackingTreeBuilder):
+    """
+    TreeBuilder of the `AttachedDocument` container that, instead of keeping
+    the text of its description, passes it on to an `_EmbeddedDocumentParser`
+    as it arrives. The parser is provided by `open_embedded`, with the text
+    of the `cbc:DocumentType` of the container parsed so far.
+    """
+
+    def __init__(self, open_embedded):
+        super().__init__()
+        self.open_embedded = open_embedded
+        self.embedded = None
+        self._document_type = None
+        self._path = []
+        self._embedded_depth = None
+        self._forwarding = False
+
+    def start(self, tag, attrs):
+        elem = super().start(tag, attrs)
+        self._path.append(tag)
+        # As with `elem.text`, only the text before a first child is taken.
+        self._forwarding = False
+        if self.embedded is None and tuple(self._path[1:]) == _EMBEDDED_PATH.steps:
+            self.embedded = self.open_embedded(self._document_type)
+            self._embedded_depth = len(self._path)
+            self._forwarding = True
+        return elem
+
+    def data(self, data):
+        if self._forwarding:
+            self.embedded.feed(data)
+        else:
+            super().data(data)
+
+    def end(self, tag):
+        elem = super().end(tag)
+        if len(self._path) == self._embedded_depth:
+            self._forwarding = False
+            self._embedded_depth = None
+            self.embedded.close()
+        elif self._document_type is None and tuple(self._path[1:]) == _DOCUMENT_TYPE_PATH.steps:
+            self._document_type = _text(elem)
+        self._path.pop()
+        return elem
+
+
+class _EmbeddedDocumentParser:
+    """
+    Parser of the embedded document, fed with its text by pieces. Its
+    children are added to `extraction` as they are complete, and released.
+    A document that is not well formed leaves its `error`, and the rest of
+    the text is ignored, as it is once `extraction` is complete.
+    """
+
+    __slots__ = ('extraction', 'known_type', 'empty', 'error', '_builder', '_parser', '_head', '_done')
+
+    def __init__(
+        self,
+        extraction: _Extraction,
+        known_type: bool = True,
+    ):
+        self.extraction = extraction
+        self.known_type = known_type
+        self.empty = True
+        self.error = None
+        self._builder = _RootTrackingTreeBuilder()
+        self._parser = ET.XMLParser(target=self._builder)
+        # Text held until the XML declaration, if any, is complete.
+        self._head = ''
+        self._done = False
+
+    def feed(self, text: str):
+        if self._done:
+            return
+        if self._head is not None:
+            self._head += text
+            head = self._head.lstrip()
+            if not head:
+                return
+            self.empty = False
+            # The declaration is dropped, as the text is no longer encoded.
+            if head.startswith('<?xml'):
+                end = head.find('?>')
+                if end < 0:
+                    return
+                head = head[end + 2:]
+            elif '<?xml'.startswith(head):
+                return
+            self._head = None
+            text = head
+        self._parse(text)
+
+    def close(self):
+        if self._done:
+            return
+        if self._head is not None:
+            head, self._head = self._head.lstrip(), None
+            self._parse(head)
+            if self._done:
+                return
+        try:
+            self._parser.close()
+        except ET.ParseError as e:
+            self.error = e
+        else:
+            self._release(final=True)
+        self._done = True
+
+    def _parse(self, text: str):
+        try:
+            self._parser.feed(text)
+        except ET.ParseError as e:
+            self.error = e
+            self._done = True
+            return
+        self._release()
+
+    def _release(self, final: bool = False):
+        """
+        Adds to the extraction the children of the root that are complete:
+        all but the last one or, once parsed, all of them.
+        """
+        root = self._builder.root
+        if root is None:
+            return
+        count = len(root) if final else len(root) - 1
+        if count <= 0:
+            return
+        children = root[:count]
+        del root[:count]
+        for child in children:
+            if self.extraction.add(child):
+                self._done = True
+                return
+
+
+def _iter_top_level_elements(chunks, builder=None):
+    """
+    Parses the document fed by `chunks` and yields every child of the root
+    element, complete, as soon as the next one starts. Yielded children are
+    detached from the root, so only a few of them are held in memory at a
+    time. `builder`, if provided, is a `_RootTrackingTreeBuilder` to use.
+
+    Raises `ET.ParseError` if the document is not well formed.
+    """
+    if builder is None:
+        builder = _RootTrackingTreeBuilder()
+    parser = ET.XMLParser(target=builder)
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        root = builder.root
+        # All the children but the last one are complete.
+        if root is not None and len(root) > 1:
+            yield from root[:-1]
+            del root[:-1]
+
+    parser.close()
+    root = builder.root
+    if root is not None:
+        yield from root[:]
+        del root[:]
+
+
+def _iter_file_chunks(source):
+    """
+    Yields the content of `source` (a file path, a binary file object or the
+    content itself) by slices.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        with memoryview(source) as content:
+            for start in range(0, len(content), FEED_CHUNK_SIZE):
+                yield bytes(content[start:start + FEED_CHUNK_SIZE])
+        return
+    if hasattr(source, 'read'):
+        yield from iter(lambda: source.read(FEED_CHUNK_SIZE), b'')
+        return
+    with open(source, 'rb') as f:
+        yield from iter(lambda: f.read(FEED_CHUNK_SIZE), b'')
+
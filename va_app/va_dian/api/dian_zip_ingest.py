@@ -2,7 +2,7 @@
 Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2026-02-15
+Version 2026-10-18
 
 --------------------------------------------------------------------------------
 
@@ -11,107 +11,802 @@ DIAN Electronic document ingestion.
 ---------------------------------------------------------------------------- """
 
 
+import hashlib
 import os
-import zipfile
 import tempfile
-import shutil
+import time
+import zipfile
+from collections.abc import Iterator
 from pathlib import Path
 
 import frappe
-from frappe.utils.file_manager import save_file
+from frappe.utils import cint, get_files_path
+from frappe.utils.background_jobs import get_job_status
+from redis.exceptions import LockError
+
+from va_app.va_dian.api.dian_attachment_storage import (
+    get_content_addressed_file_url,
+    is_content_addressed,
+)
+from va_app.va_dian.api.dian_data_models import VA_DIAN_Document
+from va_app.va_dian.api.dian_document_utils import (
+    _aux_get_dian_document_values_from_xml_result,
+    _aux_replace_dian_document_items,
+    ensure_dian_tercero_for_xml_result,
+    get_dian_document_for_cufe,
+)
+from va_app.va_dian.api.dian_ingest_ledger import (
+    get_ingest_ledger,
+    get_member_key,
+    save_ingest_ledger,
+)
+from va_app.va_dian.api.dian_ingest_log import (
+    IngestTimer,
+    save_ingest_log,
+)
+from va_app.va_dian.api.dian_xml_extractor import (
+    DIANXMLExtractionError,
+    ExtractionLevel,
+    extract_dian_document,
+)
+from va_app.va_dian.api.utils import sha256_of_file
+from va_app.va_dian.doctype.dian_document.dian_document import DIANdocument
+
+
+# Ingestions of the same CUFE are serialized with a Redis lock, held from the
+# duplicate check until the new document is committed.
+CUFE_LOCK_KEY = "va_dian_ingest_cufe"
+CUFE_LOCK_TIMEOUT_SECONDS = 5 * 60
+CUFE_LOCK_WAIT_SECONDS = 30
+
+# Limits to the members taken from an archive, checked on their declared
+# sizes and again while they are decompressed.
+MAX_MEMBER_SIZE_BYTES = 100 * 1024 * 1024
+MAX_MEMBER_COMPRESSION_RATIO = 200
+
+# Size of the blocks copied from the archive to the file storage.
+MEMBER_COPY_BLOCK_SIZE = 1024 * 1024
 
-from va_app.va_dian.api.dian_document_utils import update_doc_with_xml_info
+# Documents created per transaction by `ingest_dian_zip_bulk`. A chunk is
+# also committed once it has been open for the time given, well before the
+# CUFE locks it holds expire.
+BULK_INGEST_CHUNK_SIZE = 50
+BULK_INGEST_CHUNK_SECONDS = 60
+
+# Levels of ZIPs inside ZIPs followed by `ingest_dian_zip_bulk`. Nested ZIPs
+# are spooled in memory up to the size given, and on disk beyond it.
+MAX_NESTED_ZIP_DEPTH = 3
+NESTED_ZIP_SPOOL_MAX_MEMORY_BYTES = 16 * 1024 * 1024
+
+# Prefixes of the DIAN file names (`ad...xml` along `fv...pdf`), ignored when
+# pairing XML and PDF by name.
+DIAN_FILE_NAME_PREFIXES = ("ad", "fv", "nc", "nd", "ds", "z")
+
+# Background ingestion. Outcomes are kept for the clients that miss the
+# realtime events, and progress is published every few documents.
+INGEST_QUEUE = "long"
+INGEST_JOB_TIMEOUT_SECONDS = 60 * 60
+INGEST_OUTCOME_CACHE_KEY = "va_dian_zip_ingest_outcome"
+INGEST_OUTCOME_TTL_SECONDS = 24 * 60 * 60
+INGEST_PROGRESS_EVENT = "dian_zip_ingest_progress"
+INGEST_DONE_EVENT = "dian_zip_ingest_done"
+INGEST_PROGRESS_EVERY = 10
 
 
 @frappe.whitelist()
 def ingest_dian_zip(
     file_url: str,
+    return_existing: bool = False,
 ) -> str:
     """
     Receives a ZIP file uploaded to ERPNext, extracts XML + PDF,
-    creates a DIAN document, and triggers post-processing.
+    and creates a DIAN document populated with the information of the XML,
+    in a single transaction.
+
+    The XML and PDF are copied straight from the archive to the file
+    storage by blocks, so memory use does not depend on their size. Members
+    too large, or too compressed, are rejected.
+
+    The CUFE of the XML is checked before anything is written: if a
+    `DIAN document` already has it, the ingestion is rejected or, with
+    `return_existing`, that document is returned. An archive ingested
+    before is found on the `DIAN ingest archive` ledger by its SHA-256,
+    without reading it.
 
     Returns:
-        The name of the newly created DIAN document
+        The name of the newly created (or existing) DIAN document
     """
 
-    if not file_url:
-        frappe.throw("file_url is required")
+    # Arguments of whitelisted calls arrive as strings, "0" included.
+    return ingest_dian_zip_path(_get_zip_path(file_url), return_existing=bool(cint(return_existing)))
+
+
+def ingest_dian_zip_path(
+    zip_path: str,
+    return_existing: bool = False,
+) -> str:
+    """
+    As `ingest_dian_zip`, for the ZIP file on `zip_path` of the local file
+    system.
+
+    Returns:
+        The name of the newly created (or existing) DIAN document
+    """
+
+    timer = IngestTimer()
+    timer.count("archive_bytes", os.path.getsize(zip_path))
+    status = "Created"
+
+    try:
+        # ------------------------------------------------------------------
+        # An archive already ingested is answered from the ledger.
+        # ------------------------------------------------------------------
+        with timer.stage("read"):
+            archive_sha256 = sha256_of_file(zip_path)
+            ledger = get_ingest_ledger(archive_sha256)
+
+        if ledger and ledger[1] and len(ledger[0]) == 1:
+            name = next(iter(ledger[0].values()))["docname"]
+            if not return_existing:
+                frappe.throw(f"The archive was already ingested as {name}")
+            status = "Existing"
+
+        else:
+            name, status = _ingest_dian_zip_path(zip_path, archive_sha256, return_existing, timer)
+
+    except Exception as e:
+        frappe.db.rollback()
+        save_ingest_log(timer, zip_path, "Failed", error=e)
+        raise
+
+    save_ingest_log(timer, zip_path, status, dian_document=name)
+
+    return name
+
+
+def _ingest_dian_zip_path(
+    zip_path: str,
+    archive_sha256: str,
+    return_existing: bool,
+    timer: IngestTimer,
+) -> tuple[str, str]:
+    """
+    Implementation of `ingest_dian_zip_path`, once the archive is not on the
+    ledger.
+
+    Returns a tuple with:
+    - The name of the newly created (or existing) DIAN document.
+    - The status for the `DIAN ingest log`.
+    """
 
     # ------------------------------------------------------------------
-    # Locate uploaded ZIP file.
+    # Read the documents straight from the archive.
     # ------------------------------------------------------------------
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        with timer.stage("read"):
+            xml_member, pdf_member = _find_xml_and_pdf(zip_ref)
+
+            with _open_member(zip_ref, xml_member) as xml_reader:
+                cufe = _get_cufe_from_xml(xml_reader)
+
+        lock = _acquire_cufe_lock(cufe)
+        if lock is None:
+            frappe.throw(f"Another ingestion of the document with CUFE {cufe} is in progress")
+
+        try:
+            member_hashes = {}
+            name = get_dian_document_for_cufe(cufe)
+            if name:
+                if not return_existing:
+                    frappe.throw(f"The document with CUFE {cufe} was already ingested as {name}")
+                status = "Existing"
+
+            else:
+                name = _create_dian_document(zip_ref, xml_member, pdf_member, timer, member_hashes)
+                status = "Created"
+
+            # With other members, the ledger is left for the bulk mode to
+            # complete.
+            save_ingest_ledger(archive_sha256, Path(zip_path).name, [{
+                "xml": xml_member.filename,
+                "pdf": pdf_member.filename,
+                "cufe": cufe,
+                "status": status.lower(),
+                "docname": name,
+                "message": None,
+                **member_hashes,
+            }], complete=_holds_only(zip_ref, (xml_member, pdf_member)))
+
+            # Visible to other workers before the lock is released.
+            with timer.stage("commit"):
+                frappe.db.commit()
+
+        finally:
+            _release_cufe_lock(lock)
+
+    return name, status
+
+
+@frappe.whitelist()
+def ingest_dian_zip_bulk(
+    file_url: str,
+) -> list[dict[str, object]]:
+    """
+    Receives a ZIP file uploaded to ERPNext with many documents, as the DIAN
+    mass downloads, and creates a DIAN document for each XML + PDF pair.
+
+    Members are paired within their folder of the archive, or nested ZIP:
+    the only XML and PDF, if that is all there is; otherwise, by name
+    (ignoring the DIAN prefixes `ad`, `fv`...) and then by the CUFE or
+    document ID on the name of the PDF. Documents are created in chunks,
+    committing each one; a document that fails does not affect the others.
+
+    Each chunk records its progress on the `DIAN ingest archive` ledger. An
+    archive fully ingested before is answered from it, and one partially
+    ingested only processes the members that did not finish.
+
+    Returns a list with an entry per document found (or member left over)
+    with:
+    - `xml`, `pdf`: Paths of the members within the archive.
+    - `cufe`: The CUFE of the XML, if it could be read.
+    - `status`: `created`, `existing` (an ingested CUFE) or `error`.
+    - `docname`: The DIAN document created or existing.
+    - `message`: The reason of the error.
+    - `xml_sha256`, `pdf_sha256`: Hashes of the members, if created.
+    """
+
+    frappe.has_permission("DIAN document", "create", throw=True)
+
+    return _ingest_dian_zip_bulk(file_url)
+
+
+@frappe.whitelist()
+def enqueue_dian_zip_ingest(
+    file_url: str,
+    bulk: bool = False,
+) -> str:
+    """
+    Enqueues the ingestion of the ZIP at `file_url`, as `ingest_dian_zip` or,
+    with `bulk`, as `ingest_dian_zip_bulk`, on the long queue. While a job
+    for the same content and mode is queued or running, no other is added.
+
+    The user that enqueues receives `dian_zip_ingest_progress` events while
+    the job runs and a `dian_zip_ingest_done` event with its outcome (as
+    `get_dian_zip_ingest_status`) when it finishes.
+
+    Returns:
+        The job ID
+    """
+
+    frappe.has_permission("DIAN document", "create", throw=True)
+
+    bulk = bool(cint(bulk))
+    zip_path = _get_zip_path(file_url)
+    job_id = f"dian_zip_ingest:{'bulk' if bulk else 'single'}:{sha256_of_file(zip_path)}"
+
+    job = frappe.enqueue(
+        _run_dian_zip_ingest_job,
+        queue=INGEST_QUEUE,
+        timeout=INGEST_JOB_TIMEOUT_SECONDS,
+        job_id=job_id,
+        deduplicate=True,
+        file_url=file_url,
+        bulk=bulk,
+        ingest_job_id=job_id,
+    )
+    if job is not None:
+        # A new run; the outcome of a previous one no longer applies.
+        frappe.cache.delete_value(f"{INGEST_OUTCOME_CACHE_KEY}:{job_id}")
+
+    return job_id
+
+
+@frappe.whitelist()
+def get_dian_zip_ingest_status(
+    job_id: str,
+) -> dict[str, object]:
+    """
+    Returns a dict with:
+    - `job_id`.
+    - `status`: `queued`, `started`... while the job is pending; `finished`
+      or `failed` once done. None if the job is unknown.
+    - `result`: When finished, the result of the ingestion (the DIAN
+      document or the manifest).
+    - `message`: When failed, the reason.
+    - `user`: Once done, the user that enqueued the job, the only one
+      allowed to read its outcome.
+    """
+
+    frappe.has_permission("DIAN document", "create", throw=True)
+
+    outcome = frappe.cache.get_value(f"{INGEST_OUTCOME_CACHE_KEY}:{job_id}")
+    if outcome is not None:
+        if outcome.get("user") != frappe.session.user:
+            frappe.throw("The ingestion was enqueued by another user", frappe.PermissionError)
+        return outcome
+
+    status = get_job_status(job_id)
+    return {
+        "job_id": job_id,
+        "status": status.value if status else None,
+        "result": None,
+        "message": None,
+    }
+
+
+def _run_dian_zip_ingest_job(
+    file_url: str,
+    bulk: bool,
+    ingest_job_id: str,
+):
+    """
+    Background job of `enqueue_dian_zip_ingest`.
+    """
+
+    user = frappe.session.user
+
+    def on_progress(done, total):
+        frappe.publish_realtime(
+            INGEST_PROGRESS_EVENT,
+            {"job_id": ingest_job_id, "done": done, "total": total},
+            user=user,
+        )
+
+    outcome = {"job_id": ingest_job_id, "status": "finished", "result": None, "message": None, "user": user}
+    try:
+        if bulk:
+            outcome["result"] = _ingest_dian_zip_bulk(file_url, on_progress=on_progress)
+        else:
+            on_progress(0, 1)
+            outcome["result"] = ingest_dian_zip(file_url)
+            on_progress(1, 1)
+    except Exception as e:
+        frappe.db.rollback()
+        outcome.update(status="failed", message=str(e))
+        raise
+    finally:
+        frappe.cache.set_value(
+            f"{INGEST_OUTCOME_CACHE_KEY}:{ingest_job_id}",
+            outcome,
+            expires_in_sec=INGEST_OUTCOME_TTL_SECONDS,
+        )
+        frappe.publish_realtime(INGEST_DONE_EVENT, outcome, user=user)
+
+
+def _ingest_dian_zip_bulk(
+    file_url: str,
+    on_progress=None,
+) -> list[dict[str, object]]:
+    """
+    Implementation of `ingest_dian_zip_bulk`, calling `on_progress` with the
+    entries done and an estimate of the total every few entries.
+    """
+
+    zip_path = _get_zip_path(file_url)
+
+    timer = IngestTimer()
+    timer.count("archive_bytes", os.path.getsize(zip_path))
+
+    # Members finished by previous ingestions of the same archive.
+    with timer.stage("read"):
+        archive_sha256 = sha256_of_file(zip_path)
+        done, complete = get_ingest_ledger(archive_sha256) or ({}, False)
+    if complete:
+        save_ingest_log(timer, zip_path, "Existing")
+        return list(done.values())
+
+    manifest = []
+    locks = {}
+    pending = 0
+    chunk_started = time.monotonic()
+    # Files copied by the documents of the chunk not committed yet.
+    chunk_paths = []
+
+    def release_lock(cufe):
+        lock = locks.pop(cufe, None)
+        if lock is not None:
+            _release_cufe_lock(lock)
+
+    def commit_chunk(finished=False):
+        nonlocal pending, chunk_started
+        # Until finished, the entries of the previous ingestion not reached
+        # yet are kept.
+        entries = manifest if finished else list({
+            **done,
+            **{get_member_key(entry): entry for entry in manifest},
+        }.values())
+        save_ingest_ledger(archive_sha256, Path(zip_path).name, entries, complete=finished)
+        with timer.stage("commit"):
+            frappe.db.commit()
+        for cufe in list(locks):
+            release_lock(cufe)
+        chunk_paths.clear()
+        pending = 0
+        chunk_started = time.monotonic()
+
+    try:
+        with zipfile.ZipFile(zip_path, "r") as zip_ref:
+            # XML and nested ZIPs on the first level.
+            total = sum(
+                1 for name in zip_ref.namelist()
+                if Path(name).suffix.lower() in (".xml", ".zip")
+            )
+            for entry, pair in _iter_document_pairs(zip_ref):
+                if pending and (
+                    pending >= BULK_INGEST_CHUNK_SIZE
+                    or time.monotonic() - chunk_started >= BULK_INGEST_CHUNK_SECONDS
+                ):
+                    commit_chunk()
+
+                if on_progress and len(manifest) % INGEST_PROGRESS_EVERY == 0:
+                    on_progress(len(manifest), max(total, len(manifest)))
+                manifest.append(entry)
+                previous = done.get(get_member_key(entry))
+                if previous:
+                    entry.update(previous)
+                    continue
+                if pair is None:
+                    continue
+
+                container, xml_member, pdf_member = pair
+                cufe = entry["cufe"]
+
+                # A CUFE already locked was created on this chunk, and keeps
+                # its lock until committed.
+                locked_here = cufe not in locks
+                if locked_here:
+                    lock = _acquire_cufe_lock(cufe)
+                    if lock is None:
+                        entry.update(status="error", message=f"Another ingestion of the document with CUFE {cufe} is in progress")
+                        continue
+                    locks[cufe] = lock
+
+                existing = get_dian_document_for_cufe(cufe)
+                if existing:
+                    entry.update(status="existing", docname=existing)
+                    if locked_here:
+                        release_lock(cufe)
+                    continue
+
+                # A failure only undoes its own document.
+                save_point = f"dian_zip_bulk_{len(manifest)}"
+                messages = len(frappe.local.message_log)
+                frappe.db.savepoint(save_point)
+                try:
+                    member_hashes = {}
+                    docname = _create_dian_document(
+                        container, xml_member, pdf_member, timer, member_hashes, chunk_paths,
+                    )
+                    entry.update(status="created", docname=docname, **member_hashes)
+                except Exception as e:
+                    frappe.db.rollback(save_point=save_point)
+                    del frappe.local.message_log[messages:]
+                    entry.update(status="error", message=str(e))
+                    if locked_here:
+                        release_lock(cufe)
+                    continue
+
+                pending += 1
+
+        commit_chunk(finished=True)
+        if on_progress:
+            on_progress(len(manifest), len(manifest))
+
+    except Exception as e:
+        # Documents of the chunk left are rolled back, with their files.
+        frappe.db.rollback()
+        for path in chunk_paths:
+            Path(path).unlink(missing_ok=True)
+        save_ingest_log(timer, zip_path, "Failed", error=e)
+        raise
+
+    finally:
+        for cufe in list(locks):
+            release_lock(cufe)
+
+    save_ingest_log(
+        timer,
+        zip_path,
+        "Created" if timer.documents else "Existing",
+    )
+
+    return manifest
+
+
+# -------------------------------------------------------------------
+
+def _get_zip_path(file_url: str) -> str:
+    """
+    Helper that provides the path of the uploaded ZIP file at `file_url`.
+    """
+
+    if not file_url:
+        frappe.throw("file_url is required")
+
     file_doc = frappe.get_doc("File", {"file_url": file_url})
     zip_path = file_doc.get_full_path()
 
     if not zipfile.is_zipfile(zip_path):
         frappe.throw("Provided file is not a valid ZIP file")
 
-    # ------------------------------------------------------------------
-    # Prepare temp workspace.
-    # ------------------------------------------------------------------
-    tmp_dir = tempfile.mkdtemp(prefix="dian_zip_")
+    return zip_path
+
+
+def _acquire_cufe_lock(cufe: str):
+    """
+    Returns:
+    - The Redis lock that serializes the ingestions of `cufe`, acquired.
+    - None, if it could not be acquired in time.
+    """
+    lock = frappe.cache.lock(
+        frappe.cache.make_key(f"{CUFE_LOCK_KEY}:{cufe}"),
+        timeout=CUFE_LOCK_TIMEOUT_SECONDS,
+        blocking_timeout=CUFE_LOCK_WAIT_SECONDS,
+    )
+    return lock if lock.acquire() else None
+
 
+def _release_cufe_lock(lock):
+    """
+    Releases a lock of `_acquire_cufe_lock`. A lock that expired, and may be
+    held by another ingestion now, is left as it is.
+    """
     try:
-        with zipfile.ZipFile(zip_path, "r") as zip_ref:
-            zip_ref.extractall(tmp_dir)
+        lock.release()
+    except LockError:
+        frappe.logger().warning(f"DIAN ingestion: lock {lock.name} expired before its release")
 
-        xml_path, pdf_path = _find_xml_and_pdf(tmp_dir)
 
-        # ------------------------------------------------------------------
-        # Create DIAN document.
-        # ------------------------------------------------------------------
-        dian_doc = frappe.new_doc("DIAN document")
-        dian_doc.insert(ignore_permissions=True)
+def _read_xml_header(xml_reader) -> VA_DIAN_Document:
+    """
+    Helper that provides the header of the XML read from `xml_reader`.
+
+    Raises `DIANXMLExtractionError` if it can not be read or has no CUFE.
+    """
+    header = extract_dian_document(
+        xml_reader,
+        level=ExtractionLevel.HEADER,
+    )
+    if not header.uuid:
+        raise DIANXMLExtractionError("XML does not contain a valid CUFE / UUID")
+
+    return header
+
+
+def _get_cufe_from_xml(xml_reader) -> str:
+    """
+    Helper that provides the CUFE of the XML read from `xml_reader`, reading
+    only its header.
+    """
+    try:
+        return _read_xml_header(xml_reader).uuid
+    except DIANXMLExtractionError as e:
+        frappe.throw(str(e))
+
+
+def _create_dian_document(
+    zip_ref: zipfile.ZipFile,
+    xml_member: zipfile.ZipInfo,
+    pdf_member: zipfile.ZipInfo,
+    timer: IngestTimer,
+    member_hashes: dict[str, str] | None = None,
+    written_paths: list[str] | None = None,
+) -> str:
+    """
+    Creates the `DIAN document` of the XML member, with it and the PDF
+    member attached. Nothing is committed. If anything fails, the files
+    already copied are removed; otherwise their paths are added to
+    `written_paths`, for the caller to remove them if it rolls back.
+
+    The XML is extracted first, so the document is inserted once with all
+    its information and the files are copied with their final names. The
+    stages are measured on `timer`, and the SHA-256 of the members are added
+    to `member_hashes` as `xml_sha256` and `pdf_sha256`.
+
+    Returns:
+        The name of the newly created DIAN document
+    """
+
+    with timer.stage("extract"), _open_member(zip_ref, xml_member) as xml_reader:
+        try:
+            xml_result = extract_dian_document(xml_reader)
+        except DIANXMLExtractionError as e:
+            frappe.throw(f"Error processing XML: {e}")
+    timer.count("xml_bytes", xml_member.file_size)
+
+    values = _aux_get_dian_document_values_from_xml_result(xml_result)
+    if not values["xml_issue_date"]:
+        frappe.throw("Fecha de emisión no determinada; No es posible renombrar los archivos adjuntos")
+
+    copied_paths = []
+
+    try:
+        with timer.stage("tercero"):
+            ensure_dian_tercero_for_xml_result(xml_result)
 
         # ------------------------------------------------------------------
-        # Attach XML.
+        # Copy XML and PDF, with their final names.
         # ------------------------------------------------------------------
-        with open(xml_path, "rb") as f:
-            xml_file = save_file(
-                fname=Path(xml_path).name,
-                content=f.read(),
-                dt="DIAN document",
-                dn=dian_doc.name,
-                is_private=1,
-            )
-            dian_doc.xml = xml_file.file_url
+        files = {}
+        with timer.stage("files"):
+            for field, key, member in (("xml", "xml", xml_member), ("representation", "pdf", pdf_member)):
+                file_name = DIANdocument.build_attachment_file_name(
+                    values["xml_dian_tercero"],
+                    values["xml_issue_date"],
+                    Path(member.filename).name,
+                )
+                files[field], sha256 = _store_member(zip_ref, member, file_name, copied_paths)
+                if member_hashes is not None:
+                    member_hashes[f"{key}_sha256"] = sha256
+        timer.count("pdf_bytes", pdf_member.file_size)
 
         # ------------------------------------------------------------------
-        # Attach PDF.
+        # Create DIAN document, and attach the files to it.
         # ------------------------------------------------------------------
-        with open(pdf_path, "rb") as f:
-            pdf_file = save_file(
-                fname=Path(pdf_path).name,
-                content=f.read(),
-                dt="DIAN document",
-                dn=dian_doc.name,
-                is_private=1,
-            )
-            dian_doc.representation = pdf_file.file_url
+        with timer.stage("insert"):
+            dian_doc = frappe.new_doc("DIAN document")
+            dian_doc.update(values)
+            for field, file_values in files.items():
+                dian_doc.set(field, file_values["file_url"])
 
-        dian_doc.save(ignore_permissions=True)
-        dian_doc.reload()
+            # The files already have the names `after_save` would give them.
+            dian_doc.flags.attachments_named = True
+            dian_doc.insert(ignore_permissions=True)
 
-        return dian_doc.name
+            for file_values in files.values():
+                frappe.get_doc({
+                    **file_values,
+                    "attached_to_doctype": "DIAN document",
+                    "attached_to_name": dian_doc.name,
+                }).insert(ignore_permissions=True)
 
-    finally:
-        shutil.rmtree(tmp_dir, ignore_errors=True)
+        with timer.stage("items"):
+            _aux_replace_dian_document_items({dian_doc.name: xml_result}, replace=False)
+        timer.count("items_count", values["xml_items_count"])
+        timer.documents += 1
 
+    except Exception:
+        for path in copied_paths:
+            Path(path).unlink(missing_ok=True)
+        raise
 
-# -------------------------------------------------------------------
+    if written_paths is not None:
+        written_paths.extend(copied_paths)
 
-def _find_xml_and_pdf(base_dir: str) -> tuple[str, str]:
+    return dian_doc.name
+
+
+def _store_member(
+    zip_ref: zipfile.ZipFile,
+    member: zipfile.ZipInfo,
+    file_name: str,
+    copied_paths: list[str],
+) -> tuple[dict[str, object], str]:
+    """
+    Copies `member` by blocks to the private files, as `file_name`, as
+    `save_file` would do without holding the content in memory. The path
+    written is added to `copied_paths`.
+
+    With the content addressed storage, the file is named by its SHA-256 and,
+    if that content is already stored, the copy is dropped and the new `File`
+    shares it.
+
+    Returns a tuple with:
+    - The values of the `File` for the copy.
+    - The SHA-256 of the content.
+    """
+
+    files_path = get_files_path(is_private=1)
+    content_hash = hashlib.md5()
+    content_sha256 = hashlib.sha256()
+    file_size = 0
+
+    with _open_member(zip_ref, member) as reader, tempfile.NamedTemporaryFile(
+        dir=files_path,
+        prefix=".dian_zip_",
+        delete=False,
+    ) as partial:
+        copied_paths.append(partial.name)
+        for block in iter(lambda: reader.read(MEMBER_COPY_BLOCK_SIZE), b""):
+            partial.write(block)
+            content_hash.update(block)
+            content_sha256.update(block)
+            file_size += len(block)
+
+    content_hash = content_hash.hexdigest()
+
+    if is_content_addressed():
+        file_url = get_content_addressed_file_url(content_sha256.hexdigest(), Path(file_name).suffix)
+        final_path = os.path.join(files_path, file_url.removeprefix("/private/files/"))
+        if os.path.exists(final_path):
+            # Shared: not to be removed if the ingestion fails.
+            os.remove(partial.name)
+            copied_paths.pop()
+        else:
+            os.replace(partial.name, final_path)
+            copied_paths[-1] = final_path
+
+    else:
+        # As `save_file`, a name already taken is told apart by the content hash.
+        if os.path.exists(os.path.join(files_path, file_name)):
+            stem, suffix = os.path.splitext(file_name)
+            file_name = f"{stem}{content_hash[-6:]}{suffix}"
+
+        file_url = f"/private/files/{file_name}"
+        final_path = os.path.join(files_path, file_name)
+        os.replace(partial.name, final_path)
+        copied_paths[-1] = final_path
+
+    return {
+        "doctype": "File",
+        "file_name": file_name,
+        "file_url": file_url,
+        "is_private": 1,
+        "file_size": file_size,
+        "content_hash": content_hash,
+    }, content_sha256.hexdigest()
+
+
+def _open_member(
+    zip_ref: zipfile.ZipFile,
+    member: zipfile.ZipInfo,
+) -> "_LimitedMemberReader":
+    """
+    Opens `member` for reading, once checked that its declared sizes are
+    within the limits.
+    """
+    _check_member_size(member, member.file_size)
+    return _LimitedMemberReader(zip_ref.open(member), member)
+
+
+def _check_member_size(
+    member: zipfile.ZipInfo,
+    size: int,
+):
+    """
+    Rejects `member` if `size` bytes of it exceed the limits.
+    """
+    if size > MAX_MEMBER_SIZE_BYTES:
+        frappe.throw(f"ZIP member {member.filename} exceeds {MAX_MEMBER_SIZE_BYTES} bytes")
+    if size > max(member.compress_size, 1) * MAX_MEMBER_COMPRESSION_RATIO:
+        frappe.throw(f"ZIP member {member.filename} exceeds the compression ratio of {MAX_MEMBER_COMPRESSION_RATIO}")
+
+
+class _LimitedMemberReader:
+    """
+    Binary reader of a ZIP member that enforces the limits on the bytes
+    actually decompressed, whatever the sizes declared on the archive.
+    """
+
+    def __init__(self, stream, member: zipfile.ZipInfo):
+        self.stream = stream
+        self.member = member
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.bytes_read += len(data)
+        _check_member_size(self.member, self.bytes_read)
+        return data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stream.close()
+
+
+def _find_xml_and_pdf(zip_ref: zipfile.ZipFile) -> tuple[zipfile.ZipInfo, zipfile.ZipInfo]:
     xml = pdf = None
 
-    for root, _, files in os.walk(base_dir):
-        for f in files:
-            lf = f.lower()
-            full = os.path.join(root, f)
-            if lf.endswith(".xml") and not xml:
-                xml = full
-            elif lf.endswith(".pdf") and not pdf:
-                pdf = full
+    for member in zip_ref.infolist():
+        if member.is_dir():
+            continue
+        lf = member.filename.lower()
+        if lf.endswith(".xml") and not xml:
+            xml = member
+        elif lf.endswith(".pdf") and not pdf:
+            pdf = member
 
     if not xml:
         frappe.throw("ZIP does not contain an XML file")
@@ -119,3 +814,141 @@ def _find_xml_and_pdf(base_dir: str) -> tuple[str, str]:
         frappe.throw("ZIP does not contain a PDF file")
 
     return xml, pdf
+
+
+def _holds_only(
+    zip_ref: zipfile.ZipFile,
+    members: tuple[zipfile.ZipInfo, ...],
+) -> bool:
+    """
+    Returns:
+        Whether `members` are the only files of the archive
+    """
+    names = {member.filename for member in members}
+    return all(member.filename in names for member in zip_ref.infolist() if not member.is_dir())
+
+
+def _iter_document_pairs(
+    zip_ref: zipfile.ZipFile,
+    prefix: str = "",
+    depth: int = 0,
+) -> Iterator[tuple[dict[str, object], tuple | None]]:
+    """
+    Yields, for every document found on the archive and its nested ZIPs, a
+    tuple with its manifest entry and, if it can be ingested, a tuple of
+    (the `ZipFile` holding it, the XML member, the PDF member). Members that
+    can not be ingested are yielded with `None` and their entry on error.
+    """
+
+    def entry(xml=None, pdf=None, **values):
+        return {
+            "xml": f"{prefix}{xml.filename}" if xml else None,
+            "pdf": f"{prefix}{pdf.filename}" if pdf else None,
+            "cufe": None,
+            "status": None,
+            "docname": None,
+            "message": None,
+        } | values
+
+    folders = {}
+    nested_zips = []
+    for member in zip_ref.infolist():
+        if member.is_dir():
+            continue
+        extension = Path(member.filename).suffix.lower()
+        if extension == ".zip":
+            nested_zips.append(member)
+        elif extension in (".xml", ".pdf"):
+            folder = folders.setdefault(str(Path(member.filename).parent), {".xml": [], ".pdf": []})
+            folder[extension].append(member)
+
+    for folder in folders.values():
+        headers = {}
+        for xml_member in folder[".xml"]:
+            messages = len(frappe.local.message_log)
+            try:
+                with _open_member(zip_ref, xml_member) as xml_reader:
+                    headers[xml_member] = _read_xml_header(xml_reader)
+            except (DIANXMLExtractionError, frappe.ValidationError) as e:
+                del frappe.local.message_log[messages:]
+                yield entry(xml_member, status="error", message=str(e)), None
+
+        pairs, left_over_pdfs = _pair_members(headers, folder[".pdf"])
+        for xml_member, pdf_member in pairs:
+            cufe = headers[xml_member].uuid
+            if pdf_member is None:
+                yield entry(xml_member, cufe=cufe, status="error", message="No PDF found for the XML"), None
+            else:
+                yield entry(xml_member, pdf_member, cufe=cufe), (zip_ref, xml_member, pdf_member)
+        for pdf_member in left_over_pdfs:
+            yield entry(pdf=pdf_member, status="error", message="No XML found for the PDF"), None
+
+    for member in nested_zips:
+        path = f"{prefix}{member.filename}"
+        if depth >= MAX_NESTED_ZIP_DEPTH:
+            yield entry(status="error", message=f"Nested ZIP {path} is too deep"), None
+            continue
+        messages = len(frappe.local.message_log)
+        try:
+            with _open_member(zip_ref, member) as reader, tempfile.SpooledTemporaryFile(
+                max_size=NESTED_ZIP_SPOOL_MAX_MEMORY_BYTES,
+            ) as spool:
+                for block in iter(lambda: reader.read(MEMBER_COPY_BLOCK_SIZE), b""):
+                    spool.write(block)
+                with zipfile.ZipFile(spool) as nested_ref:
+                    yield from _iter_document_pairs(nested_ref, f"{path}/", depth + 1)
+        except (zipfile.BadZipFile, frappe.ValidationError) as e:
+            del frappe.local.message_log[messages:]
+            yield entry(status="error", message=f"Nested ZIP {path}: {e}"), None
+
+
+def _pair_members(
+    headers: dict[zipfile.ZipInfo, VA_DIAN_Document],
+    pdf_members: list[zipfile.ZipInfo],
+) -> tuple[list[tuple[zipfile.ZipInfo, zipfile.ZipInfo | None]], list[zipfile.ZipInfo]]:
+    """
+    Pairs every XML (with its header) with a PDF of the same folder.
+
+    Returns a tuple with:
+    - The list of pairs (XML, PDF or None if none matches).
+    - The list of PDF left over.
+    """
+
+    if len(headers) == 1 and len(pdf_members) == 1:
+        return [(next(iter(headers)), pdf_members[0])], []
+
+    pdfs_by_key = {}
+    for pdf_member in pdf_members:
+        for key in _pairing_keys(pdf_member.filename):
+            pdfs_by_key.setdefault(key, pdf_member)
+
+    pairs = []
+    used = set()
+    for xml_member, header in headers.items():
+        candidates = [
+            *_pairing_keys(xml_member.filename),
+            *(value.lower() for value in (header.uuid, header.document_id) if value),
+        ]
+        pdf_member = next(
+            (pdfs_by_key[key] for key in candidates if key in pdfs_by_key and pdfs_by_key[key] not in used),
+            None,
+        )
+        if pdf_member is not None:
+            used.add(pdf_member)
+        pairs.append((xml_member, pdf_member))
+
+    return pairs, [pdf_member for pdf_member in pdf_members if pdf_member not in used]
+
+
+def _pairing_keys(file_name: str) -> list[str]:
+    """
+    Names under which a member may be paired: its name without extension
+    and, if it has one, without its DIAN prefix.
+    """
+    stem = Path(file_name).stem.lower()
+    keys = [stem]
+    for prefix in DIAN_FILE_NAME_PREFIXES:
+        if stem.startswith(prefix) and len(stem) > len(prefix):
+            keys.append(stem[len(prefix):])
+            break
+    return keys
@@ -0,0 +1,229 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+--------------------------------------------------------------------------------
+
+Ingestion of the DIAN ZIPs left on a spool directory of the server.
+
+The spool is set on the site config:
+
+- `va_dian_spool_dir`: Directory where the ZIPs arrive. Without it, the spool
+  is not scanned.
+- `va_dian_spool_batch_size`: ZIPs taken per scan (default 20).
+- `va_dian_spool_poll_interval_seconds`: Minimum time between scans (default
+  60). The scheduler checks every minute.
+
+Each ZIP is claimed by moving it into `processing/`, so concurrent scans
+never take the same file, and ends on `done/` or `failed/` (with the reason
+on a `.error.txt` file beside it). A ZIP whose name is still on
+`processing/` waits on the spool until that one is done.
+
+---------------------------------------------------------------------------- """
+
+
+import os
+import time
+from pathlib import Path
+
+import frappe
+from frappe.utils import cint, now_datetime
+
+from va_app.va_dian.api.dian_zip_ingest import (
+    INGEST_JOB_TIMEOUT_SECONDS,
+    INGEST_QUEUE,
+    ingest_dian_zip_path,
+)
+
+
+SPOOL_DEFAULT_BATCH_SIZE = 20
+SPOOL_DEFAULT_POLL_INTERVAL_SECONDS = 60
+
+# Files modified more recently may still be being written.
+SPOOL_MIN_FILE_AGE_SECONDS = 10
+
+# Claimed files of a batch that did not finish (a lost worker) are returned
+# to the spool after this time.
+SPOOL_STALE_CLAIM_SECONDS = 2 * INGEST_JOB_TIMEOUT_SECONDS
+
+SPOOL_LAST_SCAN_CACHE_KEY = "va_dian_spool_last_scan"
+
+PROCESSING_DIR = "processing"
+DONE_DIR = "done"
+FAILED_DIR = "failed"
+
+
+def scan_dian_zip_spool():
+    """
+    Scheduled job: claims a batch of the ZIPs on the spool and enqueues
+    their ingestion.
+    """
+
+    spool_dir = frappe.conf.get("va_dian_spool_dir")
+    if not spool_dir:
+        return
+
+    poll_interval = cint(frappe.conf.get("va_dian_spool_poll_interval_seconds")) or SPOOL_DEFAULT_POLL_INTERVAL_SECONDS
+    last_scan = frappe.cache.get_value(SPOOL_LAST_SCAN_CACHE_KEY)
+    if last_scan and time.time() - last_scan < poll_interval:
+        return
+    frappe.cache.set_value(SPOOL_LAST_SCAN_CACHE_KEY, time.time())
+
+    batch_size = cint(frappe.conf.get("va_dian_spool_batch_size")) or SPOOL_DEFAULT_BATCH_SIZE
+
+    spool = _get_spool(spool_dir)
+    _release_stale_claims(spool)
+
+    claimed = _claim_zips(spool, batch_size)
+    if claimed:
+        frappe.enqueue(
+            ingest_claimed_zips,
+            queue=INGEST_QUEUE,
+            timeout=INGEST_JOB_TIMEOUT_SECONDS,
+            spool_dir=str(spool),
+            file_names=claimed,
+        )
+
+
+def ingest_claimed_zips(
+    spool_dir: str,
+    file_names: list[str],
+) -> dict[str, str]:
+    """
+    Ingests the ZIPs `file_names` claimed on `processing/` of `spool_dir`, as
+    `ingest_dian_zip`, and moves each one to `done/` or `failed/`. A ZIP with
+    a document already ingested counts as done.
+
+    Returns a dict with the outcome (`done` or `failed`) keyed by file name.
+    """
+
+    spool = Path(spool_dir)
+    outcomes = {}
+
+    for file_name in file_names:
+        path = spool / PROCESSING_DIR / file_name
+        try:
+            ingest_dian_zip_path(str(path), return_existing=True)
+        except Exception as e:
+            frappe.db.rollback()
+            frappe.log_error(title=f"DIAN spool: {file_name}")
+            target = _move_unique(path, spool / FAILED_DIR)
+            target.with_name(f"{target.name}.error.txt").write_text(str(e) or type(e).__name__)
+            outcomes[file_name] = "failed"
+        else:
+            _move_unique(path, spool / DONE_DIR)
+            outcomes[file_name] = "done"
+
+        # Caught errors are not for the user of a background job.
+        frappe.local.message_log = []
+
+    return outcomes
+
+
+# -----------------------------------------------------------------------------
+# Helpers.
+# -----------------------------------------------------------------------------
+
+
+def _get_spool(spool_dir: str) -> Path:
+    """
+    Helper that provides the spool directory, with its subdirectories.
+    """
+    spool = Path(spool_dir)
+    if not spool.is_dir():
+        frappe.throw(f"The DIAN spool directory {spool_dir} does not exist")
+
+    for name in (PROCESSING_DIR, DONE_DIR, FAILED_DIR):
+        (spool / name).mkdir(exist_ok=True)
+
+    return spool
+
+
+def _claim_zips(
+    spool: Path,
+    batch_size: int,
+) -> list[str]:
+    """
+    Moves up to `batch_size` ZIPs, oldest first, from `spool` to its
+    `processing/`. A file moved first by another scan, or with its name still
+    on `processing/`, is skipped.
+
+    Returns:
+        The file names claimed
+    """
+
+    now = time.time()
+    candidates = []
+    with os.scandir(spool) as entries:
+        for entry in entries:
+            if not entry.is_file() or not entry.name.lower().endswith(".zip"):
+                continue
+            modified = entry.stat().st_mtime
+            if now - modified >= SPOOL_MIN_FILE_AGE_SECONDS:
+                candidates.append((modified, entry.name))
+
+    claimed = []
+    for _, file_name in sorted(candidates):
+        if len(claimed) >= batch_size:
+            break
+        try:
+            _move_exclusive(spool / file_name, spool / PROCESSING_DIR / file_name)
+        except (FileNotFoundError, FileExistsError):
+            continue
+        claimed.append(file_name)
+
+    return claimed
+
+
+def _release_stale_claims(spool: Path):
+    """
+    Returns to the spool the claimed files left on `processing/` for longer
+    than `SPOOL_STALE_CLAIM_SECONDS`.
+    """
+
+    now = time.time()
+    with os.scandir(spool / PROCESSING_DIR) as entries:
+        for entry in entries:
+            # The move of the claim keeps the time of the file, so the
+            # change time tells when it was claimed.
+            if entry.is_file() and now - entry.stat().st_ctime > SPOOL_STALE_CLAIM_SECONDS:
+                try:
+                    _move_exclusive(Path(entry.path), spool / entry.name)
+                except (FileNotFoundError, FileExistsError):
+                    pass
+
+
+def _move_exclusive(
+    path: Path,
+    target: Path,
+):
+    """
+    Moves `path` to `target` with a hard link and an unlink, as `os.rename`
+    replaces an existing `target` on POSIX. Raises `FileExistsError` when
+    `target` exists, and `FileNotFoundError` when `path` does not.
+    """
+
+    os.link(path, target)
+    os.unlink(path)
+
+
+def _move_unique(
+    path: Path,
+    directory: Path,
+) -> Path:
+    """
+    Moves `path` to `directory`, adding the time to its name if another file
+    has it.
+
+    Returns:
+        The new path
+    """
+
+    target = directory / path.name
+    if target.exists():
+        target = directory / f"{path.stem}-{now_datetime():%Y%m%d%H%M%S%f}{path.suffix}"
+    os.replace(path, target)
+
+    return target
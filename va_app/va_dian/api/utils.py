@@ -1,8 +1,8 @@
 """ ----------------------------------------------------------------------------
-Copyright (c) 2024-2025, VIDAL & ASTUDILLO Ltda and contributors.
+Copyright (c) 2024-2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2025-05-05
+Version 2026-10-18
 
 --------------------------------------------------------------------------------
 
@@ -11,10 +11,17 @@ Utils.
 ---------------------------------------------------------------------------- """
 
 
+import hashlib
+from collections.abc import Sequence
 from dataclasses import (
-    asdict, 
+    fields,
     is_dataclass,
 )
+from decimal import Decimal
+
+
+# Size of the blocks read to compute file hashes.
+HASH_BLOCK_SIZE = 1024 * 1024
 
 
 def provide_nicely_formatted_dictionary(data: dict, indent=0) -> str:
@@ -38,13 +45,27 @@ def provide_nicely_formatted_dictionary(data: dict, indent=0) -> str:
 def recursive_dataclass_to_dict(data):
     """
     Returns a dict from a dataclass, applying recursions to its elements in
-    case those are dataclases themselves.
+    case those are dataclases themselves. Sequences (other than text) become
+    lists and decimals become text, as written on the XML.
     """
     if is_dataclass(data):
-        return {key: recursive_dataclass_to_dict(value) for key, value in asdict(data).items()}
-    elif isinstance(data, list):
-        return [recursive_dataclass_to_dict(item) for item in data]
+        return {f.name: recursive_dataclass_to_dict(getattr(data, f.name)) for f in fields(data)}
     elif isinstance(data, dict):
         return {key: recursive_dataclass_to_dict(value) for key, value in data.items()}
+    elif isinstance(data, Decimal):
+        return str(data)
+    elif isinstance(data, Sequence) and not isinstance(data, (str, bytes)):
+        return [recursive_dataclass_to_dict(item) for item in data]
     else:
         return data
+
+
+def sha256_of_file(path: str) -> str:
+    """
+    Returns the hex SHA-256 of the file at `path`, reading it by blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -3,7 +3,7 @@
 Copyright (c) 2025-2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2026-02-16
+Version 2026-10-18
 
 --------------------------------------------------------------------------------
 Propósitos:
@@ -33,6 +33,59 @@ Requerimientos:
 
 ----------------------------------------------------------------------------- */
 
+/**
+ * Encola la ingesta del ZIP en `file_url` y muestra su progreso. Al terminar
+ * llama `on_done` con el resultado, o muestra el error.
+ */
+function enqueue_dian_zip_ingest(file_url, bulk, on_done) {
+  frappe.call({
+    method: "va_app.va_dian.api.dian_zip_ingest.enqueue_dian_zip_ingest",
+    args: { file_url: file_url, bulk: bulk ? 1 : 0 },
+    callback(r) {
+      const job_id = r.message;
+      const title = __("Importando ZIP DIAN");
+      let finished = false;
+      frappe.show_alert({ message: __("Importación encolada"), indicator: "blue" });
+
+      const on_progress = (data) => {
+        if (finished || data.job_id !== job_id) return;
+        frappe.show_progress(title, data.done, data.total, __("{0} de {1}", [data.done, data.total]));
+      };
+      const on_finished = (outcome) => {
+        if (finished || outcome.job_id !== job_id) return;
+        finished = true;
+        frappe.realtime.off("dian_zip_ingest_progress", on_progress);
+        frappe.realtime.off("dian_zip_ingest_done", on_finished);
+        frappe.hide_progress();
+        if (outcome.status === "finished") {
+          on_done(outcome.result);
+        } else {
+          frappe.msgprint({
+            title: __("Error importando ZIP DIAN"),
+            message: outcome.message,
+            indicator: "red",
+          });
+        }
+      };
+      frappe.realtime.on("dian_zip_ingest_progress", on_progress);
+      frappe.realtime.on("dian_zip_ingest_done", on_finished);
+
+      // The job may have finished (or be a duplicate of one that did) before
+      // subscribing; only its stored outcome has a result or a message.
+      frappe.call({
+        method: "va_app.va_dian.api.dian_zip_ingest.get_dian_zip_ingest_status",
+        args: { job_id: job_id },
+        callback(s) {
+          const outcome = s.message;
+          if (outcome && (outcome.result != null || outcome.message)) {
+            on_finished(outcome);
+          }
+        },
+      });
+    },
+  });
+}
+
 /**
  * Botones para ejecutar procesos sobre los documentos
  */
@@ -84,16 +137,31 @@ frappe.ui.form.on("DIAN document", {
         allow_multiple: false,
         restrictions: { allowed_file_types: [".zip"] },
         on_success(file) {
-          frappe.call({
-            method: "va_app.va_dian.api.dian_zip_ingest.ingest_dian_zip",
-            args: { file_url: file.file_url },
-            freeze: true,
-            callback(r) {
-              frappe.msgprint(
-                __("Documento DIAN creado: {0}", [r.message])
-              );
-              frappe.set_route("Form", "DIAN document", r.message);
-            },
+          enqueue_dian_zip_ingest(file.file_url, false, (result) => {
+            frappe.msgprint(
+              __("Documento DIAN creado: {0}", [result])
+            );
+            frappe.set_route("Form", "DIAN document", result);
+          });
+        },
+      });
+    });
+
+    // Button to ingest a DIAN ZIP with many documents.
+    frm.add_custom_button("Importar ZIP DIAN masivo", () => {
+      new frappe.ui.FileUploader({
+        allow_multiple: false,
+        restrictions: { allowed_file_types: [".zip"] },
+        on_success(file) {
+          enqueue_dian_zip_ingest(file.file_url, true, (manifest) => {
+            manifest = manifest || [];
+            const count = (status) => manifest.filter((entry) => entry.status === status).length;
+            frappe.msgprint(
+              __("Documentos creados: {0}, existentes: {1}, con error: {2}", [
+                count("created"), count("existing"), count("error"),
+              ])
+            );
+            frappe.set_route("List", "DIAN document");
           });
         },
       });
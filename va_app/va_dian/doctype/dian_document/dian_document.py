@@ -2,7 +2,7 @@
 Copyright (c) 2025-2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2026-02-15
+Version 2026-10-18
 ---------------------------------------------------------------------------- """
 
 
@@ -19,10 +19,18 @@ class DIANdocument(Document):
 	def after_save(self):
 		"""
 		After inserting a `DIAN document` its related files will be renamed
-		with content of the XML.
+		with content of the XML, unless they were attached with those names.
 		"""
+		if self.flags.attachments_named:
+			return
 		self.rename_attached_documents_per_xml_content()
 
+	def on_trash(self):
+		"""
+		The extracted items belong to this document only.
+		"""
+		frappe.db.delete("DIAN document item", {"dian_document": self.name})
+
 	def rename_attached_documents_per_xml_content(self):
 		"""
 		Rename the Electronic Documents attached according to the content
@@ -38,21 +46,35 @@ class DIANdocument(Document):
 		if not issue_date:
 			frappe.throw("Fecha de emisión no determinada; No es posible renombrar los archivos adjuntos")
 
-		date_prefix = getdate(issue_date).strftime("%y-%m-%d")
-
 		for field in ("xml", "representation"):
-			file_doc = frappe.get_doc("File", {"file_url": getattr(self, field)})
-			original = Path(file_doc.file_name)
+			# Only the row attached here; with content addressed storage,
+			# other documents share the `file_url`.
+			file_doc = frappe.get_doc("File", {
+				"file_url": getattr(self, field),
+				"attached_to_doctype": self.doctype,
+				"attached_to_name": self.name,
+			})
 
-			new_name = (
-				f"{date_prefix} {party} - "
-				f"{self._sanitize(original.stem)}{original.suffix}"
-			)
+			new_name = self.build_attachment_file_name(party, issue_date, file_doc.file_name)
 
 			if file_doc.file_name != new_name:
 				file_doc.file_name = new_name
 				file_doc.save(ignore_permissions=True)
 
+	@classmethod
+	def build_attachment_file_name(cls, party: str, issue_date, file_name: str) -> str:
+		"""
+		Name for an attached file according to the content extracted from the
+		XML (Issue Date Party).
+		"""
+		date_prefix = getdate(issue_date).strftime("%y-%m-%d")
+		original = Path(file_name)
+
+		return (
+			f"{date_prefix} {party} - "
+			f"{cls._sanitize(original.stem)}{original.suffix}"
+		)
+
 	@staticmethod
 	def _sanitize(name: str) -> str:
 		keep = " ._-"
@@ -0,0 +1,14 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+---------------------------------------------------------------------------- """
+
+
+# import frappe
+from frappe.model.document import Document
+
+
+class DIANingestarchive(Document):
+	pass
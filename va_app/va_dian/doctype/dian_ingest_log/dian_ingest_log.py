@@ -0,0 +1,23 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+---------------------------------------------------------------------------- """
+
+
+import frappe
+from frappe.model.document import Document
+from frappe.query_builder import Interval
+from frappe.query_builder.functions import Now
+
+
+class DIANingestlog(Document):
+
+	@staticmethod
+	def clear_old_logs(days=90):
+		"""
+		Called by `Log Settings` to remove the logs older than `days`.
+		"""
+		table = frappe.qb.DocType("DIAN ingest log")
+		frappe.db.delete(table, filters=(table.creation < (Now() - Interval(days=days))))
@@ -1,14 +1,32 @@
 """ ----------------------------------------------------------------------------
-Copyright (c) 2025, VIDAL & ASTUDILLO Ltda and contributors.
+Copyright (c) 2025-2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2025-05-03
+Version 2026-10-18
 ---------------------------------------------------------------------------- """
 
 
 # import frappe
 from frappe.model.document import Document
 
+from va_app.va_dian.api.dian_tercero_search import (
+	build_search_text,
+)
+from va_app.va_dian.api.dian_tercero_utils import (
+	clear_dian_tercero_detail_cache,
+)
+
 
 class DIANtercero(Document):
-	pass
+
+	def validate(self):
+		self.search_text = build_search_text(self.as_dict())
+
+	def on_update(self):
+		clear_dian_tercero_detail_cache([self.name])
+
+	def on_trash(self):
+		clear_dian_tercero_detail_cache([self.name])
+
+	def after_rename(self, old, new, merge=False):
+		clear_dian_tercero_detail_cache([old, new])
@@ -1,8 +1,8 @@
 """ ----------------------------------------------------------------------------
-Copyright (c) 2024-2025, VIDAL & ASTUDILLO Ltda and contributors.
+Copyright (c) 2024-2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2025-05-07
+Version 2026-10-18
 ---------------------------------------------------------------------------- """
 
 
@@ -39,12 +39,16 @@ from va_app.va.api.erp_fieldnames import (
 	GL_ENTRY_FIELD_NAME_CREDIT,
 	GL_ENTRY_FIELD_NAME_CLOSING_DEBIT,
 	GL_ENTRY_FIELD_NAME_CLOSING_CREDIT,
+	GL_ENTRY_FIELD_NAME_DIAN_TERCERO,
+	GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED,
 	DIAN_TERCERO_DOCTYPE_NAME,
 	DIAN_TERCERO_FIELD_NAME_NOMBRE_COMPLETO,
 )
+from va_app.va_dian.api.dian_gl_tercero import (
+	get_gl_entries_dian_tercero_ids,
+)
 from va_app.va_dian.api.dian_tercero_utils import (
-	aux_get_dian_tercero_id_for_party,
-	aux_get_dian_tercero_id_from_doctype,
+	aux_get_dian_tercero_details,
 )
 
 
@@ -84,6 +88,7 @@ def get_report_data(filters):
 			name as {CUSTOM_FIELD_NAME_GL_ENTRY}, {GL_ENTRY_FIELD_NAME_POSTING_DATE}, {GL_ENTRY_FIELD_NAME_ACCOUNTS}, {GL_ENTRY_FIELD_NAME_PARTY_TYPE}, {GL_ENTRY_FIELD_NAME_PARTY},
 			{GL_ENTRY_FIELD_NAME_DEBIT}, {GL_ENTRY_FIELD_NAME_CREDIT},
 			{GL_ENTRY_FIELD_NAME_VOUCHER_TYPE}, {GL_ENTRY_FIELD_NAME_VOUCHER_SUBTYPE}, {GL_ENTRY_FIELD_NAME_VOUCHER_NO},
+			{GL_ENTRY_FIELD_NAME_DIAN_TERCERO}, {GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED},
 			cost_center, project,
 			against_voucher_type, against_voucher, account_currency,
 			against, is_opening, creation
@@ -218,12 +223,25 @@ def aux_build_dian_tercero_info(
 	if nit is None or nit == "":
 		return UNKNOWN_PARTY
 
-	# Take the information about that tercero from the DIAN Records
-	current_formal_name = frappe.db.get_value(DIAN_TERCERO_DOCTYPE_NAME, nit, DIAN_TERCERO_FIELD_NAME_NOMBRE_COMPLETO) or ""
+	return aux_build_dian_tercero_infos({nit})[nit]
+
+
+def aux_build_dian_tercero_infos(
+		nits: set[str],
+	) -> dict[str, str]:
+	"""
+	As `aux_build_dian_tercero_info`, for several NITs, with their Full Name
+	from the shared cache of `DIAN tercero` details.
+	Returns the strings keyed by NIT.
+	"""
+
+	details = aux_get_dian_tercero_details(nits)
 
 	joiner = ": "
-	current_selected_party = joiner.join([nit, current_formal_name])
-	return current_selected_party
+	return {
+		nit: joiner.join([nit, details[nit].get(DIAN_TERCERO_FIELD_NAME_NOMBRE_COMPLETO) or ""]) if nit else UNKNOWN_PARTY
+		for nit in nits
+	}
 
 
 def remap_database_content(
@@ -250,7 +268,13 @@ def remap_database_content(
 
 	temporal_grouping_dict: dict[str, dict[str, list[str, dict[str, object]]]] = {}
 
-	for single_gl_entry in db_results:
+	# The Tercero ID of every record is the one stored on it, or resolved at
+	# once for those not resolved yet, and the representation of each one is
+	# built once
+	nits = get_gl_entries_dian_tercero_ids(db_results)
+	selected_parties = aux_build_dian_tercero_infos(set(nits))
+
+	for single_gl_entry, current_nit in zip(db_results, nits):
 
 		"""
 		Determine content from the current record
@@ -266,38 +290,14 @@ def remap_database_content(
 		# Determine the party based on the voucher
 		current_voucher_type = single_gl_entry.get(GL_ENTRY_FIELD_NAME_VOUCHER_TYPE)
 		current_voucher_no = single_gl_entry.get(GL_ENTRY_FIELD_NAME_VOUCHER_NO)
-		current_party_type_from_gl = single_gl_entry.get(GL_ENTRY_FIELD_NAME_PARTY_TYPE)
-		current_party_from_gl = single_gl_entry.get(GL_ENTRY_FIELD_NAME_PARTY)
 
 		"""
 		Determine the current party
 		"""
 
 		# If the party is specified for the record, then it prevails over the
-		# document's
-		if current_party_type_from_gl is not None \
-			and current_party_type_from_gl != '' \
-			and current_party_from_gl is not None \
-			and current_party_from_gl != '':
-
-			# Get the Tercero ID
-			current_nit = aux_get_dian_tercero_id_for_party(
-				party_type=current_party_type_from_gl,
-				party=current_party_from_gl,
-			)
-
-		else:
-			# With no direct party on the record, extracts it from the
-			# associated Voucher
-			current_nit = aux_get_dian_tercero_id_from_doctype(
-				doc_type=current_voucher_type,
-				doc_id=current_voucher_no,
-			)
-
-		# Build a representation for the Tercero ID
-		current_selected_party = aux_build_dian_tercero_info(
-			nit=current_nit,
-		)
+		# document's (resolved above)
+		current_selected_party = selected_parties[current_nit]
 
 		"""
 		Insert GL Entry into the result
@@ -0,0 +1,51 @@
+/* -----------------------------------------------------------------------------
+
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+----------------------------------------------------------------------------- */
+
+
+frappe.query_reports["DIAN Ingest Stages"] = {
+	"filters": [
+		{
+			"fieldname": "from_date",
+			"label": "From Date",
+			"fieldtype": "Date",
+			"default": frappe.datetime.add_months(frappe.datetime.get_today(), -1),
+			"reqd": 1
+		},
+		{
+			"fieldname": "to_date",
+			"label": "To Date",
+			"fieldtype": "Date",
+			"default": frappe.datetime.get_today(),
+			"reqd": 1
+		},
+		{
+			"fieldname": "period",
+			"label": "Period",
+			"fieldtype": "Select",
+			"options": "Daily\nWeekly\nMonthly",
+			"default": "Weekly",
+			"reqd": 1
+		},
+		{
+			"fieldname": "operation",
+			"label": "Operation",
+			"fieldtype": "Select",
+			"options": "ZIP\nXML\nDIAN tercero",
+			"default": "ZIP",
+			"reqd": 1
+		},
+		{
+			"fieldname": "status",
+			"label": "Status",
+			"fieldtype": "Select",
+			"options": "\nCreated\nUpdated\nExisting\nFailed",
+			"default": "Created"
+		}
+	]
+};
@@ -0,0 +1,118 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+
+--------------------------------------------------------------------------------
+
+Percentiles of the seconds spent per stage by the ingestions of DIAN ZIPs
+(or by the other operations recorded), per period, from `DIAN ingest log`.
+
+---------------------------------------------------------------------------- """
+
+
+import math
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, get_first_day, get_first_day_of_week, getdate
+
+from va_app.va_dian.api.dian_ingest_log import INGEST_OPERATION_ZIP, INGEST_STAGES
+
+
+def execute(filters=None):
+    filters = filters or {}
+    from_date = filters.get("from_date")
+    to_date = filters.get("to_date")
+    period = filters.get("period") or "Weekly"
+
+    if not from_date or not to_date:
+        frappe.throw(_("Please set both From Date and To Date"))
+
+    columns = [
+        {"fieldname": "period", "label": _("Period"), "fieldtype": "Date", "width": 110},
+        {"fieldname": "stage", "label": _("Stage"), "fieldtype": "Data", "width": 110},
+        {"fieldname": "runs", "label": _("Runs"), "fieldtype": "Int", "width": 80},
+        {"fieldname": "p50", "label": _("p50 (s)"), "fieldtype": "Float", "precision": 3, "width": 100},
+        {"fieldname": "p95", "label": _("p95 (s)"), "fieldtype": "Float", "precision": 3, "width": 100},
+        {"fieldname": "max", "label": _("Max (s)"), "fieldtype": "Float", "precision": 3, "width": 100},
+        {"fieldname": "mib_per_second", "label": _("MiB/s (p50)"), "fieldtype": "Float", "precision": 2, "width": 110},
+    ]
+
+    operation = filters.get("operation") or INGEST_OPERATION_ZIP
+    log_filters = {
+        "creation": ["between", [from_date, add_days(to_date, 1)]],
+        "operation": operation,
+    }
+    if filters.get("status"):
+        log_filters["status"] = filters.get("status")
+
+    stage_fields = [f"{stage}_seconds" for stage in INGEST_STAGES]
+    # Operations without an archive are measured by their XML.
+    bytes_field = "archive_bytes" if operation == INGEST_OPERATION_ZIP else "xml_bytes"
+    logs = frappe.get_all(
+        "DIAN ingest log",
+        filters=log_filters,
+        fields=["creation", "total_seconds", bytes_field, *stage_fields],
+        order_by="creation",
+    )
+
+    # Logs grouped by the first day of their period.
+    periods = {}
+    for log in logs:
+        periods.setdefault(_get_period_start(log.creation, period), []).append(log)
+
+    data = []
+    for period_start, period_logs in periods.items():
+        for stage, field in (*zip(INGEST_STAGES, stage_fields), ("total", "total_seconds")):
+            seconds = sorted(log[field] or 0.0 for log in period_logs)
+            row = {
+                "period": period_start,
+                "stage": stage,
+                "runs": len(seconds),
+                "p50": _percentile(seconds, 50),
+                "p95": _percentile(seconds, 95),
+                "max": seconds[-1],
+            }
+            if stage == "total":
+                rates = sorted(
+                    log[bytes_field] / log.total_seconds / (1024 * 1024)
+                    for log in period_logs
+                    if log.total_seconds and log[bytes_field]
+                )
+                row["mib_per_second"] = _percentile(rates, 50) if rates else None
+            data.append(row)
+
+    chart = {
+        "data": {
+            "labels": [str(period_start) for period_start in periods],
+            "datasets": [
+                {"name": _("p50 (s)"), "values": [row["p50"] for row in data if row["stage"] == "total"]},
+                {"name": _("p95 (s)"), "values": [row["p95"] for row in data if row["stage"] == "total"]},
+            ],
+        },
+        "type": "line",
+    }
+
+    return columns, data, None, chart
+
+
+def _get_period_start(creation, period: str):
+    """
+    Helper that provides the first day of the `period` of `creation`.
+    """
+    day = getdate(creation)
+    if period == "Monthly":
+        return get_first_day(day)
+    if period == "Weekly":
+        return get_first_day_of_week(day)
+    return day
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    """
+    Helper that provides the nearest-rank `percent` percentile of the sorted
+    `values`.
+    """
+    return values[max(math.ceil(percent / 100 * len(values)) - 1, 0)]
@@ -1,8 +1,8 @@
 """ ----------------------------------------------------------------------------
-Copyright (c) 2024-2025, VIDAL & ASTUDILLO Ltda and contributors.
+Copyright (c) 2024-2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2025-05-09
+Version 2026-10-18
 
 * PROMPT USED (for the draft of this module) *
 
@@ -26,10 +26,13 @@ As I have mentioned initially, the `custom_dian_tercero` is a `custom field` of
 
 import frappe
 from frappe import _
+from va_app.va.api.erp_fieldnames import (
+    GL_ENTRY_FIELD_NAME_DIAN_TERCERO,
+    GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED,
+)
 from va_app.va_dian.api.dian_tercero_utils import (
-    aux_get_dian_tercero,
-    aux_get_dian_tercero_id_for_party,
-    aux_get_dian_tercero_id_from_doctype,
+    aux_get_dian_tercero_ids_for_gl_entries,
+    aux_get_dian_terceros,
 )
 # from erpnext.accounts.report.financial_statements import (
 # 	compute_growth_view_data,
@@ -188,41 +191,48 @@ def execute(filters=None):
         },
     ]
 
-    # Fetch GL Entries in date range
+    # Keys of the aggregation: account, tercero_id, and - optionally -
+    # voucher_type and voucher
+    group_fields = ["account", GL_ENTRY_FIELD_NAME_DIAN_TERCERO]
+    if group_by_voucher_type:
+        group_fields.append("voucher_type")
+    if show_voucher:
+        group_fields.append("voucher_no")
+    date_filter = ["posting_date", "between", [from_date, to_date]]
+
+    # GL Entries in date range with their Tercero resolved are summed by the
+    # database, blank if there was none to store
     entries = frappe.db.get_all("GL Entry",
+        fields=[*group_fields, "sum(debit) as debit", "sum(credit) as credit"],
+        filters=[date_filter, [GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED, "=", 1]],
+        group_by=", ".join(group_fields),
+        order_by=", ".join(group_fields),
+    )
+    tercero_ids = [e.get(GL_ENTRY_FIELD_NAME_DIAN_TERCERO) or "" for e in entries]
+
+    # The rest are fetched one by one, and their Tercero resolved in bulk:
+    # via party information if present, otherwise from the voucher
+    pending_entries = frappe.db.get_all("GL Entry",
         fields=["account", "party_type", "party", "voucher_type", "voucher_no", "debit", "credit"],
-        filters={"posting_date": ["between", [from_date, to_date]]},
+        filters=[date_filter, [GL_ENTRY_FIELD_NAME_DIAN_TERCERO_RESOLVED, "=", 0]],
         order_by="account, voucher_type, posting_date",
-	)
+    )
+    pending_tercero_ids = aux_get_dian_tercero_ids_for_gl_entries(pending_entries)
+    for e, tercero_id in zip(pending_entries, pending_tercero_ids):
+        # Use blank if not found, or if there is nothing to resolve it from
+        if not (e.party_type and e.party) and not (e.voucher_type and e.voucher_no):
+            tercero_id = None
+        tercero_ids.append(tercero_id or "")
+    entries += pending_entries
+
+    # Detail about every Tercero, from the shared cache
+    tercero_details = aux_get_dian_terceros(tercero_ids)
 
     # We'll use a dict to aggregate the results. Its key is a tuple composed
     # by account, tercero_id, and - optionally - voucher_type and voucher
     data_map = {}
-    for e in entries:
-        # ######################################################################
-        # Preliminar: Determining Tercero Key
-        # ######################################################################
-
-        tercero_id = None
-
-        # Resolve tercero_id via party information if present
-        if e.party_type and e.party:
-            tercero_id = aux_get_dian_tercero_id_for_party(
-                party_type=e.party_type,
-                party=e.party,
-            )
-            # print(f"GOT value: {tercero_id} from identified fields")
-        elif e.voucher_type and e.voucher_no:
-            # For Journal Entries, retrieve from Journal Entry record
-            tercero_id = aux_get_dian_tercero_id_from_doctype(
-                doc_type=e.voucher_type,
-                doc_id=e.voucher_no,
-            )
-            # print(f"GOT value: {tercero_id} from Document")
-
-        # Use None or blank if not found
-        tercero_id = tercero_id or ""
 
+    for e, tercero_id in zip(entries, tercero_ids):
         # ######################################################################
         # Building the Map Key
         # ######################################################################
@@ -245,7 +255,7 @@ def execute(filters=None):
         # If key is not yet on the records, it is created
         if group_key not in data_map:
             # Detail about the Tercero is populated
-            tercero_detail = aux_get_dian_tercero(tercero_id)
+            tercero_detail = tercero_details[tercero_id]
             data_map[group_key] = {
                 "account": e.account,
                 "tercero_id": tercero_id,
@@ -287,7 +297,8 @@ def execute(filters=None):
     elif show_voucher:
         the_key = ('the_account', 'the_tercero', 'the_voucher')
 
-    for the_key, the_values in data_map.items():
+    # Groups of both sources, by account
+    for the_key, the_values in sorted(data_map.items(), key=lambda item: item[1]["account"]):
 
         # Values should be rounded and converted into ints if required
         amount_of_decimals = 0 if use_int_values else 2
@@ -0,0 +1,70 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+---------------------------------------------------------------------------- """
+
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from va_app.va_dian.api import dian_document_utils
+from va_app.va_dian.api.dian_synthetic_documents import (
+    build_attached_document,
+    build_invoice,
+)
+
+
+class TestDIANDocumentUtils(FrappeTestCase):
+
+    def setUp(self):
+        # A unique trailing comment keeps the content hash out of the cache.
+        unique = frappe.generate_hash(length=8)
+        self.xml_file = frappe.get_doc({
+            "doctype": "File",
+            "file_name": f"{unique}.xml",
+            "content": build_attached_document(build_invoice(3)) + f"<!-- {unique} -->".encode(),
+            "is_private": 1,
+        }).insert()
+
+    def test_unchanged_xml_is_extracted_once(self):
+        with patch.object(
+            dian_document_utils,
+            "extract_dian_document",
+            wraps=dian_document_utils.extract_dian_document,
+        ) as extractor:
+            first = dian_document_utils._get_dian_document_object_from_xml_file(self.xml_file.name)
+            second = dian_document_utils._get_dian_document_object_from_xml_file(self.xml_file.name)
+
+        self.assertEqual(extractor.call_count, 1)
+        self.assertEqual(first.dict(), second.dict())
+
+    def test_bulk_update_reports_each_document(self):
+        results = dian_document_utils.update_docs_with_xml_info(docnames=["DIAN-DOC-MISSING"])
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["docname"], "DIAN-DOC-MISSING")
+        self.assertFalse(results[0]["success"])
+        self.assertTrue(results[0]["message"])
+
+    def test_items_are_replaced_with_their_totals(self):
+        docname = "DIAN-DOC-TEST-ITEMS"
+        xml_result = dian_document_utils._get_dian_document_object_from_xml_file(self.xml_file.name)
+        values = dian_document_utils._aux_get_dian_document_values_from_xml_result(xml_result)
+
+        dian_document_utils._aux_replace_dian_document_items({docname: xml_result})
+        dian_document_utils._aux_replace_dian_document_items({docname: xml_result})
+
+        rows = frappe.get_all(
+            "DIAN document item",
+            filters={"dian_document": docname},
+            fields=["idx", "description", "extension_amount"],
+            order_by="idx",
+        )
+        self.assertEqual(len(rows), values["xml_items_count"])
+        self.assertEqual([row.idx for row in rows], [1, 2, 3])
+        self.assertEqual(rows[0].description, "Item 1")
+        self.assertEqual(sum(row.extension_amount for row in rows), values["xml_total_extension_amount"])
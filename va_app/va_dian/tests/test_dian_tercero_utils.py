@@ -0,0 +1,159 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+---------------------------------------------------------------------------- """
+
+
+import frappe
+
+from frappe.tests.utils import FrappeTestCase
+
+from va_app.va_dian.api.dian_gl_tercero import (
+    get_gl_entries_dian_tercero_ids,
+)
+from va_app.va_dian.api.dian_tercero_search import (
+    build_search_text,
+    search_dian_tercero,
+)
+from va_app.va_dian.api.dian_tercero_utils import (
+    TERCERO_SOURCE_XML,
+    _upsert_dian_tercero,
+    aux_compute_dian_check_digit,
+    aux_get_dian_tercero_details,
+    aux_get_dian_tercero_id_for_party,
+    aux_get_dian_tercero_id_from_doctype,
+    aux_get_dian_tercero_ids_for_gl_entries,
+    get_dian_tercero_upsert_counters,
+    upsert_dian_terceros,
+)
+
+
+class TestDIANTerceroUtils(FrappeTestCase):
+
+    def test_bulk_resolution_matches_the_row_by_row_one(self):
+        rows = [
+            {"party_type": "Customer", "party": customer, "voucher_type": None, "voucher_no": None}
+            for customer in frappe.get_all("Customer", pluck="name", limit=3)
+        ]
+        rows += [
+            {"party_type": "Customer", "party": "_Missing Customer", "voucher_type": None, "voucher_no": None},
+            {"party_type": "*SpecialCaseTypeDIAN*", "party": "900123456", "voucher_type": None, "voucher_no": None},
+            {"party_type": "Student", "party": "Someone", "voucher_type": None, "voucher_no": None},
+            {"party_type": None, "party": None, "voucher_type": "Sales Invoice", "voucher_no": "_Missing Invoice"},
+            {"party_type": None, "party": None, "voucher_type": "Payment Entry", "voucher_no": "_Missing Payment"},
+            {"party_type": "", "party": "", "voucher_type": "Period Closing Voucher", "voucher_no": "PCV-1"},
+        ]
+        rows += [
+            {"party_type": None, "party": None, "voucher_type": voucher_type, "voucher_no": voucher_no}
+            for voucher_type in ("Journal Entry", "Sales Invoice", "Payment Entry")
+            for voucher_no in frappe.get_all(voucher_type, pluck="name", limit=3)
+        ]
+
+        expected = [
+            aux_get_dian_tercero_id_for_party(row["party_type"], row["party"])
+            if row["party_type"] and row["party"]
+            else aux_get_dian_tercero_id_from_doctype(row["voucher_type"], row["voucher_no"])
+            for row in rows
+        ]
+
+        self.assertEqual(aux_get_dian_tercero_ids_for_gl_entries(rows), expected)
+
+    def test_stored_gl_tercero_prevails_and_the_rest_is_resolved(self):
+        rows = [
+            {"party_type": "*SpecialCaseTypeDIAN*", "party": "900123456", "voucher_type": None, "voucher_no": None, "custom_dian_tercero": "800111222"},
+            {"party_type": "*SpecialCaseTypeDIAN*", "party": "900123456", "voucher_type": None, "voucher_no": None, "custom_dian_tercero": None},
+            {"party_type": "Student", "party": "Someone", "voucher_type": None, "voucher_no": None, "custom_dian_tercero": None},
+            # Resolved before, without a `DIAN tercero` to link.
+            {"party_type": "Student", "party": "Someone", "voucher_type": None, "voucher_no": None, "custom_dian_tercero": None, "custom_dian_tercero_resolved": 1},
+        ]
+
+        self.assertEqual(
+            get_gl_entries_dian_tercero_ids(rows),
+            ["800111222", *aux_get_dian_tercero_ids_for_gl_entries(rows[1:3]), ""],
+        )
+
+    def test_bulk_resolution_sees_parties_changed_in_the_transaction(self):
+        customer = frappe.get_all("Customer", pluck="name", limit=1)[0]
+        rows = [{"party_type": "Customer", "party": customer, "voucher_type": None, "voucher_no": None}]
+        aux_get_dian_tercero_ids_for_gl_entries(rows)
+
+        frappe.db.set_value("Customer", customer, "custom_dian_tercero", "900123456")
+
+        self.assertEqual(aux_get_dian_tercero_ids_for_gl_entries(rows), ["900123456"])
+
+    def test_tercero_details_are_cached_until_the_tercero_changes(self):
+        nit = "999999911"
+        self.assertEqual(aux_get_dian_tercero_details([nit])[nit], {})
+
+        tercero = frappe.get_doc({
+            "doctype": "DIAN tercero",
+            "nit": nit,
+            "razon_social": "Tercero de prueba",
+        }).insert(ignore_permissions=True)
+        self.assertEqual(aux_get_dian_tercero_details([nit])[nit]["razon_social"], "Tercero de prueba")
+
+        tercero.razon_social = "Tercero de prueba renombrado"
+        tercero.save(ignore_permissions=True)
+        self.assertEqual(aux_get_dian_tercero_details([nit])[nit]["razon_social"], "Tercero de prueba renombrado")
+
+        tercero.delete(ignore_permissions=True)
+        self.assertEqual(aux_get_dian_tercero_details([nit])[nit], {})
+
+    def test_bulk_upsert_writes_only_new_and_changed_terceros(self):
+        nits = ["999999912", "999999913"]
+        self.addCleanup(lambda: [
+            frappe.delete_doc("DIAN tercero", nit, ignore_permissions=True, force=True)
+            for nit in nits if frappe.db.exists("DIAN tercero", nit)
+        ])
+
+        contents = [{"nit": nit, "razon_social": f"Tercero {nit}"} for nit in nits]
+        outcomes = upsert_dian_terceros(contents + [{"nit": "ABC"}, {"nombre": "x"}])
+        self.assertEqual(
+            [outcome["status"] for outcome in outcomes],
+            ["created", "created", "invalid", "invalid"],
+        )
+        self.assertEqual(frappe.db.get_value("DIAN tercero", nits[0], "nombre_completo"), f"Tercero {nits[0]}")
+
+        contents[1]["razon_social"] = "Tercero renombrado"
+        outcomes = upsert_dian_terceros(contents)
+        self.assertEqual([outcome["status"] for outcome in outcomes], ["unchanged", "updated"])
+        self.assertEqual(frappe.db.get_value("DIAN tercero", nits[1], "razon_social"), "Tercero renombrado")
+
+    def test_check_digit_matches_the_dian_one(self):
+        self.assertEqual(
+            [aux_compute_dian_check_digit(nit) for nit in ("800197268", "800.197.268", "860034313", "x")],
+            [4, 4, 7, None],
+        )
+
+    def test_xml_upsert_keeps_the_stored_names_and_skips_no_op_writes(self):
+        nit = "999999914"
+        self.addCleanup(lambda: frappe.db.exists("DIAN tercero", nit) and frappe.delete_doc("DIAN tercero", nit, ignore_permissions=True, force=True))
+        _upsert_dian_tercero({"nit": nit, "razon_social": "Nombre del RUT", "telefono_1": "111"}, commit=False)
+
+        content = {"nit": nit, "razon_social": "Nombre de la factura", "telefono_1": "222"}
+        _upsert_dian_tercero(content, commit=False, source=TERCERO_SOURCE_XML)
+        stored = frappe.db.get_value("DIAN tercero", nit, ["razon_social", "telefono_1", "div"], as_dict=True)
+        self.assertEqual((stored.razon_social, stored.telefono_1), ("Nombre del RUT", "222"))
+        self.assertEqual(stored.div, aux_compute_dian_check_digit(nit))
+
+        modified = frappe.db.get_value("DIAN tercero", nit, "modified")
+        unchanged = get_dian_tercero_upsert_counters()["unchanged"]
+        _upsert_dian_tercero(content, commit=False, source=TERCERO_SOURCE_XML)
+        self.assertEqual(frappe.db.get_value("DIAN tercero", nit, "modified"), modified)
+        self.assertEqual(get_dian_tercero_upsert_counters()["unchanged"], unchanged + 1)
+
+    def test_search_folds_the_names_and_ranks_the_nit_prefix_first(self):
+        nit = "999999915"
+        tercero = frappe.get_doc({
+            "doctype": "DIAN tercero",
+            "nit": nit,
+            "razon_social": "Compañía Ñandú S.A.S.",
+            "nombre_completo": "Compañía Ñandú S.A.S.",
+        }).insert(ignore_permissions=True)
+        self.assertEqual(tercero.search_text, build_search_text(tercero.as_dict()))
+        self.assertIn("compania nandu", tercero.search_text)
+
+        rows = search_dian_tercero("DIAN tercero", "999.999.91", "name", 0, 20, {})
+        self.assertIn(nit, [row[0] for row in rows])
@@ -0,0 +1,32 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+---------------------------------------------------------------------------- """
+
+
+import unittest
+
+from va_app.va_dian.api.dian_xml_batch import extract_dian_documents
+from va_app.va_dian.api.dian_xml_extractor import DIANXMLExtractionError
+from va_app.va_dian.api.dian_synthetic_documents import (
+    build_attached_document,
+    build_invoice,
+)
+
+
+class TestDIANXMLBatch(unittest.TestCase):
+
+    def test_results_keep_input_order_and_errors(self):
+        contents = [
+            (f"doc-{i}", build_attached_document(build_invoice(i)) if i != 3 else b"<broken>")
+            for i in range(1, 7)
+        ]
+
+        for max_workers in (1, 2):
+            results = list(extract_dian_documents(contents, max_workers=max_workers))
+
+            self.assertEqual([key for key, _ in results], [key for key, _ in contents])
+            self.assertIsInstance(results[2][1], DIANXMLExtractionError)
+            self.assertEqual(len(results[5][1].items), 6)
@@ -0,0 +1,152 @@
+""" ----------------------------------------------------------------------------
+Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
+For license information, please see license.txt
+By JMVA, VIDAL & ASTUDILLO Ltda.
+Version 2026-10-18
+---------------------------------------------------------------------------- """
+
+
+import io
+import mmap
+import tempfile
+import unittest
+import zipfile
+from decimal import Decimal
+from unittest.mock import patch
+import xml.etree.ElementTree as ET
+
+from va_app.va_dian.api import dian_xml_extractor
+from va_app.va_dian.api.dian_data_models import ElectronicDocument
+from va_app.va_dian.api.dian_xml_extractor import (
+    DOCUMENT_NAMESPACE,
+    DOCUMENT_TYPE_GROUPS,
+    DIANXMLExtractionError,
+    ExtractionLevel,
+    _CompiledPath,
+    extract_dian_document,
+)
+from va_app.va_dian.api.dian_synthetic_documents import (
+    build_attached_document,
+    build_invoice,
+)
+
+
+class TestDIANXMLExtractor(unittest.TestCase):
+
+    def test_extracts_container_and_embedded_information(self):
+        document = extract_dian_document(io.BytesIO(build_attached_document(build_invoice(3))))
+
+        self.assertEqual(document.document_type, ElectronicDocument.FACTURA_ELECTRONICA)
+        self.assertEqual(document.document_id, "FE-1")
+        self.assertEqual(document.uuid, "CUFE-EMBEDDED")
+        self.assertEqual(document.issue_date, "2026-01-02")
+        self.assertEqual(document.sender_party_id, "900123456")
+        self.assertEqual(document.sender_email, "ventas@acme.co")
+        self.assertEqual(document.sender_address.ciudad, "Cali")
+        self.assertEqual(document.sender_address.direccion, "Calle 1")
+        self.assertIsNone(document.sender_address.codigo_postal)
+
+        self.assertEqual(len(document.items), 3)
+        self.assertEqual(document.items[1].quantity, Decimal("2"))
+        self.assertEqual(document.items[1].tax_amount, Decimal("29.00"))
+        self.assertEqual(document.items[1].taxable_amount, Decimal("200.00"))
+        self.assertEqual(document.items[1].description, "Item 2")
+
+    def test_many_lines(self):
+        document = extract_dian_document(io.BytesIO(build_attached_document(build_invoice(5000))))
+
+        self.assertEqual(len(document.items), 5000)
+        self.assertEqual(document.items[-1].extension_amount, Decimal("500000.00"))
+        self.assertEqual(document.items_total("extension_amount"), Decimal("1250250000.00"))
+        self.assertEqual(document.items_total("tax_amount"), sum(Decimal(f"{i}9.00") for i in range(1, 5001)))
+
+    def test_items_keep_their_text_on_dict(self):
+        document = extract_dian_document(io.BytesIO(build_attached_document(build_invoice(2))))
+
+        self.assertEqual(document.dict()["items"][1], {
+            "quantity": "2",
+            "price": "100.00",
+            "taxable_amount": "200.00",
+            "tax_amount": "29.00",
+            "extension_amount": "200.00",
+            "description": "Item 2",
+        })
+
+    def test_broken_embedded_document_falls_back_to_container_uuid(self):
+        document = extract_dian_document(io.BytesIO(build_attached_document("<Invoice><a></Invoice>")))
+
+        self.assertEqual(document.uuid, "CUFE-CONTAINER")
+        self.assertIsNone(document.items)
+        self.assertIsNone(document.sender_address)
+
+    def test_missing_embedded_document_is_rejected(self):
+        with self.assertRaises(DIANXMLExtractionError):
+            extract_dian_document(io.BytesIO(build_attached_document("")))
+
+    def test_malformed_container_is_rejected(self):
+        with self.assertRaises(DIANXMLExtractionError):
+            extract_dian_document(io.BytesIO(b"<AttachedDocument><a>"))
+
+    def test_header_level_matches_full_level_identification(self):
+        content = build_attached_document(build_invoice(5000))
+        full = extract_dian_document(io.BytesIO(content))
+        header = extract_dian_document(io.BytesIO(content), level=ExtractionLevel.HEADER)
+
+        for field_name in ("document_type", "uuid", "issue_date", "sender_party_id", "document_id"):
+            self.assertEqual(getattr(header, field_name), getattr(full, field_name), field_name)
+        self.assertIsNone(header.items)
+        self.assertIsNone(header.sender_address)
+
+    def test_header_level_stops_reading_after_uuid(self):
+        # Lines after the UUID are never parsed, so their breakage goes unseen.
+        embedded = build_invoice(2000).replace("</Invoice>", "<cac:InvoiceLine></Invoice>")
+        document = extract_dian_document(
+            io.BytesIO(build_attached_document(embedded)),
+            level=ExtractionLevel.HEADER,
+        )
+
+        self.assertEqual(document.uuid, "CUFE-EMBEDDED")
+
+    def test_embedded_document_split_in_small_pieces(self):
+        # The declaration and the first tags of the embedded document
+        # arrive split across the character data events of the container.
+        content = build_attached_document("  " + build_invoice(20))
+        expected = extract_dian_document(content).dict()
+
+        with patch.object(dian_xml_extractor, "FEED_CHUNK_SIZE", 3):
+            self.assertEqual(extract_dian_document(content).dict(), expected)
+            header = extract_dian_document(content, level=ExtractionLevel.HEADER)
+
+        self.assertEqual(header.uuid, "CUFE-EMBEDDED")
+
+    def test_compiled_paths_match_element_path(self):
+        root = ET.fromstring(build_invoice(2).split("?>", 1)[1])
+        line = root.find("cac:InvoiceLine", DOCUMENT_NAMESPACE)
+        item_spec = DOCUMENT_TYPE_GROUPS[ElectronicDocument.FACTURA_ELECTRONICA]["items"]
+
+        for expression in (*item_spec.fields.values(), "cac:TaxTotal/cbc:TaxAmount", ".//cbc:ID"):
+            self.assertIs(
+                _CompiledPath(expression).first(line),
+                line.find(expression, DOCUMENT_NAMESPACE),
+                expression,
+            )
+
+    def test_sources_give_the_same_document(self):
+        content = build_attached_document(build_invoice(50))
+        expected = extract_dian_document(io.BytesIO(content)).dict()
+
+        with tempfile.NamedTemporaryFile(suffix=".xml") as f:
+            f.write(content)
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                self.assertEqual(extract_dian_document(mapped).dict(), expected)
+            self.assertEqual(extract_dian_document(f.name).dict(), expected)
+
+        self.assertEqual(extract_dian_document(content).dict(), expected)
+        self.assertEqual(extract_dian_document(memoryview(content)).dict(), expected)
+
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr("document.xml", content)
+        with zipfile.ZipFile(archive) as zip_file, zip_file.open("document.xml") as member:
+            self.assertEqual(extract_dian_document(member).dict(), expected)
@@ -2,30 +2,44 @@
 Copyright (c) 2026, VIDAL & ASTUDILLO Ltda and contributors.
 For license information, please see license.txt
 By JMVA, VIDAL & ASTUDILLO Ltda.
-Version 2026-02-15
+Version 2026-10-18
 ---------------------------------------------------------------------------- """
 
 
-import frappe
+import io
 import os
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import frappe
 
 from frappe.tests.utils import FrappeTestCase
 
+from va_app.va_dian.api.dian_synthetic_documents import (
+    build_dian_zip,
+    build_representation_pdf,
+    iter_dian_zips,
+)
+
+
+# Queries allowed to ingest a ZIP of a known `DIAN tercero`, its log
+# included.
+INGEST_QUERY_BUDGET = 70
+
 
 class TestDIANZipIngest(FrappeTestCase):
 
     def setUp(self):
-        self.test_zip = os.path.join(
-            os.path.dirname(__file__),
-            "fixtures",
-            "sample_dian.zip",
-        )
+        # A new CUFE on every test.
+        self.zip_content = build_dian_zip(lines=3)
 
     def test_ingestion_creates_processed_document(self):
         file_doc = frappe.get_doc({
             "doctype": "File",
             "file_name": "sample_dian.zip",
-            "content": open(self.test_zip, "rb").read(),
+            "content": self.zip_content,
             "is_private": 1,
         }).insert()
 
@@ -44,13 +58,225 @@ class TestDIANZipIngest(FrappeTestCase):
         file_doc = frappe.get_doc({
             "doctype": "File",
             "file_name": "sample_dian.zip",
-            "content": open(self.test_zip, "rb").read(),
+            "content": self.zip_content,
             "is_private": 1,
         }).insert()
 
         from va_app.va_dian.api.dian_zip_ingest import ingest_dian_zip
 
-        ingest_dian_zip(file_doc.file_url)
+        name = ingest_dian_zip(file_doc.file_url)
+        files_before = frappe.db.count("File")
 
         with self.assertRaises(frappe.ValidationError):
             ingest_dian_zip(file_doc.file_url)
+        # As sent by a whitelisted call.
+        with self.assertRaises(frappe.ValidationError):
+            ingest_dian_zip(file_doc.file_url, return_existing="0")
+
+        # Rejected before any file or row is written.
+        self.assertEqual(frappe.db.count("File"), files_before)
+        self.assertEqual(ingest_dian_zip(file_doc.file_url, return_existing=True), name)
+
+    def test_duplicate_cufe_in_another_archive_is_rejected(self):
+        # Same members, in an archive with another SHA-256, so the ledger
+        # does not know it.
+        other_archive = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(self.zip_content)) as single, zipfile.ZipFile(other_archive, "w") as zip_file:
+            zip_file.comment = b"uploaded again"
+            for member in single.infolist():
+                zip_file.writestr(member.filename, single.read(member))
+
+        file_docs = [
+            frappe.get_doc({
+                "doctype": "File",
+                "file_name": file_name,
+                "content": content,
+                "is_private": 1,
+            }).insert()
+            for file_name, content in (
+                ("sample_dian.zip", self.zip_content),
+                ("sample_dian_again.zip", other_archive.getvalue()),
+            )
+        ]
+
+        from va_app.va_dian.api.dian_zip_ingest import ingest_dian_zip
+
+        name = ingest_dian_zip(file_docs[0].file_url)
+        files_before = frappe.db.count("File")
+
+        with self.assertRaises(frappe.ValidationError):
+            ingest_dian_zip(file_docs[1].file_url)
+
+        self.assertEqual(frappe.db.count("File"), files_before)
+        self.assertEqual(ingest_dian_zip(file_docs[1].file_url, return_existing=True), name)
+
+    def test_oversized_member_is_rejected(self):
+        file_doc = frappe.get_doc({
+            "doctype": "File",
+            "file_name": "sample_dian.zip",
+            "content": self.zip_content,
+            "is_private": 1,
+        }).insert()
+
+        from va_app.va_dian.api import dian_zip_ingest
+
+        files_before = frappe.db.count("File")
+
+        with patch.object(dian_zip_ingest, "MAX_MEMBER_SIZE_BYTES", 1024):
+            with self.assertRaises(frappe.ValidationError):
+                dian_zip_ingest.ingest_dian_zip(file_doc.file_url)
+
+        self.assertEqual(frappe.db.count("File"), files_before)
+
+    def test_bulk_ingestion_reports_every_member(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            for file_name, content in iter_dian_zips(2, lines=2, terceros=2):
+                zip_file.writestr(f"nested/{file_name}", content)
+            with zipfile.ZipFile(io.BytesIO(self.zip_content)) as single:
+                for member in single.infolist():
+                    zip_file.writestr(f"flat/{member.filename}", single.read(member))
+                # Same CUFE, no PDF of its own.
+                zip_file.writestr("flat/copy.xml", single.read(single.infolist()[0]))
+            zip_file.writestr("flat/fv-orphan.pdf", build_representation_pdf("orphan"))
+
+        file_doc = frappe.get_doc({
+            "doctype": "File",
+            "file_name": "bulk_dian.zip",
+            "content": archive.getvalue(),
+            "is_private": 1,
+        }).insert()
+
+        from va_app.va_dian.api.dian_zip_ingest import ingest_dian_zip_bulk
+        manifest = ingest_dian_zip_bulk(file_doc.file_url)
+
+        statuses = sorted(entry["status"] for entry in manifest)
+        self.assertEqual(statuses, ["created", "created", "created", "error", "error"])
+        for entry in manifest:
+            if entry["status"] == "created":
+                self.assertEqual(frappe.db.get_value("DIAN document", entry["docname"], "xml_cufe"), entry["cufe"])
+
+        # Uploaded again, the finished members are taken from the ledger and
+        # only the failed ones are retried.
+        documents_before = frappe.db.count("DIAN document")
+        self.assertEqual(ingest_dian_zip_bulk(file_doc.file_url), manifest)
+        self.assertEqual(frappe.db.count("DIAN document"), documents_before)
+        self.assertEqual(frappe.db.get_value("DIAN ingest archive", {"file_name": file_doc.file_name}, "status"), "Partial")
+
+    def test_bulk_ingestion_after_single_ingestion_takes_the_other_members(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            with zipfile.ZipFile(io.BytesIO(self.zip_content)) as single:
+                for member in single.infolist():
+                    zip_file.writestr(member.filename, single.read(member))
+            for file_name, content in iter_dian_zips(1, lines=2):
+                zip_file.writestr(f"nested/{file_name}", content)
+
+        file_doc = frappe.get_doc({
+            "doctype": "File",
+            "file_name": "mixed_dian.zip",
+            "content": archive.getvalue(),
+            "is_private": 1,
+        }).insert()
+
+        from va_app.va_dian.api.dian_zip_ingest import ingest_dian_zip, ingest_dian_zip_bulk
+
+        name = ingest_dian_zip(file_doc.file_url)
+        manifest = ingest_dian_zip_bulk(file_doc.file_url)
+
+        self.assertEqual(sorted(entry["status"] for entry in manifest), ["created", "created"])
+        self.assertIn(name, [entry["docname"] for entry in manifest])
+        self.assertEqual(frappe.db.get_value("DIAN ingest archive", {"file_name": file_doc.file_name}, "status"), "Complete")
+
+    def test_spooled_zips_are_claimed_and_sorted_out(self):
+        from va_app.va_dian.api.dian_zip_spool import (
+            _claim_zips,
+            _get_spool,
+            ingest_claimed_zips,
+        )
+
+        with tempfile.TemporaryDirectory() as spool_dir:
+            spool = _get_spool(spool_dir)
+            (spool / "good.zip").write_bytes(self.zip_content)
+            (spool / "bad.zip").write_bytes(b"not a zip")
+            (spool / "fresh.zip").write_bytes(build_dian_zip(lines=1))
+            for name in ("good.zip", "bad.zip"):
+                os.utime(spool / name, (0, 0))
+
+            claimed = _claim_zips(spool, batch_size=10)
+            self.assertEqual(sorted(claimed), ["bad.zip", "good.zip"])
+
+            outcomes = ingest_claimed_zips(spool_dir, claimed)
+
+            self.assertEqual(outcomes, {"bad.zip": "failed", "good.zip": "done"})
+            self.assertTrue((spool / "done" / "good.zip").exists())
+            self.assertTrue((spool / "failed" / "bad.zip.error.txt").exists())
+            self.assertEqual(list((spool / "processing").iterdir()), [])
+            self.assertTrue(Path(spool / "fresh.zip").exists())
+
+    def test_spooled_zip_waits_while_its_name_is_claimed(self):
+        from va_app.va_dian.api.dian_zip_spool import _claim_zips, _get_spool
+
+        with tempfile.TemporaryDirectory() as spool_dir:
+            spool = _get_spool(spool_dir)
+            (spool / "processing" / "same.zip").write_bytes(b"claimed before")
+            (spool / "same.zip").write_bytes(self.zip_content)
+            os.utime(spool / "same.zip", (0, 0))
+
+            self.assertEqual(_claim_zips(spool, batch_size=10), [])
+            self.assertEqual((spool / "processing" / "same.zip").read_bytes(), b"claimed before")
+            self.assertEqual((spool / "same.zip").read_bytes(), self.zip_content)
+
+    def test_content_addressed_attachments_share_the_content(self):
+        from va_app.va_dian.api.dian_zip_ingest import ingest_dian_zip
+
+        names = []
+        with patch.dict(frappe.conf, {"va_dian_content_addressed_files": 1}):
+            # Same PDF, apart CUFE and so apart XML.
+            for content in (self.zip_content, build_dian_zip(lines=3)):
+                file_doc = frappe.get_doc({
+                    "doctype": "File",
+                    "file_name": "sample_dian.zip",
+                    "content": content,
+                    "is_private": 1,
+                }).insert()
+                names.append(ingest_dian_zip(file_doc.file_url))
+
+        first, second = (frappe.get_doc("DIAN document", name) for name in names)
+
+        self.assertEqual(first.representation, second.representation)
+        self.assertNotEqual(first.xml, second.xml)
+        self.assertEqual(frappe.db.count("File", {"file_url": first.representation}), 2)
+
+        # The content stays while a row refers to it; deleting a document
+        # deletes its attachments.
+        frappe.delete_doc("DIAN document", first.name, ignore_permissions=True, force=True)
+        file_doc = frappe.get_doc("File", {"file_url": second.representation})
+        self.assertTrue(file_doc.exists_on_disk())
+
+    def test_ingestion_fits_the_query_budget(self):
+        from va_app.va_dian.api.dian_zip_ingest import ingest_dian_zip
+
+        file_urls = []
+        for content in (self.zip_content, build_dian_zip(lines=50)):
+            file_urls.append(frappe.get_doc({
+                "doctype": "File",
+                "file_name": "sample_dian.zip",
+                "content": content,
+                "is_private": 1,
+            }).insert().file_url)
+
+        # The first one inserts the `DIAN tercero`.
+        ingest_dian_zip(file_urls[0])
+
+        with self.assertQueryCount(INGEST_QUERY_BUDGET):
+            name = ingest_dian_zip(file_urls[1])
+
+        doc = frappe.get_doc("DIAN document", name)
+        self.assertEqual(doc.xml_items_count, 50)
+        log = frappe.get_last_doc("DIAN ingest log", filters={"dian_document": name})
+        self.assertEqual((log.status, log.documents, log.items_count), ("Created", 1, 50))
+        self.assertEqual(frappe.db.count("DIAN document item", {"dian_document": name}), 50)
+        for field in ("xml", "representation"):
+            file_name = frappe.db.get_value("File", {"file_url": doc.get(field)}, "file_name")
+            self.assertTrue(file_name.startswith(f"{doc.xml_issue_date:%y-%m-%d} {doc.xml_dian_tercero} - "))